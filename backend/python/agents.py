@@ -3,7 +3,7 @@ import google.generativeai as genai
 from langchain.schema import HumanMessage
 from tools import get_file_tree, read_file, set_repo_path
 import os
-from prompts import select_files_prompt, summarize_prompt, generate_readme_prompt
+from prompts import select_files_prompt, summarize_prompt, summary_record_schema, generate_readme_prompt
 import sys
 from dotenv import load_dotenv
 load_dotenv()
@@ -61,7 +61,7 @@ def agent_summarize_files(state):
             summaries.append(f"### {filename}\n(No content found)")
             continue
 
-        prompt = summarize_prompt.format(filename=filename, content=content[:3000])
+        prompt = summarize_prompt.format(filename=filename, content=content[:3000], schema=summary_record_schema)
         summary = llm.generate_content(prompt).text
         summaries.append(f"### {filename}\n{summary}")
     return {"summaries": summaries}
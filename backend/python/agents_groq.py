@@ -1,28 +1,91 @@
-from langgraph.graph import StateGraph
-from langchain.schema import HumanMessage
-from tools import get_file_tree, read_file, set_repo_path
-from prompts import select_files_prompt, summarize_prompt, generate_readme_prompt
+from tools import get_file_index, read_file_bounded, set_repo_path, file_blob_hash, get_commit, build_code_index, get_code_index
+from file_ranker import rank_files, pick_diverse, index_sources, is_landmark, RANKER_VERSION, INDEX_READ_CHARS, INDEX_SCAN_LIMIT
+from prompts import (
+    select_files_prompt, summarize_prompt, generate_readme_prompt, update_readme_prompt,
+    reduce_summaries_prompt, summary_record_schema, SUMMARY_PROMPT_VERSION, README_PROMPT_VERSION, REDUCE_PROMPT_VERSION,
+)
+from run_manifest import repo_identity, load_manifest, save_manifest, plan_rerun, merge_sections, RerunPlan, MANIFEST_NAME
+from summary_cache import get_summary_cache, make_key as make_cache_key
+from token_packer import count_tokens, truncate_to_tokens, pack as pack_files
+from summary_tree import SummaryTree
+from skeleton import outline, language as outline_language, SKELETON_VERSION
+from near_dup import find_near_duplicates
+from summary_records import parse_records, dumps as dump_record, render as render_summaries, render_one
+from pipeline import Pipeline
+import tracing
 from dotenv import load_dotenv
-from typing import TypedDict, List
+from typing import TypedDict, List, Dict
+from collections import namedtuple
 import os
 import re
 import json
+import math
 import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Load .env variables
 load_dotenv()
 def log(message: str):
-    print(message)
+    # Single write so lines from concurrent summarize threads don't interleave
+    sys.stdout.write(f"{message}\n")
     sys.stdout.flush()
 
-# ✅ Import fallback LLM manager
-from llm_fallback import LLMFallbackManager
 
-# Initialize fallback-based LLM
+# Structured stdout channel next to the log lines: the backend turns these into
+# README SSE events instead of log entries
+README_CHUNK_PREFIX = "[README_CHUNK]"
+README_RESET = "[README_RESET]"
+
+
+class ReadmeStream:
+    # on_chunk callback for llm.make_request: forwards README text a line at a time
+    # (token-sized pieces would mean one SSE event per token)
+    def __init__(self, min_chars=200):
+        self.min_chars = min_chars
+        self.buffer = ""
+        self.sent = False
+
+    def __call__(self, text):
+        if text is None:
+            self.reset()
+            return
+        self.buffer += text
+        if "\n" in text or len(self.buffer) >= self.min_chars:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            sys.stdout.write(f"{README_CHUNK_PREFIX}{json.dumps(self.buffer)}\n")
+            sys.stdout.flush()
+            self.buffer = ""
+            self.sent = True
+
+    def reset(self):
+        # The client drops what it has shown so far (a provider failed mid-stream)
+        self.buffer = ""
+        if self.sent:
+            sys.stdout.write(f"{README_RESET}\n")
+            sys.stdout.flush()
+            self.sent = False
+
+# Initialize fallback-based LLM (LLM_BACKEND=fake swaps in the offline stub used by benchmarks)
 try:
-    llm = LLMFallbackManager()
-    log("✅ Groq LLM initialized successfully")
+    if os.getenv("LLM_BACKEND", "").lower() == "fake":
+        from fake_llm import FakeLLM
+        llm = FakeLLM()
+        log("🧪 Fake LLM backend initialized"
+            + (f" (replaying {len(llm.recorded)} recorded responses)" if llm.recorded else ""))
+    else:
+        from llm_fallback import LLMFallbackManager
+        llm = LLMFallbackManager()
+        log("✅ Groq LLM initialized successfully")
+        if os.getenv("LLM_RECORD_FILE"):
+            # Capture real responses so benchmarks can replay them offline (FAKE_LLM_REPLAY)
+            from fake_llm import RecordingLLM
+            llm = RecordingLLM(llm, os.getenv("LLM_RECORD_FILE"))
+            log(f"📼 Recording LLM responses to {os.getenv('LLM_RECORD_FILE')}")
 except Exception as e:
     # If Groq initialization fails, log the error and stop execution.
     log(f"❌ Groq LLM failed to initialize: {str(e)}")
@@ -30,34 +93,125 @@ except Exception as e:
 
 # Graph state structure
 class GraphState(TypedDict):
+    candidates: List[str]           # files the selector chooses from
     selected_files: List[str]
     summaries: List[str]
+    file_summaries: Dict[str, str]  # per-file summaries (what the run manifest stores)
+    refreshed_files: List[str]      # selected files not reused from the previous run
     readme: str
+    # Incremental reruns (see run_manifest.py)
+    reuse_summaries: Dict[str, str]
+    previous_selected: List[str]
+    previous_readme: str
+    hierarchical: bool              # many files, folded into directory summaries (summary_tree.py)
+    similar_files: Dict[str, List[str]]  # candidate -> near-duplicates it stands for (near_dup.py)
+    speculation: object             # Speculation started while the selection request was in flight
 
 # Step 1: Balanced file selection (speed + accuracy)
+def _selection_mode():
+    # local: ranked locally, no LLM call; hybrid: LLM picks from the top-ranked files; llm: the LLM sees the first files in tree order
+    return os.getenv('SELECTION_MODE', 'local').lower()
+
+
+def _summary_mode(file_count):
+    # flat: up to MAX_FILES_TO_PROCESS files, their summaries go straight into the README prompt;
+    # hierarchical: up to HIERARCHICAL_MAX_FILES files, folded up the directory tree to fit;
+    # auto: hierarchical once the repo has HIERARCHICAL_MIN_FILES indexed files
+    mode = os.getenv('SUMMARY_MODE', 'auto').lower()
+    if mode == 'auto':
+        return 'hierarchical' if file_count >= int(os.getenv('HIERARCHICAL_MIN_FILES', '1500')) else 'flat'
+    return mode
+
+
+def _files_to_process(hierarchical):
+    if hierarchical:
+        return int(os.getenv('HIERARCHICAL_MAX_FILES', '200'))
+    return int(os.getenv('MAX_FILES_TO_PROCESS', '15'))
+
+
+def _code_index(entries):
+    # Imports/symbols of the repo's main source files, cached per commit (see import_graph.py)
+    started = time.perf_counter()
+    index, hit = build_code_index(entries, index_sources(entries, INDEX_SCAN_LIMIT), INDEX_READ_CHARS)
+    log(f"🧭 Code index {'loaded' if hit else 'built'}: {len(index.symbols)} files with symbols, "
+        f"{sum(len(t) for t in index.imports.values())} import edges in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return index
+
+
+def _near_duplicates(entries, paths):
+    """
+    Collapse near-identical files (templated pages, per-locale configs, generated
+    clients) in `paths`, an ordered list, to their first member. Only the first
+    DEDUP_SCAN_LIMIT paths are clustered. Returns (paths, {kept path: [similar paths]}).
+    """
+    if os.getenv('DEDUP', '1') == '0':
+        return paths, {}
+    scan_limit = int(os.getenv('DEDUP_SCAN_LIMIT', '10000'))  # Best-ranked files checked for near-duplicates
+    by_path = {entry.path: entry for entry in entries}
+    started = time.perf_counter()
+    near = find_near_duplicates([by_path[path] for path in paths[:scan_limit] if path in by_path],
+                                lambda path, max_chars: read_file_bounded(path, max_chars).content)
+    if not near:
+        return paths, {}
+    kept, similar = near.collapse(paths)
+    tracing.current_span().set(near_duplicates=near.duplicates)
+    log(f"🧬 {near.duplicates} near-duplicate files folded into {len(near)} representatives "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return kept, similar
+
+
+def _selection_candidates(entries, hierarchical=False):
+    # Files the selector chooses from (recorded as shown_files in the run manifest),
+    # and the near-duplicates each of them stands for
+    index = _code_index(entries) if _selection_mode() != 'llm' or _structure_limit() else None
+    if _selection_mode() == 'llm':
+        # No pre-filter needed: the scanner already dropped junk dirs, media,
+        # minified bundles, binaries and .gitignore'd paths
+        # Show more files for better selection
+        max_files_to_show = int(os.getenv('MAX_FILES_TO_SHOW', '75'))  # Show more files to LLM
+        paths, similar = _near_duplicates(entries, [entry.path for entry in entries])
+        shown = paths[:max_files_to_show]
+        return shown, {path: similar[path] for path in shown if path in similar}
+
+    # Every file is scored, so important files deep in big trees are candidates too
+    max_files_to_process = _files_to_process(hierarchical)
+    top_k = max(int(os.getenv('SELECTION_CANDIDATES', '40')), max_files_to_process)
+    started = time.perf_counter()
+    ranked = rank_files(entries, index)
+    log(f"🏅 Ranked {len(ranked)} files locally in {(time.perf_counter() - started) * 1000:.0f} ms")
+    # The best-ranked member of each cluster represents it
+    paths, similar = _near_duplicates(entries, [item.path for item in ranked])
+    if similar:
+        kept = set(paths)
+        ranked = [item for item in ranked if item.path in kept]
+    candidates = [item.path for item in pick_diverse(ranked, top_k)]
+    return candidates, {path: similar[path] for path in candidates if path in similar}
+
+
 def agent_select_files(state):
-    file_tree = get_file_tree()
+    if state.get("selected_files"):
+        # Incremental rerun with an unchanged file list: the previous selection still holds
+        log(f"♻️ Reusing previous selection: {len(state['selected_files'])} files")
+        return {"selected_files": state["selected_files"]}
+
+    mode = _selection_mode()
+    update = {}
+    candidates = state.get("candidates")
+    if not candidates:
+        candidates, update["similar_files"] = _selection_candidates(get_file_index(), state.get("hierarchical", False))
     
     # Balanced settings for speed + accuracy
-    max_files_to_show = int(os.getenv('MAX_FILES_TO_SHOW', '75'))  # Show more files to LLM
-    max_files_to_process = int(os.getenv('MAX_FILES_TO_PROCESS', '15'))  # Process more files for accuracy
-    
-    # Pre-filter: Remove obviously unimportant files for speed
-    filtered_tree = []
-    for file_path in file_tree:
-        file_lower = file_path.lower()
-        # Skip files that are usually not important for README
-        if not any(skip in file_lower for skip in [
-            '.git/', 'node_modules/', '__pycache__/', '.venv/', 'venv/',
-            '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico',
-            '.min.js', '.min.css', 'dist/', 'build/', '.cache/'
-        ]):
-            filtered_tree.append(file_path)
-    
-    # Show more files for better selection
-    display_tree = filtered_tree[:max_files_to_show]
-    
-    log(f"⚡ Balanced selection: {len(file_tree)} → {len(filtered_tree)} → {len(display_tree)} files")
+    max_files_to_process = _files_to_process(state.get("hierarchical", False))  # Process more files for accuracy
+
+    if mode == 'local':
+        final_selection = candidates[:max_files_to_process]
+        log(f"⚡ Local selection: {len(final_selection)} files picked from the ranking, no LLM call")
+        return {**update, "selected_files": final_selection}
+
+    display_tree = candidates
+    log(f"⚡ Balanced selection: {len(display_tree)} candidate files shown to the LLM")
+    # Files nearly any selection keeps are summarized while the model decides
+    update["speculation"] = _start_speculation(candidates)
     
     # Use existing prompt
     prompt = select_files_prompt.format(file_tree="\n".join(display_tree))
@@ -75,8 +229,16 @@ def agent_select_files(state):
             selected_files = json.loads(json_like)
         else:
             selected_files = [line.strip().strip('"').strip(',') for line in raw.splitlines() if line.strip()]
+        # Only files that exist (the model sometimes invents or reformats paths)
+        shown = set(display_tree)
+        selected_files = [f for f in selected_files if isinstance(f, str) and f in shown]
+        if not selected_files:
+            raise ValueError("no listed file in the response")
     except Exception as e:
         log(f"⚠️ Parsing failed, using fallback selection: {str(e)}")
+        if mode == 'hybrid':
+            # Candidates are already in rank order
+            return {**update, "selected_files": display_tree[:max_files_to_process]}
         # Smarter fallback for better accuracy
         important_files = []
         for file_path in display_tree:
@@ -90,126 +252,527 @@ def agent_select_files(state):
     # Balanced final selection
     final_selection = selected_files[:max_files_to_process]
     log(f"✅ Selected {len(final_selection)} files for detailed processing")
-    return {"selected_files": final_selection}
+    return {**update, "selected_files": final_selection}
 
 # Step 2: Detailed bulk processing with accuracy focus
-def agent_summarize_files(state):
-    selected_files = state["selected_files"]
-    summaries = []
-    
-    # Balanced settings: moderate speed, high accuracy
-    files_per_request = int(os.getenv('FILES_PER_REQUEST', '4'))  # Fewer files per call for better context
-    max_content_per_file = int(os.getenv('MAX_CONTENT_PER_FILE', '2500'))  # More content for accuracy
-    
-    log(f"🎯 Detailed bulk processing: {len(selected_files)} files, {files_per_request} per request")
-    
-    # Process in smaller batches for better accuracy
-    for i in range(0, len(selected_files), files_per_request):
-        batch = selected_files[i:i + files_per_request]
-        batch_num = (i // files_per_request) + 1
-        total_batches = (len(selected_files) + files_per_request - 1) // files_per_request
-        
-        log(f"🔍 Detailed batch {batch_num}/{total_batches}: {len(batch)} files")
-        
-        # Prepare detailed content for each file
-        detailed_files = []
-        for filename in batch:
-            try:
-                content = read_file(filename)
-                if content.strip():
-                    # Keep more content for better understanding
-                    truncated = content[:max_content_per_file]
-                    # Add file context for better processing
-                    file_info = f"""
+def _file_facts(filename):
+    # Structural facts from the code index ("Defines: ...", "Imported by: ..."), or []
+    index = get_code_index()
+    return index.facts(filename) if index is not None and _structure_limit() else []
+
+
+def _read_for_prompt(filename, max_content_per_file):
+    # Only the prefix we are going to send is read from disk, unless the file can be outlined
+    if _skeleton_read_chars() and outline_language(filename):
+        return read_file_bounded(filename, max(max_content_per_file, _skeleton_read_chars()))
+    return read_file_bounded(filename, max_content_per_file)
+
+
+def _file_content(filename, result, max_content_per_file, max_tokens_per_file):
+    # (label, text, cut): the file itself when it fits the caps, else an outline of
+    # everything that was read (declarations, signatures, docs, routes) in the same budget
+    prefix, cut = truncate_to_tokens(result.content[:max_content_per_file], max_tokens_per_file)
+    cut = cut or result.truncated or len(result.content) > max_content_per_file
+    if cut and _skeleton_read_chars():
+        try:
+            skeleton = outline(filename, result.content, max_tokens_per_file)
+        except Exception as e:
+            # An outliner bug must not cost the run: the raw prefix still works
+            log(f"⚠️ Could not outline {filename} ({type(e).__name__}: {e}), sending its beginning")
+            skeleton = None
+        if skeleton:
+            scope = "partial file" if result.truncated else "whole file"
+            return f"Outline ({scope}, bodies elided)", skeleton, False
+    return "Content", prefix, cut
+
+
+def _file_block(filename, max_content_per_file, max_tokens_per_file):
+    # Returns the prompt block for one file and its token count.
+    result = _read_for_prompt(filename, max_content_per_file)
+    facts = _file_facts(filename)
+    if result.error:
+        block = f"=== FILE: {filename} ===\n(Error reading: {result.error})"
+    elif result.binary:
+        block = f"=== FILE: {filename} ===\n(Binary file, {result.size} bytes)"
+    elif result.content.strip():
+        # Files the index knows about carry their structure up front, so less raw text is needed
+        if facts:
+            max_tokens_per_file = min(max_tokens_per_file, _structure_limit())
+        # Capped in tokens rather than characters; long source files are sent as an outline
+        label, content, cut = _file_content(filename, result, max_content_per_file, max_tokens_per_file)
+        structure = "Structure:\n" + "\n".join(f"- {fact}" for fact in facts) + "\n" if facts else ""
+        # Add file context for better processing
+        block = f"""
 === FILE: {filename} ===
 File Path: {filename}
-Content Length: {len(content)} characters
-Content:
-{truncated}
-{'... (truncated)' if len(content) > max_content_per_file else ''}
+Content Length: {result.size} bytes
+{structure}{label}:
+{content}
+{'... (truncated)' if cut else ''}
 """
-                    detailed_files.append(file_info)
-                else:
-                    detailed_files.append(f"=== FILE: {filename} ===\n(Empty file)")
-            except Exception as e:
-                detailed_files.append(f"=== FILE: {filename} ===\n(Error reading: {str(e)})")
-        
-        # Enhanced bulk prompt with detailed instructions
-        bulk_prompt = f"""You are analyzing {len(batch)} files from a software project. For each file, provide a comprehensive summary that includes:
+    else:
+        block = f"=== FILE: {filename} ===\n(Empty file)"
+    return block, count_tokens(block)
+
+
+def _split_batch_response(response, batch):
+    # Cut a bulk response into per-file sections on its "### <filename>" headings.
+    # Returns None when the model did not follow the format for every file.
+    positions = []
+    for filename in batch:
+        match = re.search(r"^#{2,4}\s*`?" + re.escape(filename) + r"`?\s*$", response, re.MULTILINE)
+        if not match:
+            return None
+        positions.append((match.start(), filename))
+    positions.sort()
+
+    sections = {}
+    for i, (start, filename) in enumerate(positions):
+        end = positions[i + 1][0] if i + 1 < len(positions) else len(response)
+        sections[filename] = response[start:end].strip()
+    return sections
+
+
+_slots = {}
+_slots_lock = threading.Lock()
+
+
+def _summarize_concurrency():
+    return max(1, int(os.getenv('SUMMARIZE_CONCURRENCY', '3')))
+
+
+def _summarize_slots():
+    # One SUMMARIZE_CONCURRENCY limiter for every summarize-side request in the process:
+    # batches, the speculative batch and directory reduces all draw from it
+    concurrency = _summarize_concurrency()
+    with _slots_lock:
+        if concurrency not in _slots:
+            _slots[concurrency] = threading.BoundedSemaphore(concurrency)
+        return _slots[concurrency]
 
-1. **Purpose**: What this file does and its role in the project
-2. **Key Components**: Important functions, classes, components, or configurations
-3. **Dependencies**: Notable imports, libraries, or frameworks used
-4. **Functionality**: Core logic, API endpoints, data models, or business rules
-5. **Integration**: How it connects to other parts of the application
 
-Be detailed and technical. Focus on understanding the project architecture and functionality.
+def _limited_request(slots, messages, max_tokens):
+    # Bounds the number of LLM calls in flight across all summarize threads
+    with slots:
+        return llm.make_request(messages, max_tokens=max_tokens)
+
+
+def _summarize_individually(filename, slots):
+    try:
+        max_content_per_file, max_tokens_per_file = _content_limits()
+        result = _read_for_prompt(filename, max_content_per_file)
+        if result.error or result.binary:
+            return f"### {filename}\n(Skipped: {result.error or 'binary file'})", False
+        if result.content.strip():
+            label, content, _ = _file_content(filename, result, max_content_per_file, max_tokens_per_file)
+            if label != "Content":
+                content = f"{label}:\n{content}"
+            facts = _file_facts(filename)
+            if facts:
+                content = "Structure:\n" + "\n".join(f"- {fact}" for fact in facts) + "\n\n" + content
+            individual_prompt = summarize_prompt.format(filename=filename, content=content, schema=summary_record_schema)
+            individual_response = _limited_request(slots, [{"role": "user", "content": individual_prompt}], max_tokens=800)
+            record = parse_records(individual_response, [filename]).get(filename)
+            if record is not None:
+                return dump_record(record), True
+            return f"### {filename}\n{individual_response}", True
+        return f"### {filename}\n(Empty file)", False
+    except Exception as e:
+        return f"### {filename}\n(Processing failed: {str(e)})", False
+
+
+def _bulk_prompt(detailed_files):
+    return f"""You are analyzing {len(detailed_files)} files from a software project. For each file, record:
+
+- purpose: what this file does and its role in the project
+- components: important functions, classes, components or configurations
+- features: core logic, data models or business rules
+- routes: API endpoints, pages, CLI commands or jobs it exposes
+- deps: notable libraries, frameworks and services it uses
+- config: env vars, config keys, ports and setup commands it needs
+- links: how it connects to other parts of the application (use the Structure facts given for a file: they are extracted from the code, including parts not shown)
+
+Long source files are given as an Outline: their imports, declarations and signatures, doc comment first lines and routes, with function bodies left out.
+
+Be technical and use concrete names. Keep every list item short, and leave out fields that don't apply.
 
 {chr(10).join(detailed_files)}
 
-For each file, format your response as:
-### {filename}
-**Purpose:** [What this file does]
-**Key Components:** [Important functions/classes/components]
-**Dependencies:** [Notable imports/libraries]
-**Functionality:** [Core logic and features]
-**Integration:** [How it fits in the project]
+Respond with only a JSON array holding one object per file, in the order given, no markdown and no text around it. Each object:
+{summary_record_schema}"""
 
-Provide comprehensive summaries for each file:"""
-        log(f"📖 Reading file: {filename}")
-        
+
+def _summarize_batch(batch, blocks, label, summary_tokens_per_file, slots):
+    # Returns a list of (filename or None, summary, cacheable); label is "2/5" or "speculative"
+    log(f"🔍 Detailed batch {label}: {len(batch)} files")
+
+    bulk_prompt = _bulk_prompt([blocks[filename] for filename in batch])
+    log(f"📖 Reading files: {', '.join(batch)}")
+
+    try:
+        messages = [{"role": "user", "content": bulk_prompt}]
+        # Completion budget scales with the number of files packed into the request
+        bulk_response = _limited_request(slots, messages, max_tokens=summary_tokens_per_file * len(batch))
+
+        if bulk_response.strip():
+            log(f"✅ Generated detailed summaries for {len(batch)} files")
+            records = parse_records(bulk_response, batch)
+            if not records:
+                # Not JSON at all: maybe markdown sections in the old "### <filename>" format
+                sections = _split_batch_response(bulk_response, batch)
+                if sections is None:
+                    # Keep the response, but it can't be cached per file
+                    return [(None, bulk_response, False)]
+                return [(filename, sections[filename], True) for filename in batch]
+            results = [(filename, dump_record(records[filename]), True) for filename in batch if filename in records]
+            missing = [filename for filename in batch if filename not in records]
+            if missing:
+                # Records the model skipped or garbled are asked for one file at a time
+                log(f"⚠️ No valid record for {len(missing)} files in batch {label}, summarizing them individually")
+                with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                    individual = list(pool.map(lambda filename: _summarize_individually(filename, slots), missing))
+                results += [(filename, summary, ok) for filename, (summary, ok) in zip(missing, individual)]
+            return results
+
+        # Better fallback using individual processing
+        log(f"⚠️ Bulk failed, falling back to individual processing for batch {label}")
+    except Exception as e:
+        log(f"⚠️ Batch {label} failed, using individual fallback: {e}")
+
+    # Individual processing fallback for accuracy, dispatched in parallel (still bounded by slots)
+    with ThreadPoolExecutor(max_workers=len(batch)) as pool:
+        individual = list(pool.map(lambda filename: _summarize_individually(filename, slots), batch))
+    return [(filename, summary, ok) for filename, (summary, ok) in zip(batch, individual)]
+
+
+def _content_limits():
+    max_content_per_file = int(os.getenv('MAX_CONTENT_PER_FILE', '2500'))  # More content for accuracy
+    max_tokens_per_file = int(os.getenv('MAX_TOKENS_PER_FILE', '700'))  # Per-file content cap in tokens
+    return max_content_per_file, max_tokens_per_file
+
+
+def _summary_tokens_per_file():
+    return int(os.getenv('SUMMARY_TOKENS_PER_FILE', '600'))  # Completion reserved per file
+
+
+def _skeleton_read_chars():
+    # Long source files are outlined from up to this many characters; 0 sends raw prefixes only
+    if os.getenv('CODE_SKELETONS', '1') == '0':
+        return 0
+    return int(os.getenv('SKELETON_READ_CHARS', '100000'))
+
+
+def _content_key():
+    # Everything that changes what a file's prompt block looks like (summary cache key, run fingerprint)
+    max_content_per_file, max_tokens_per_file = _content_limits()
+    skeletons = f"/sk{SKELETON_VERSION}" if _skeleton_read_chars() else ""
+    return f"{max_content_per_file}c/{max_tokens_per_file}t/{_structure_limit()}s{skeletons}"
+
+
+def _structure_limit():
+    # Content cap in tokens for files sent with code-index facts; 0 disables the facts
+    if os.getenv('STRUCTURE_CONTEXT', '1') == '0':
+        return 0
+    return int(os.getenv('STRUCTURED_TOKENS_PER_FILE', '400'))
+
+
+def _cache_lookup(filenames):
+    # ({file: cached summary}, {file: cache key} for the misses, misses) from the summary cache
+    cache = get_summary_cache()
+    if cache is None:
+        return {}, {}, list(filenames)
+    model_id = getattr(llm, "model_id", "unknown")
+    content_limits = _content_key()
+    found, cache_keys, misses = {}, {}, []
+    for filename in filenames:
         try:
-            messages = [{"role": "user", "content": bulk_prompt}]
-            # Increased token limit for detailed summaries
-            bulk_response = llm.make_request(messages, max_tokens=2500)
-            
-            if bulk_response.strip():
-                summaries.append(bulk_response)
-                log(f"✅ Generated detailed summaries for {len(batch)} files")
-            else:
-                # Better fallback using individual processing
-                log(f"⚠️ Bulk failed, falling back to individual processing for batch {batch_num}")
-                for filename in batch:
-                    try:
-                        content = read_file(filename)[:2000]  # Reasonable content size
-                        if content.strip():
-                            individual_prompt = summarize_prompt.format(filename=filename, content=content)
-                            individual_response = llm.make_request([{"role": "user", "content": individual_prompt}], max_tokens=800)
-                            summaries.append(f"### {filename}\n{individual_response}")
-                        else:
-                            summaries.append(f"### {filename}\n(Empty file)")
-                    except Exception as e:
-                        summaries.append(f"### {filename}\n(Processing failed: {str(e)})")
-                    
-        except Exception as e:
-            log(f"⚠️ Batch {batch_num} failed, using individual fallback: {e}")
-            # Individual processing fallback for accuracy
-            for filename in batch:
+            key = make_cache_key(file_blob_hash(filename), SUMMARY_PROMPT_VERSION, model_id, content_limits)
+        except OSError:
+            key = None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            found[filename] = cached
+            continue
+        cache_keys[filename] = key
+        misses.append(filename)
+    return found, cache_keys, misses
+
+
+def _cache_results(results, cache_keys):
+    # Store a batch's per-file summaries as soon as it lands (in the batch's own thread)
+    cache = get_summary_cache()
+    if cache is None:
+        return
+    model_id = getattr(llm, "model_id", "unknown")
+    for filename, summary, cacheable in results:
+        if cacheable and cache_keys.get(filename):
+            cache.put(cache_keys[filename], summary, filename=filename, model=model_id)
+
+
+def _summarize_and_cache(batch, blocks, label, summary_tokens_per_file, slots, cache_keys):
+    # A batch still running when the README starts early is kept for the next run this way
+    results = _summarize_batch(batch, blocks, label, summary_tokens_per_file, slots)
+    _cache_results(results, cache_keys)
+    return results
+
+
+# files: what the speculative batch summarizes; future: its _summarize_batch results
+Speculation = namedtuple("Speculation", ["files", "future"])
+
+
+def _start_speculation(candidates):
+    """
+    Summarize up to SPECULATIVE_SUMMARIES landmark candidates (manifests,
+    Dockerfiles, shallow entry points) in the background while the selection
+    request is in flight. agent_summarize_files takes the ones that got
+    selected; every result goes to the summary cache, so the others aren't
+    wasted on the next run either.
+    """
+    limit = int(os.getenv('SPECULATIVE_SUMMARIES', '4'))
+    landmarks = [f for f in candidates if is_landmark(f)][:limit] if limit > 0 else []
+    _, cache_keys, misses = _cache_lookup(landmarks)
+    if not misses:
+        return None
+    parent = tracing.current_span()
+    max_content_per_file, max_tokens_per_file = _content_limits()
+
+    def run():
+        with tracing.span("speculative_summaries", parent=parent, files=len(misses)):
+            blocks = {f: _file_block(f, max_content_per_file, max_tokens_per_file)[0] for f in misses}
+            return _summarize_and_cache(misses, blocks, "speculative", _summary_tokens_per_file(),
+                                        _summarize_slots(), cache_keys)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(run)
+    executor.shutdown(wait=False)
+    log(f"🔮 Speculatively summarizing {len(misses)} files during selection: {', '.join(misses)}")
+    return Speculation(misses, future)
+
+
+def agent_summarize_files(state):
+    selected_files = state["selected_files"]
+    # Summaries of files unchanged since the previous run of this repo
+    reuse = state.get("reuse_summaries") or {}
+
+    # Balanced settings: moderate speed, high accuracy
+    files_per_request = int(os.getenv('FILES_PER_REQUEST', '8'))  # Upper bound; token budget decides the real batch size
+    max_content_per_file, max_tokens_per_file = _content_limits()
+    summary_tokens_per_file = _summary_tokens_per_file()
+    request_token_budget = int(os.getenv('SUMMARIZE_TOKEN_BUDGET', '10000'))  # Prompt + completion per request
+    # README generation starts once this share of the selected files has a summary;
+    # batches still running then only fill the summary cache (each caches its own results)
+    start_fraction = min(1.0, float(os.getenv('README_START_FRACTION', '1')))
+
+    # Serve unchanged files from the content-addressed summary cache
+    cache = get_summary_cache()
+    refreshed_files = [f for f in selected_files if f not in reuse]
+    summaries_by_file, cache_keys, misses = _cache_lookup(refreshed_files)
+    summaries_by_file.update((f, reuse[f]) for f in selected_files if f in reuse)
+
+    if reuse:
+        log(f"♻️ Reused {len(selected_files) - len(refreshed_files)} summaries from the previous run")
+    if cache is not None:
+        log(f"🗄️ Summary cache: {len(refreshed_files) - len(misses)} hits, {len(misses)} misses")
+
+    # Files already being summarized by the speculative batch from the selection step
+    speculation = state.get("speculation")
+    speculative = [f for f in misses if speculation is not None and f in speculation.files]
+    if speculative:
+        misses = [f for f in misses if f not in speculative]
+        log(f"🔮 {len(speculative)} selected files come from the speculative batch")
+
+    # Max LLM calls in flight at once; the LLM manager still honours per-key cooldowns
+    concurrency = _summarize_concurrency()
+    slots = _summarize_slots()
+
+    # Only cache misses go to the LLM, bin-packed into as few requests as the token budget allows
+    blocks, costs = {}, []
+    for filename in misses:
+        blocks[filename], tokens = _file_block(filename, max_content_per_file, max_tokens_per_file)
+        costs.append((filename, tokens + summary_tokens_per_file))
+    packing = pack_files(costs, count_tokens(_bulk_prompt([])), request_token_budget, files_per_request)
+    batches = packing.bins
+    total_batches = len(batches)
+    if batches:
+        log(f"📦 Packed {len(misses)} files into {packing.describe()}")
+
+    log(f"🎯 Detailed bulk processing: {len(misses)} files, up to {files_per_request} per request, {concurrency} in flight")
+
+    # Batches are dispatched concurrently and their summaries collected as each one lands
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {
+        pool.submit(_summarize_and_cache, batch, blocks, f"{batch_num}/{total_batches}", summary_tokens_per_file,
+                    slots, cache_keys): batch_num
+        for batch_num, batch in enumerate(batches, start=1)
+    }
+    if speculative:
+        pending[speculation.future] = 0
+    needed = math.ceil(start_fraction * len(selected_files))
+    results_by_batch = {}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_num = pending.pop(future)
+                if batch_num:
+                    results = future.result()
+                    summaries_by_file.update((f, summary) for f, summary, _ in results if f is not None)
+                    results_by_batch[batch_num] = results
+                    continue
+                # The speculative batch: keep the selected files (it cached everything itself)
                 try:
-                    content = read_file(filename)[:2000]
-                    if content.strip():
-                        individual_prompt = summarize_prompt.format(filename=filename, content=content)
-                        individual_response = llm.make_request([{"role": "user", "content": individual_prompt}], max_tokens=800)
-                        summaries.append(f"### {filename}\n{individual_response}")
-                    else:
-                        summaries.append(f"### {filename}\n(Empty file)")
+                    results = future.result()
                 except Exception as e:
-                    summaries.append(f"### {filename}\n(Failed to process)")
-    
+                    log(f"⚠️ Speculative batch failed: {e}")
+                    results = []
+                summaries_by_file.update((f, s) for f, s, _ in results if f in speculative)
+                redo = [f for f in speculative if f not in summaries_by_file]
+                if redo:
+                    # Its response couldn't be split per file: these go through a normal batch
+                    for filename in redo:
+                        blocks[filename] = _file_block(filename, max_content_per_file, max_tokens_per_file)[0]
+                    total_batches += 1
+                    pending[pool.submit(_summarize_and_cache, redo, blocks, f"{total_batches}/{total_batches}",
+                                        summary_tokens_per_file, slots, cache_keys)] = total_batches
+            if pending and sum(1 for f in selected_files if f in summaries_by_file) >= needed:
+                log(f"⏩ {len(summaries_by_file)}/{len(selected_files)} files summarized, starting the README; "
+                    f"{len(pending)} batches left to finish in the background")
+                break
+    finally:
+        # Batches that haven't started are dropped; running ones still fill the cache
+        pool.shutdown(wait=not pending, cancel_futures=True)
+
+    # Responses that couldn't be split per file, in batch order
+    extra_summaries = [summary for batch_num in sorted(results_by_batch)
+                       for filename, summary, _ in results_by_batch[batch_num] if filename is None]
+
+    # Keep the original selection order
+    summaries = [summaries_by_file[f] for f in selected_files if f in summaries_by_file] + extra_summaries
+
     log(f"✅ Detailed processing complete: {total_batches} API calls with enhanced accuracy")
-    return {"summaries": summaries}
+    return {"summaries": summaries, "file_summaries": summaries_by_file, "refreshed_files": refreshed_files}
 
 # Step 3: Enhanced README generation with more detail
+def _update_previous_readme(state):
+    # Patch only the sections affected by changed files; None means "regenerate in full"
+    previous_readme = state["previous_readme"]
+    selected_files = state["selected_files"]
+    file_summaries = state.get("file_summaries") or {}
+    refreshed = state.get("refreshed_files") or []
+    removed = [f for f in state.get("previous_selected") or [] if f not in selected_files]
+
+    if not refreshed and not removed:
+        log("♻️ Selected files unchanged, keeping the previous README")
+        return previous_readme
+
+    max_changed_ratio = float(os.getenv('INCREMENTAL_MAX_CHANGED_RATIO', '0.5'))
+    if len(refreshed) + len(removed) > max_changed_ratio * max(len(selected_files), 1):
+        log(f"🔄 {len(refreshed) + len(removed)} of {len(selected_files)} files changed, regenerating the whole README")
+        return None
+
+    # Summaries that couldn't be attributed to a file are passed along as well
+    known = set(file_summaries.values())
+    similar_files = state.get("similar_files") or {}
+    changed_summaries = [_with_similar(file_summaries[f], similar_files) for f in refreshed if f in file_summaries]
+    changed_summaries += [s for s in state["summaries"] if s not in known]
+
+    prompt = update_readme_prompt.format(
+        readme=previous_readme,
+        summaries=render_summaries(changed_summaries) or "(none)",
+        removed="\n".join(f"- {f}" for f in removed) or "(none)",
+    )
+    log(f"✏️ Updating README for {len(refreshed)} changed and {len(removed)} removed files…")
+    try:
+        response = llm.make_request([{"role": "user", "content": prompt}], max_tokens=2500)
+    except Exception as e:
+        log(f"⚠️ Incremental update failed: {str(e)}")
+        return None
+
+    if response.strip().startswith("NO_CHANGES"):
+        log("♻️ No README section affected by the changes")
+        return previous_readme
+    merged, applied = merge_sections(previous_readme, response)
+    if not applied:
+        log("⚠️ Update didn't come back as README sections, regenerating the whole README")
+        return None
+    log(f"✅ Updated {applied} README section(s) instead of regenerating")
+    return merged
+
+
+def _summary_tree():
+    # Reduce calls share the summarize step's concurrency limit
+    concurrency = _summarize_concurrency()
+    slots = _summarize_slots()
+    reduce_tokens = int(os.getenv('REDUCE_SUMMARY_TOKENS', '600'))  # Completion per directory summary
+
+    def reduce(label, texts):
+        prompt = reduce_summaries_prompt.format(scope=label, summaries="\n\n".join(texts),
+                                                max_words=int(reduce_tokens * 0.6))
+        try:
+            return _limited_request(slots, [{"role": "user", "content": prompt}], max_tokens=reduce_tokens)
+        except Exception as e:
+            # Keep the beginning of the inputs rather than failing the whole README
+            log(f"⚠️ Reducing {label} failed ({e}), keeping truncated summaries")
+            return truncate_to_tokens("\n\n".join(texts), reduce_tokens)[0]
+
+    return SummaryTree(
+        reduce,
+        final_budget=int(os.getenv('README_SUMMARY_BUDGET', '6000')),  # Summary tokens in the README prompt
+        reduce_budget=int(os.getenv('REDUCE_TOKEN_BUDGET', '6000')),  # Input tokens per reduce call
+        reduce_output_tokens=reduce_tokens,
+        concurrency=concurrency,
+        log=log,
+    )
+
+
+def _with_similar(summary, similar_files):
+    # "### src/pages/a.js" -> "### src/pages/a.js (+12 similar files: src/pages/b.js, ...)"
+    header, _, rest = summary.partition("\n")
+    similar = similar_files.get(header[4:].strip()) if header.startswith("### ") else None
+    if not similar:
+        return summary
+    shown = ", ".join(similar[:5]) + (", ..." if len(similar) > 5 else "")
+    return f"{header} (+{len(similar)} similar files: {shown})\n{rest}"
+
+
+def _tree_items(tree, state):
+    # File summaries keyed by path; summaries that couldn't be attributed sit at the repo root
+    file_summaries = state.get("file_summaries") or {}
+    similar_files = state.get("similar_files") or {}
+    pairs = [(f, render_one(_with_similar(file_summaries[f], similar_files)))
+             for f in state["selected_files"] if f in file_summaries]
+    known = set(file_summaries.values())
+    pairs += [("", render_one(s)) for s in state["summaries"] if s not in known]
+    return tree.items_for_files(pairs)
+
+
 def agent_generate_readme(state):
     summaries = state["summaries"]
 
-    # Allow more summaries for comprehensive README
-    max_summaries = int(os.getenv('MAX_SUMMARIES_FOR_README', '25'))
-    limited_summaries = summaries[:max_summaries]
+    if state.get("previous_readme"):
+        updated = _update_previous_readme(state)
+        if updated is not None:
+            return {"readme": updated}
+
+    tree = None
+    if state.get("hierarchical"):
+        # Every summary is kept: directories are folded into module summaries until they fit
+        tree = _summary_tree()
+        started = time.perf_counter()
+        items = tree.fit(_tree_items(tree, state))
+        limited_summaries = [item.text for item in items]
+        log(f"🌳 {len(summaries)} summaries folded into {len(items)} in {tree.rounds} rounds, "
+            f"{tree.calls} reduce calls, {(time.perf_counter() - started):.1f}s")
+    else:
+        # Allow more summaries for comprehensive README
+        max_summaries = int(os.getenv('MAX_SUMMARIES_FOR_README', '25'))
+        similar_files = state.get("similar_files") or {}
+        limited_summaries = [_with_similar(s, similar_files) for s in summaries[:max_summaries]]
     log("📝 Generating summary…")
     log("📄 Generating README.md…")
 
-    joined = "\n\n".join(limited_summaries)
+    # Records are rendered densely, dependencies shared by several files listed once
+    joined = render_summaries(limited_summaries)
 
     # Enhanced instruction for more detailed README
     enhanced_instruction = """
@@ -218,30 +781,46 @@ IMPORTANT: Create a comprehensive and detailed README that provides developers w
 
     # Use existing prompt with enhancement
     prompt = generate_readme_prompt.format(summaries=joined) + enhanced_instruction
+
+    # README text goes out to the client as it is generated
+    stream = ReadmeStream() if os.getenv('STREAM_README', '1') != '0' else None
     
     try:
         # Try with normal token limit first
-        response = llm.make_request([{"role": "user", "content": prompt}], max_tokens=4500)
+        response = llm.make_request([{"role": "user", "content": prompt}], max_tokens=4500, on_chunk=stream)
+        if stream:
+            stream.flush()
         return {"readme": response}
     except Exception as e:
+        if stream:
+            stream.reset()
         log(f"⚠️ High-quality generation failed: {str(e)}")
         log("🔄 Attempting fallback generation with reduced requirements...")
         
         # Fallback: Shorter prompt, fewer tokens
+        if tree is not None:
+            # Fold further instead of cutting the text
+            short_summaries = "\n\n".join(item.text for item in tree.fit(items, final_budget=750))
+        else:
+            short_summaries = truncate_to_tokens(render_summaries(limited_summaries, brief=True), 750)[0]
         fallback_prompt = f"""
 Generate a professional README.md for this project based on the file summaries:
 
-{joined[:3000]}  
+{short_summaries}  
 
 Include: project title, description, features, tech stack, installation, and usage.
 Keep it concise but informative.
 """
         
         try:
-            response = llm.make_request([{"role": "user", "content": fallback_prompt}], max_tokens=2000)
+            response = llm.make_request([{"role": "user", "content": fallback_prompt}], max_tokens=2000, on_chunk=stream)
+            if stream:
+                stream.flush()
             log("✅ Fallback generation successful")
             return {"readme": response}
         except Exception as fallback_error:
+            if stream:
+                stream.reset()
             log(f"❌ Fallback generation also failed: {str(fallback_error)}")
             
             # Last resort: Basic template
@@ -270,46 +849,159 @@ Contributions are welcome! Please feel free to submit a Pull Request.
             return {"readme": basic_readme}
 
 
-# Build LangGraph graph
-def run_agent(repo_path):
+# Pipeline nodes, in order; each runs in a tracing span (time, LLM calls, tokens, retries per stage)
+PIPELINE_NODES = (
+    ("select_files", agent_select_files),
+    ("summarize", agent_summarize_files),
+    ("generate_readme", agent_generate_readme),
+)
+
+# Built once per process so warm workers can reuse it
+_compiled_graph = None
+
+def build_graph():
+    # PIPELINE_EXECUTOR: builtin (default) runs the chain in pipeline.py;
+    # langgraph compiles the same nodes into a StateGraph (imports langgraph, ~1s)
+    global _compiled_graph
+    if _compiled_graph is None:
+        nodes = [(name, tracing.traced_node(name, fn)) for name, fn in PIPELINE_NODES]
+        if os.getenv("PIPELINE_EXECUTOR", "builtin").lower() == "langgraph":
+            from langgraph.graph import StateGraph
+            builder = StateGraph(GraphState)
+            for name, node in nodes:
+                builder.add_node(name, node)
+            builder.set_entry_point(nodes[0][0])
+            for (name, _), (next_name, _) in zip(nodes, nodes[1:]):
+                builder.add_edge(name, next_name)
+            builder.set_finish_point(nodes[-1][0])
+            _compiled_graph = builder.compile()
+        else:
+            _compiled_graph = Pipeline(nodes)
+    return _compiled_graph
+
+
+def _run_fingerprint(hierarchical=False):
+    # Anything that changes what a run would produce; a manifest with another fingerprint is not reused
+    return {
+        "summary_mode": f"hierarchical/{REDUCE_PROMPT_VERSION}" if hierarchical else "flat",
+        "summary_prompt": SUMMARY_PROMPT_VERSION,
+        "readme_prompt": README_PROMPT_VERSION,
+        "model": getattr(llm, "model_id", "unknown"),
+        "content_limits": _content_key(),
+        "selection": f"{_selection_mode()}/{RANKER_VERSION}",
+        "files_to_process": _files_to_process(hierarchical),
+        "summaries_for_readme": int(os.getenv('MAX_SUMMARIES_FOR_README', '25')),
+    }
+
+
+def run_agent(repo_path, rev=None, output_dir=None, incremental=True):
+    # rev / a bare repo_path reads files straight from git objects (no checkout);
+    # output_dir is where readme.md goes (defaults to repo_path).
+    # incremental=True diffs the repo against the previous run's manifest first.
     try:
-        set_repo_path(repo_path)
+        with tracing.span("run", kind="run", repo=repo_path, rev=rev) as run_span:
+            replayed = (getattr(llm, "replay_hits", 0), getattr(llm, "replay_misses", 0))
+            try:
+                return _run_agent(repo_path, rev, output_dir, incremental)
+            finally:
+                if getattr(llm, "recorded", None):
+                    # Prompts the recording didn't cover were answered synthetically
+                    run_span.set(replay_hits=llm.replay_hits - replayed[0], replay_misses=llm.replay_misses - replayed[1])
+                for line in tracing.format_stages(run_span):
+                    log(line)
+                for target in getattr(llm, "health_state", list)():
+                    # Circuits stay open across runs in a warm worker; say which provider is sitting out
+                    if target["state"] != "closed":
+                        log(f"🩺 {target['provider']}/{target['model']}: circuit {target['state']}, "
+                            f"reopens in {target['open_for']:.0f}s")
+    finally:
+        # TRACE_FILE gets spans as they finish; METRICS_FILE is merged once per run
+        tracing.metrics.flush()
+
+
+def _run_agent(repo_path, rev, output_dir, incremental):
+    output_dir = output_dir or repo_path
+    try:
+        set_repo_path(repo_path, rev)
         log("📥 Repository received")
         log("⚙️ Initializing README generation process")
 
-        # Test LLM connection first
-        try:
-            test_response = llm.make_request([{"role": "user", "content": "Hello, please respond with 'OK'"}], max_tokens=10)
-            log(f"✅ LLM connection test successful: {test_response[:20]}")
-        except Exception as e:
-            log(f"❌ LLM connection failed: {str(e)}")
-            raise Exception("LLM connection failed")
-
-        builder = StateGraph(GraphState)
-        builder.add_node("select_files", agent_select_files)
-        builder.add_node("summarize", agent_summarize_files)
-        builder.add_node("generate_readme", agent_generate_readme)
-
-        builder.set_entry_point("select_files")
-        builder.add_edge("select_files", "summarize")
-        builder.add_edge("summarize", "generate_readme")
-        builder.set_finish_point("generate_readme")
-
-        log("🚀 Starting graph execution...")
-        graph = builder.compile()
-        output = graph.invoke({})
-        
-        if not output or "readme" not in output:
-            log("❌ Graph execution failed - no output generated")
-            raise Exception("Graph execution failed")
-            
-        readme = output["readme"]
+        entries = get_file_index()
+        if os.path.abspath(output_dir) == os.path.abspath(repo_path):
+            # Our own outputs from a previous run aren't part of the project
+            entries = [e for e in entries if e.path not in ("readme.md", MANIFEST_NAME)]
+        hierarchical = _summary_mode(len(entries)) == 'hierarchical'
+        if hierarchical:
+            log(f"🌳 Hierarchical summaries for {len(entries)} files (up to {_files_to_process(True)} summarized)")
+        with tracing.span("select_candidates", files=len(entries), hierarchical=hierarchical):
+            shown_files, similar_files = _selection_candidates(entries, hierarchical)
+        fingerprint = _run_fingerprint(hierarchical)
+        identity = repo_identity(repo_path)
+
+        hashes = {}
+        def hash_file(filename):
+            if filename not in hashes:
+                try:
+                    hashes[filename] = file_blob_hash(filename)
+                except (OSError, KeyError):
+                    hashes[filename] = None
+            return hashes[filename]
+
+        if incremental and os.getenv("INCREMENTAL_RUNS", "1") != "0":
+            with tracing.span("plan_rerun"):
+                plan = plan_rerun(load_manifest(output_dir, identity), fingerprint, shown_files, hash_file)
+        else:
+            plan = RerunPlan("full", "incremental runs disabled")
+        log(f"🧾 Run plan: {plan.mode} ({plan.reason})")
+        tracing.current_span().set(plan=plan.mode)
+
+        if plan.mode == "skip":
+            # Nothing the pipeline looked at changed: no LLM call at all
+            readme = plan.previous["readme"]
+            selected_files = plan.selected_files
+            file_summaries = plan.reuse_summaries
+        else:
+            state = {"candidates": shown_files, "hierarchical": hierarchical, "similar_files": similar_files}
+            if plan.mode == "incremental":
+                state["reuse_summaries"] = plan.reuse_summaries
+                state["previous_selected"] = plan.previous.get("selected_files", [])
+                state["previous_readme"] = plan.previous.get("readme", "")
+                if plan.selected_files:
+                    state["selected_files"] = plan.selected_files
+
+            log("🚀 Starting graph execution...")
+            graph = build_graph()
+            output = graph.invoke(state)
+
+            if not output or "readme" not in output:
+                log("❌ Graph execution failed - no output generated")
+                raise Exception("Graph execution failed")
+
+            readme = output["readme"]
+            selected_files = output.get("selected_files", [])
+            file_summaries = output.get("file_summaries") or {}
+
         if not readme or len(readme.strip()) == 0:
             log("❌ Generated README is empty")
             raise Exception("Generated README is empty")
             
         log(f"✅ README generated successfully: {len(readme)} characters")
-        write_readme_to_file(readme, root_dir=repo_path)
+        write_readme_to_file(readme, root_dir=output_dir)
+
+        try:
+            save_manifest(
+                output_dir, identity,
+                fingerprint=fingerprint,
+                commit=get_commit(),
+                shown_files=shown_files,
+                selected_files=selected_files,
+                file_hashes={f: hash_file(f) for f in selected_files},
+                file_summaries=file_summaries,
+                readme=readme,
+            )
+        except OSError as e:
+            # The README is already written; a missing manifest only costs a full rerun next time
+            log(f"⚠️ Could not save run manifest: {e}")
         return readme
         
     except Exception as e:
@@ -330,6 +1022,31 @@ def write_readme_to_file(content, root_dir="temp"):
 
 # Local test
 if __name__ == "__main__":
-    repo_path = sys.argv[1]
-    result = run_agent(repo_path)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a README for a repository")
+    parser.add_argument("repo_path", help="checked-out repo, or a bare mirror (read from git objects)")
+    parser.add_argument("--rev", default=None, help="commit to read from git objects instead of the working tree")
+    parser.add_argument("--output", default=None, help="directory for readme.md (defaults to repo_path)")
+    parser.add_argument("--full", action="store_true", help="ignore the previous run's manifest and start over")
+    parser.add_argument("--trace", default=None, help="append tracing spans to this JSON-lines file (TRACE_FILE)")
+    parser.add_argument("--metrics", default=None, help="merge Prometheus metrics into this file (METRICS_FILE)")
+    parser.add_argument("--profile", default=None, help="write a cProfile dump of the run to this file")
+    args = parser.parse_args()
+    if args.trace:
+        os.environ["TRACE_FILE"] = args.trace
+    if args.metrics:
+        os.environ["METRICS_FILE"] = args.metrics
+
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(run_agent, args.repo_path, rev=args.rev, output_dir=args.output,
+                                      incremental=not args.full)
+        finally:
+            profiler.dump_stats(args.profile)
+            log(f"🔬 Profile written to {args.profile} (python -m pstats {args.profile})")
+    else:
+        result = run_agent(args.repo_path, rev=args.rev, output_dir=args.output, incremental=not args.full)
     print(result)
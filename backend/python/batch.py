@@ -0,0 +1,255 @@
+"""
+Batch README generation for many repositories.
+
+    python batch.py repos.txt --workers 4
+    python batch.py repos.txt --workers 4 --state runs/batch_state.jsonl --report runs/report.json
+
+repos.txt lists one repo path per line (blank lines and # comments are ignored),
+or JSON objects: {"repo_path": ..., "rev": ..., "output_dir": ..., "full": true}.
+
+Jobs run on a pool of worker processes. Each worker imports agents_groq once and
+runs one repo at a time. All workers share:
+    - one RateLimiter hosted in a manager process, so together they stay inside
+      each Groq key's requests/tokens per minute instead of each assuming it
+      owns the whole quota
+    - the SQLite summary cache and the code index cache (same files on disk)
+
+Every finished job is appended to the state file (JSON lines). Running the same
+command again skips repos that already finished and retries failed ones, so a
+crashed or interrupted batch picks up where it stopped. Each job's log goes to
+its own file, and a throughput report is written at the end: jobs/min, LLM
+calls, tokens and failures, overall and per repo.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout, redirect_stderr
+
+_agents = None  # agents_groq, imported once per worker process
+
+
+def read_jobs(path):
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    job = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON ({e})")
+                if "repo_path" not in job:
+                    raise ValueError(f"{path}:{number}: job needs 'repo_path'")
+            else:
+                job = {"repo_path": line}
+            jobs.append(job)
+    return jobs
+
+
+def job_key(job):
+    # The same repo at another rev (or into another output folder) is another job
+    return "|".join([os.path.abspath(job["repo_path"]), job.get("rev") or "", job.get("output_dir") or ""])
+
+
+def load_state(path):
+    # Last record per job; a torn last line (crash mid-write) is ignored
+    records = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record["key"]] = record
+    except OSError:
+        pass
+    return records
+
+
+def _append_state(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _log_path(log_dir, job):
+    name = os.path.basename(os.path.normpath(job["repo_path"])) or "repo"
+    return os.path.join(log_dir, f"{name}-{hashlib.sha1(job_key(job).encode()).hexdigest()[:8]}.log")
+
+
+def _init_worker(limiter, log_dir):
+    global _agents
+    # README chunks are for live clients; a batch only needs the final file
+    os.environ.setdefault("STREAM_README", "0")
+    with open(os.path.join(log_dir, f"worker-{os.getpid()}.log"), "w", encoding="utf-8") as log_file:
+        with redirect_stdout(log_file), redirect_stderr(log_file):
+            import agents_groq
+            agents_groq.build_graph()
+            if limiter is not None and hasattr(agents_groq.llm, "use_limiter"):
+                agents_groq.llm.use_limiter(limiter)
+    _agents = agents_groq
+
+
+def _run_job(job, log_path):
+    llm = _agents.llm
+    calls, tokens, errors = llm.calls, llm.tokens_used, llm.errors
+    started = time.time()
+    record = {
+        "key": job_key(job),
+        "repo_path": job["repo_path"],
+        "rev": job.get("rev"),
+        "pid": os.getpid(),
+        "log": log_path,
+    }
+    output_dir = job.get("output_dir") or job["repo_path"]
+    # The LLM loop thread prints too, so stdout is swapped process-wide (one job per worker at a time)
+    with open(log_path, "w", encoding="utf-8") as log_file, redirect_stdout(log_file), redirect_stderr(log_file):
+        try:
+            if not os.path.isdir(job["repo_path"]):
+                raise FileNotFoundError(f"repo path not found: {job['repo_path']}")
+            _agents.run_agent(job["repo_path"], rev=job.get("rev"),
+                              output_dir=output_dir, incremental=not job.get("full"))
+            record.update(status="done", readme_path=os.path.join(output_dir, "readme.md"))
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+    record.update(
+        seconds=round(time.time() - started, 2),
+        llm_calls=llm.calls - calls,
+        tokens=llm.tokens_used - tokens,
+        llm_errors=llm.errors - errors,
+        finished_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    )
+    return record
+
+
+def _shared_limiter():
+    # Only the Groq path is rate limited; the fake backend needs nothing
+    if os.getenv("LLM_BACKEND", "").lower() == "fake":
+        return None, None
+    from llm_fallback import API_KEYS
+    from rate_limiter import start_shared_limiter
+    if not API_KEYS:
+        return None, None
+    return start_shared_limiter(len(API_KEYS))
+
+
+def run_batch(jobs, workers, state_path, report_path, log_dir):
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    previous = load_state(state_path)
+    pending, seen = [], set()
+    for job in jobs:
+        key = job_key(job)
+        if key in seen or previous.get(key, {}).get("status") == "done":
+            continue
+        seen.add(key)
+        pending.append(job)
+    skipped = len(jobs) - len(pending)
+    print(f"📋 {len(jobs)} jobs: {skipped} already done, {len(pending)} to run on {workers} workers")
+
+    manager, limiter = _shared_limiter()
+    records, broken = [], False
+    started = time.time()
+    try:
+        # fork: workers inherit the limiter proxy and this module without re-importing it
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(limiter, log_dir)) as pool:
+            futures = {pool.submit(_run_job, job, _log_path(log_dir, job)): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    record = future.result()
+                except BrokenProcessPool:
+                    # A worker died; unfinished jobs have no record, so a rerun picks them up
+                    broken = True
+                    continue
+                records.append(record)
+                _append_state(state_path, record)
+                mark = "✅" if record["status"] == "done" else "❌"
+                print(f"{mark} [{len(records)}/{len(pending)}] {job['repo_path']} in {record['seconds']}s "
+                      f"({record['llm_calls']} LLM calls, {record['tokens']} tokens)"
+                      + (f": {record['error']}" if record["status"] != "done" else ""))
+        limiter_state = limiter.snapshot() if limiter is not None else []
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+    wall = time.time() - started
+    latest = {**previous, **{r["key"]: r for r in records}}
+    report = build_report(records, wall, workers, jobs, latest, limiter_state)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+
+    totals = report["totals"]
+    print(f"📊 This run: {totals['done']} done, {totals['failed']} failed in {wall:.1f}s "
+          f"({report['jobs_per_min']} jobs/min, {totals['llm_calls']} LLM calls, {totals['tokens']} tokens)")
+    print(f"📝 Report written to {report_path}")
+    if broken:
+        print("💥 A worker process crashed; run the same command again to resume")
+    return report
+
+
+def build_report(records, wall_seconds, workers, jobs, latest, limiter_state):
+    """
+    records: jobs finished in this run (throughput and totals are about these).
+    latest: last known record per job key, including earlier runs of the same batch.
+    """
+    done = [r for r in records if r["status"] == "done"]
+    repos = []
+    for job in jobs:
+        record = latest.get(job_key(job), {"repo_path": job["repo_path"], "rev": job.get("rev"), "status": "pending"})
+        repos.append({key: record.get(key) for key in ("repo_path", "rev", "status", "seconds", "llm_calls",
+                                                        "tokens", "llm_errors", "error", "log")})
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 2),
+        "jobs_per_min": round(len(records) / wall_seconds * 60, 2) if wall_seconds > 0 else 0.0,
+        "totals": {
+            "run": len(records),
+            "done": len(done),
+            "failed": len(records) - len(done),
+            "llm_calls": sum(r["llm_calls"] for r in records),
+            "tokens": sum(r["tokens"] for r in records),
+            "llm_errors": sum(r["llm_errors"] for r in records),
+        },
+        # Across every run of this batch
+        "batch": {
+            "jobs": len(jobs),
+            "done": sum(1 for r in repos if r["status"] == "done"),
+            "failed": sum(1 for r in repos if r["status"] == "failed"),
+            "pending": sum(1 for r in repos if r["status"] == "pending"),
+        },
+        "limiter": limiter_state,
+        "repos": repos,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="file listing repo paths (or JSON job objects), one per line")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "4")))
+    parser.add_argument("--state", default="batch_state.jsonl", help="checkpoint file; rerun with the same one to resume")
+    parser.add_argument("--report", default=None, help="throughput report (defaults to <state>.report.json)")
+    parser.add_argument("--log-dir", default=None, help="per-job logs (defaults to <state>.logs/)")
+    args = parser.parse_args()
+
+    stem = os.path.splitext(args.state)[0]
+    try:
+        jobs = read_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+    report = run_batch(jobs, max(1, args.workers), args.state, args.report or f"{stem}.report.json",
+                       args.log_dir or f"{stem}.logs")
+    sys.exit(0 if report["batch"]["done"] == report["batch"]["jobs"] else 1)
@@ -0,0 +1,301 @@
+"""
+End-to-end pipeline benchmark on synthetic repositories, fully offline.
+
+    python benchmarks/bench_pipeline.py --sizes 50,500,5000 --repeats 3
+    python benchmarks/bench_pipeline.py --latency 0.3 --latency-dist lognormal --error-rate 0.05
+    python benchmarks/bench_pipeline.py --backend groq-server --error-rate 0.05 --quota-after 200
+    python benchmarks/bench_pipeline.py --repo path/to/repo --replay runs/recorded.jsonl --latency-dist recorded
+    python benchmarks/bench_pipeline.py --env SUMMARY_MODE=hierarchical --out new.json --baseline main.json
+
+Backends:
+    fake         the in-process FakeLLM (LLM_BACKEND=fake); latency distribution,
+                 injected 429s / exhausted quota and replay come from FAKE_LLM_*
+    groq-server  the real LLMFallbackManager against benchmarks/fake_groq_server.py
+                 on loopback, so rate limiting, retries and key rotation are measured
+
+Record real responses once with LLM_RECORD_FILE=runs/recorded.jsonl set on a
+normal run; --replay then answers the same prompts with them offline.
+
+Each run is `python agents_groq.py <repo> --full` in its own process with its
+own trace file. Reported per repo size: end-to-end and per-stage latency
+(p50/p95 from the run's spans), process startup, throughput, peak RSS, LLM
+calls, failed attempts and tokens. --cache warm does one unmeasured run first
+and keeps the summary/code-index caches; cold (default) starts empty every run.
+
+--baseline compares against an earlier --out report and exits 1 when latency,
+peak RSS or LLM calls regress by more than --max-regression.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_llm import LATENCY_DISTRIBUTIONS  # noqa: E402
+from synthetic_repo import make_repo  # noqa: E402
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Metrics compared against a baseline: (path in a result, what it means)
+_COMPARED = (("e2e_s.p50", "end-to-end p50"), ("peak_rss_mb", "peak RSS"), ("llm.calls", "LLM calls"))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _summary(values):
+    return {"p50": round(_percentile(values, 0.5), 3), "p95": round(_percentile(values, 0.95), 3),
+            "mean": round(statistics.fmean(values), 3)} if values else None
+
+
+def base_env(args, work):
+    env = dict(os.environ)
+    env.update({
+        "STREAM_README": "0",
+        "INCREMENTAL_RUNS": "0",
+        "SUMMARY_CACHE_PATH": os.path.join(work, "summary_cache.sqlite"),
+        "CODE_INDEX_DIR": os.path.join(work, "code_index"),
+        "RUN_MANIFEST_DIR": os.path.join(work, "manifests"),
+        "METRICS_FILE": "",
+    })
+    if args.backend == "fake":
+        env.update({
+            "LLM_BACKEND": "fake",
+            "FAKE_LLM_LATENCY": str(args.latency),
+            "FAKE_LLM_LATENCY_DIST": args.latency_dist,
+            "FAKE_LLM_429_RATE": str(args.error_rate),
+            "FAKE_LLM_QUOTA_AFTER": str(args.quota_after),
+            "FAKE_LLM_RETRY_AFTER": str(args.retry_after),
+            "FAKE_LLM_SEED": str(args.seed),
+            "FAKE_LLM_REPLAY": os.path.abspath(args.replay) if args.replay else "",
+        })
+    else:
+        # Empty values win over a developer's .env (load_dotenv doesn't override)
+        env.update({"LLM_BACKEND": "", "GEMINI_API_KEY": "", "LLM_RECORD_FILE": "",
+                    "GROQ_API_KEY": "bench-key-1", "GROQ_API_KEY_2": "bench-key-2"})
+    for pair in args.env:
+        key, _, value = pair.partition("=")
+        env[key] = value
+    return env
+
+
+def run_once(repo, env, work, label):
+    """One agents_groq.py process; returns the measurements of that run."""
+    trace = os.path.join(work, f"trace-{label}.jsonl")
+    log_path = os.path.join(work, f"run-{label}.log")
+    output = os.path.join(work, f"out-{label}")
+    env = dict(env, TRACE_FILE=trace)
+    started = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        process = subprocess.Popen([sys.executable, "agents_groq.py", repo, "--full", "--output", output],
+                                   cwd=PYTHON_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+        # wait4 gives this child's own peak RSS (KiB on Linux)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - started
+
+    spans = []
+    if os.path.exists(trace):
+        with open(trace, "r", encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f if line.strip()]
+    run = next((s for s in spans if s["kind"] == "run"), {})
+    llm = [s for s in spans if s["kind"] == "llm"]
+    stages = {}
+    for s in spans:
+        if s["kind"] in ("node", "step"):
+            stages[s["name"]] = stages.get(s["name"], 0.0) + s["duration_ms"] / 1000
+    ok = os.waitstatus_to_exitcode(status) == 0 and run.get("status") == "ok"
+    if not ok:
+        with open(log_path, "r", encoding="utf-8") as f:
+            tail = f.read().splitlines()[-5:]
+        print(f"   ❌ run {label} failed (log: {log_path})\n      " + "\n      ".join(tail))
+    return {
+        "ok": ok,
+        "wall_s": wall,
+        "run_s": run.get("duration_ms", 0) / 1000,
+        "stages": stages,
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "llm_calls": sum(1 for s in llm if s["status"] == "ok"),
+        "llm_errors": sum(1 for s in llm if s["status"] == "error"),
+        "llm_cancelled": sum(1 for s in llm if s["status"] == "cancelled"),
+        "tokens": sum((s.get("prompt_tokens") or 0) + (s.get("completion_tokens") or 0) for s in llm if s["status"] == "ok"),
+        "backoff_s": sum(s.get("backoff_s") or 0 for s in llm),
+        "replay_misses": run.get("replay_misses"),
+    }
+
+
+def bench_repo(repo, files, args, env, work):
+    label = f"{files}"
+    if args.cache == "warm":
+        run_once(repo, env, work, f"{label}-warmup")
+    runs = []
+    for i in range(args.repeats):
+        run_env = env
+        if args.cache == "cold":
+            # Fresh (empty) summary cache and code index for every run
+            run_env = dict(env, SUMMARY_CACHE_PATH=os.path.join(work, f"summary_cache-{label}-{i}.sqlite"),
+                           CODE_INDEX_DIR=os.path.join(work, f"code_index-{label}-{i}"))
+        runs.append(run_once(repo, run_env, work, f"{label}-{i}"))
+        print(f"   run {i + 1}/{args.repeats}: {runs[-1]['wall_s']:.2f}s "
+              f"({runs[-1]['llm_calls']} LLM calls, {runs[-1]['peak_rss_mb']:.0f} MB)")
+
+    good = [r for r in runs if r["ok"]] or runs
+    stage_names = sorted({name for r in good for name in r["stages"]})
+    e2e = [r["wall_s"] for r in good]
+    return {
+        "files": files,
+        "repo": repo,
+        "runs": len(runs),
+        "failed": sum(1 for r in runs if not r["ok"]),
+        "e2e_s": _summary(e2e),
+        "run_s": _summary([r["run_s"] for r in good]),
+        "startup_s": _summary([r["wall_s"] - r["run_s"] for r in good]),
+        "stages_s": {name: _summary([r["stages"].get(name, 0.0) for r in good]) for name in stage_names},
+        "runs_per_min": round(60 / statistics.median(e2e), 2) if e2e else 0.0,
+        "files_per_s": round(files / statistics.median(e2e), 1) if e2e and files else None,
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in good), 1),
+        "llm": {
+            "calls": round(statistics.fmean(r["llm_calls"] for r in good), 1),
+            "failed_attempts": round(statistics.fmean(r["llm_errors"] for r in good), 1),
+            "cancelled_attempts": round(statistics.fmean(r["llm_cancelled"] for r in good), 1),
+            "tokens": round(statistics.fmean(r["tokens"] for r in good)),
+            "backoff_s": round(statistics.fmean(r["backoff_s"] for r in good), 2),
+            "replay_misses": good[0]["replay_misses"],
+        },
+    }
+
+
+def _lookup(result, path):
+    for part in path.split("."):
+        result = (result or {}).get(part)
+    return result
+
+
+def compare(report, baseline, max_regression):
+    """Print current vs baseline per size; returns the regressions found."""
+    regressions = []
+    previous = {r["files"]: r for r in baseline.get("results", [])}
+    for result in report["results"]:
+        base = previous.get(result["files"])
+        if base is None:
+            continue
+        for path, description in _COMPARED:
+            new, old = _lookup(result, path), _lookup(base, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = "❌" if change > max_regression else "  "
+            print(f"{flag} {result['files']:>7} files  {description:<16} {old:>10.2f} -> {new:>10.2f}  ({change:+.1%})")
+            if change > max_regression:
+                regressions.append(f"{result['files']} files: {description} {change:+.1%}")
+    return regressions
+
+
+def print_table(report):
+    print(f"\n{'files':>7} {'e2e p50':>8} {'e2e p95':>8} {'startup':>8} {'runs/min':>9} "
+          f"{'RSS MB':>7} {'calls':>6} {'failed':>6} {'tokens':>8}  stages (p50)")
+    for r in report["results"]:
+        stages = ", ".join(f"{name} {s['p50']:.2f}s" for name, s in r["stages_s"].items())
+        print(f"{r['files']:>7} {r['e2e_s']['p50']:>7.2f}s {r['e2e_s']['p95']:>7.2f}s {r['startup_s']['p50']:>7.2f}s "
+              f"{r['runs_per_min']:>9.1f} {r['peak_rss_mb']:>7.0f} {r['llm']['calls']:>6.0f} "
+              f"{r['llm']['failed_attempts']:>6.0f} {r['llm']['tokens']:>8}  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500,2000", help="synthetic repo sizes (files), comma separated")
+    parser.add_argument("--repo", action="append", default=[], help="benchmark this repo instead (repeatable)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", choices=("cold", "warm"), default="cold")
+    parser.add_argument("--backend", choices=("fake", "groq-server"), default="fake")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean LLM latency per request (s)")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of attempts answered with a 429")
+    parser.add_argument("--quota-after", type=int, default=0, help="exhaust the quota after this many calls")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="backoff after an injected 429 (fake backend)")
+    parser.add_argument("--replay", default=None, help="JSON lines recorded with LLM_RECORD_FILE (fake backend)")
+    parser.add_argument("--rpm", type=int, default=1000, help="per-key requests/min (groq-server backend)")
+    parser.add_argument("--tpm", type=int, default=10_000_000, help="per-key tokens/min (groq-server backend)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra setting for the runs")
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="earlier --out report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--keep", action="store_true", help="keep the work directory (repos, traces, logs)")
+    args = parser.parse_args()
+    if args.latency_dist == "recorded" and not args.replay:
+        parser.error("--latency-dist recorded needs --replay")
+
+    work = tempfile.mkdtemp(prefix="bench-pipeline-")
+    server = None
+    try:
+        env = base_env(args, work)
+        if args.backend == "groq-server":
+            from fake_groq_server import start_server
+            port = _free_port()
+            server, _ = start_server(port, args.rpm, args.tpm, args.latency,
+                                     latency_dist="fixed" if args.latency_dist == "recorded" else args.latency_dist,
+                                     error_rate=args.error_rate, quota_after=args.quota_after, seed=args.seed)
+            env.update({"GROQ_BASE_URL": f"http://127.0.0.1:{port}", "GROQ_RPM": str(args.rpm), "GROQ_TPM": str(args.tpm)})
+
+        targets = [(os.path.abspath(repo), None) for repo in args.repo]
+        if not targets:
+            for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+                repo = os.path.join(work, f"repo-{size}")
+                make_repo(repo, size, seed=args.seed, git=True)
+                targets.append((repo, size))
+
+        results = []
+        for repo, size in targets:
+            files = size or sum(len(names) for _, _, names in os.walk(repo))
+            print(f"🏁 {repo} ({files} files, {args.backend} backend, {args.cache} cache)")
+            results.append(bench_repo(repo, files, args, env, work))
+
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "config": {key: value for key, value in vars(args).items() if key not in ("out", "baseline", "keep")},
+            "python": sys.version.split()[0],
+            "results": results,
+        }
+        print_table(report)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+            print(f"\n📝 Report written to {args.out}")
+
+        failed = sum(r["failed"] for r in results)
+        regressions = []
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+            print(f"\nAgainst {args.baseline} (max regression {args.max_regression:.0%}):")
+            regressions = compare(report, baseline, args.max_regression)
+        if failed or regressions:
+            sys.exit(f"\n❌ {failed} failed runs, {len(regressions)} regressions" +
+                     "".join(f"\n   {r}" for r in regressions))
+    finally:
+        if server is not None:
+            server.shutdown()
+        if args.keep:
+            print(f"📂 Work directory kept: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+File-tree scan: legacy os.walk + endswith filtering vs scanner.scan_repo.
+
+    python benchmarks/bench_scanner.py --files 200000
+
+Builds a synthetic tree (source files, node_modules noise, media, minified
+bundles, a .gitignore'd build dir) and times both implementations on it.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scanner import scan_repo  # noqa: E402
+
+
+def legacy_get_file_tree(repo_base_path):
+    # The original tools.get_file_tree plus agent_select_files' second filter pass
+    skip_dirs = {
+        'node_modules', '.git', '__pycache__', '.venv', 'venv', 'env',
+        'dist', 'build', '.next', '.nuxt', 'coverage', '.nyc_output',
+        '.cache', 'tmp', 'temp', '.tmp', '.temp', 'logs', '.DS_Store',
+        'vendor', 'bower_components', '.gradle', '.idea', '.vscode',
+        '.pytest_cache', '.mypy_cache', '.tox', '.eggs'
+    }
+    skip_extensions = {
+        '.pyc', '.pyo', '.pyd', '.so', '.dll', '.dylib', '.exe', '.bin',
+        '.log', '.tmp', '.temp', '.cache', '.pid', '.lock', '.swp', '.swo',
+        '.DS_Store', '.coverage', '.nyc_output', '.min.js', '.min.css'
+    }
+    file_tree = []
+    for dirpath, dirnames, filenames in os.walk(repo_base_path):
+        dirnames[:] = [d for d in dirnames if d not in skip_dirs]
+        for filename in filenames:
+            if any(filename.endswith(ext) for ext in skip_extensions):
+                continue
+            if filename.startswith('.') and filename not in {'.env', '.gitignore', '.dockerignore'}:
+                continue
+            full_path = os.path.join(dirpath, filename)
+            file_tree.append(os.path.relpath(full_path, repo_base_path))
+
+    return [
+        f for f in file_tree
+        if not any(skip in f.lower() for skip in [
+            '.git/', 'node_modules/', '__pycache__/', '.venv/', 'venv/',
+            '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico',
+            '.min.js', '.min.css', 'dist/', 'build/', '.cache/'
+        ])
+    ]
+
+
+def build_tree(root, total_files, files_per_dir=50):
+    kinds = [".py", ".js", ".ts", ".json", ".md", ".png", ".min.js", ".go", ".css", ".txt"]
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("generated/\n*.snap\n")
+
+    created = 0
+    d = 0
+    while created < total_files:
+        # Mix of normal packages, ignored output and dependency noise
+        bucket = ("generated" if d % 10 == 0 else "node_modules" if d % 10 == 1 else "src")
+        directory = os.path.join(root, bucket, f"pkg{d // 100}", f"mod{d}")
+        os.makedirs(directory, exist_ok=True)
+        for i in range(min(files_per_dir, total_files - created)):
+            with open(os.path.join(directory, f"file{i}{kinds[i % len(kinds)]}"), "w") as f:
+                f.write("x = 1\n")
+            created += 1
+        d += 1
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-scan-")
+    try:
+        print(f"Building synthetic tree with {args.files} files in {root} ...")
+        build_tree(root, args.files)
+
+        legacy_time, legacy = timed(lambda: legacy_get_file_tree(root), args.repeat)
+        scan_time, entries = timed(lambda: scan_repo(root), args.repeat)
+
+        print(f"legacy os.walk : {legacy_time:7.3f}s  {len(legacy):7} files")
+        print(f"scan_repo      : {scan_time:7.3f}s  {len(entries):7} files (gitignore + binary/size filtered)")
+        print(f"speedup        : {legacy_time / scan_time:7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Process start-up cost of the README pipeline: imports, LLM manager setup and
+pipeline construction, measured with `python -X importtime`.
+
+    python benchmarks/bench_startup.py --repeats 5
+    python benchmarks/bench_startup.py --scenarios groq,gemini+groq --executors builtin,langgraph --top 15
+
+Each run is a fresh `python -X importtime -c "import agents_groq; agents_groq.build_graph()"`
+process. Scenarios pick which providers look configured (dummy keys, nothing is
+sent over the network), so lazily imported SDKs show up only where they're
+needed; executors pick PIPELINE_EXECUTOR. Reported per combination: wall time,
+time spent importing (the top-level importtime entries), peak RSS, and the
+packages with the most import time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Provider keys per scenario; empty values keep a local .env from filling them in
+SCENARIOS = {
+    "fake": {"LLM_BACKEND": "fake", "GROQ_API_KEY": "", "GEMINI_API_KEY": ""},
+    "groq": {"LLM_BACKEND": "", "GROQ_API_KEY": "bench-key", "GEMINI_API_KEY": ""},
+    "gemini+groq": {"LLM_BACKEND": "", "GROQ_API_KEY": "bench-key", "GEMINI_API_KEY": "bench-key"},
+}
+
+CODE = "import time; t = time.perf_counter(); import agents_groq; agents_groq.build_graph(); print(time.perf_counter() - t)"
+
+
+def parse_importtime(text):
+    """(top-level import seconds, {top-level package: self seconds})"""
+    total, packages = 0.0, {}
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One space after the bar is a top-level import; nested ones are indented further
+        if not name.startswith("  "):
+            total += int(cumulative_us) / 1e6
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return total, packages
+
+
+def run_once(scenario, executor, work):
+    env = dict(os.environ, **SCENARIOS[scenario], PIPELINE_EXECUTOR=executor, METRICS_FILE="", TRACE_FILE="")
+    err_path = os.path.join(work, "importtime.txt")
+    with open(err_path, "w", encoding="utf-8") as err:
+        process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", CODE], cwd=PYTHON_DIR, env=env,
+                                   stdout=subprocess.PIPE, stderr=err, text=True)
+        out = process.stdout.read()
+        # wait4 gives this child's own peak RSS (KiB on Linux)
+        _, status, usage = os.wait4(process.pid, 0)
+    with open(err_path, "r", encoding="utf-8") as f:
+        stderr = f.read()
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"{scenario}/{executor} failed:\n" + "\n".join(stderr.splitlines()[-5:]))
+    imports, packages = parse_importtime(stderr)
+    return {
+        "startup_s": float(out.strip().splitlines()[-1]),
+        "imports_s": imports,
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "packages": packages,
+    }
+
+
+def bench(scenario, executor, repeats, top):
+    with tempfile.TemporaryDirectory() as work:
+        runs = [run_once(scenario, executor, work) for _ in range(repeats)]
+    packages = {}
+    for run in runs:
+        for name, seconds in run["packages"].items():
+            packages[name] = packages.get(name, 0.0) + seconds / len(runs)
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {
+        "scenario": scenario,
+        "executor": executor,
+        "startup_s": statistics.median(r["startup_s"] for r in runs),
+        "imports_s": statistics.median(r["imports_s"] for r in runs),
+        "peak_rss_mb": statistics.median(r["peak_rss_mb"] for r in runs),
+        "modules": len(runs[0]["packages"]),
+        "heaviest": [{"package": name, "self_s": round(seconds, 4)} for name, seconds in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="fake,groq,gemini+groq", help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--executors", default="builtin,langgraph", help="comma-separated PIPELINE_EXECUTOR values")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per combination (medians are reported)")
+    parser.add_argument("--top", type=int, default=8, help="packages with the most import time to list")
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scenario':<14}{'executor':<11}{'startup':>9}{'imports':>9}{'rss MB':>9}  heaviest packages")
+    for scenario in args.scenarios.split(","):
+        for executor in args.executors.split(","):
+            result = bench(scenario, executor, args.repeats, args.top)
+            results.append(result)
+            heaviest = ", ".join(f"{h['package']} {h['self_s'] * 1000:.0f}ms" for h in result["heaviest"][:4])
+            print(f"{scenario:<14}{executor:<11}{result['startup_s']:>8.2f}s{result['imports_s']:>8.2f}s"
+                  f"{result['peak_rss_mb']:>9.1f}  {heaviest}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+README prompt size: markdown file summaries vs compact records (summary_records.py).
+
+    python benchmarks/bench_summary_format.py ../.. --files 25
+    python benchmarks/bench_summary_format.py /path/to/repo --files 200
+
+Both formats carry the same facts, taken from the code index of the repo's
+best-ranked files (definitions, routes, repo imports, importers, external
+packages) plus a one-line purpose. The markdown version follows the old bulk
+format (**Purpose:** / **Key Components:** / **Dependencies:** /
+**Functionality:** / **Integration:**); the records are rendered as they go
+into the README prompt. Real summaries add prose on top of the facts, so the
+saving measured here is a lower bound.
+
+Reported: tokens of each joined prompt section, a check that every fact is
+still in the rendered records, and how many files' facts survive the fallback
+README prompt (the old one kept the first 3000 characters, the new one 750
+tokens of the brief rendering).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from file_ranker import rank_files, pick_diverse, index_sources, INDEX_READ_CHARS  # noqa: E402
+from import_graph import to_posix  # noqa: E402
+from summary_records import dumps, render, validate  # noqa: E402
+from token_packer import count_tokens, truncate_to_tokens  # noqa: E402
+from tools import set_repo_path, get_file_index, build_code_index  # noqa: E402
+
+
+def facts_of(index, path):
+    path = to_posix(path)
+    symbols = index.symbols.get(path, [])
+    return {
+        "components": sorted(s for s in symbols if " " not in s),
+        "routes": sorted(s for s in symbols if " " in s),
+        "deps": sorted(index.external.get(path, [])),
+        "links": sorted(set(index.imports.get(path, [])) | set(index.imported_by.get(path, []))),
+    }
+
+
+def markdown_summary(path, purpose, facts):
+    return (f"### {path}\n"
+            f"**Purpose:** {purpose}\n"
+            f"**Key Components:** {', '.join(facts['components']) or 'None'}\n"
+            f"**Dependencies:** {', '.join(facts['deps']) or 'None'}\n"
+            f"**Functionality:** {'; '.join(facts['routes']) or 'See key components.'}\n"
+            f"**Integration:** {', '.join(facts['links']) or 'None'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("repo")
+    parser.add_argument("--files", type=int, default=25, help="best-ranked files summarized (MAX_FILES_TO_PROCESS)")
+    args = parser.parse_args()
+
+    set_repo_path(os.path.abspath(args.repo))
+    entries = get_file_index()
+    index, _ = build_code_index(entries, index_sources(entries), INDEX_READ_CHARS)
+    paths = [item.path for item in pick_diverse(rank_files(entries, index), args.files)]
+
+    markdown, records, all_facts = [], [], []
+    for path in paths:
+        facts = facts_of(index, path)
+        purpose = f"{os.path.basename(path)} in {os.path.dirname(path) or 'the repository root'}."
+        markdown.append(markdown_summary(path, purpose, facts))
+        records.append(dumps(validate(dict({k: v for k, v in facts.items() if v}, file=path, purpose=purpose))))
+        all_facts.extend(item for items in facts.values() for item in items)
+
+    old_text = "\n\n".join(markdown)
+    new_text = render(records)
+    # Item caps in validate() are the only way a fact can be dropped
+    lost = sorted({fact for fact in all_facts if fact not in new_text})
+
+    old_fallback = old_text[:3000]
+    new_fallback = truncate_to_tokens(render(records, brief=True), 750)[0]
+
+    print(f"{len(paths)} files, {len(set(all_facts))} distinct facts")
+    print(f"markdown summaries: {count_tokens(old_text):>7} tokens")
+    print(f"compact records:    {count_tokens(new_text):>7} tokens "
+          f"({(1 - count_tokens(new_text) / max(count_tokens(old_text), 1)) * 100:.0f}% fewer)")
+    print(f"facts missing from the records: {len(lost)}" + (f" ({', '.join(lost[:5])}...)" if lost else ""))
+    print(f"fallback prompt covers {sum(f'### {p}' in old_fallback for p in paths)}/{len(paths)} files before, "
+          f"{sum(f'### {p}' in new_fallback for p in paths)}/{len(paths)} after")
+
+
+if __name__ == "__main__":
+    main()
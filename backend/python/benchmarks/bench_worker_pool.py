@@ -0,0 +1,123 @@
+"""
+Cold spawn vs warm worker pool throughput, using the fake LLM backend.
+
+    python benchmarks/bench_worker_pool.py --jobs 20 --workers 4
+
+Cold: one `python agents_groq.py <repo>` process per job (what readme.ts did).
+Warm: one `python worker.py --workers N` process serving every job.
+
+Each pass gets its own freshly generated repos, and run manifests, the summary
+cache and the code index cache are off or in a scratch directory, so the warm
+pass can't turn into incremental "skip" runs over the cold pass's outputs:
+the two differ only in process startup.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_repo(root, index):
+    repo = os.path.join(root, f"repo-{index}")
+    os.makedirs(os.path.join(repo, "src"), exist_ok=True)
+    with open(os.path.join(repo, "package.json"), "w") as f:
+        f.write('{"name": "demo-%d", "main": "src/index.js"}\n' % index)
+    for i in range(12):
+        with open(os.path.join(repo, "src", f"module_{i}.js"), "w") as f:
+            f.write(f"export function handler{i}(req, res) {{ return res.send({i}); }}\n" * 20)
+    return repo
+
+
+def bench_env(latency, work):
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(latency),
+        # Every job does the full pipeline, whatever ran before it
+        "INCREMENTAL_RUNS": "0",
+        "SUMMARY_CACHE": "0",
+        "SUMMARY_CACHE_PATH": os.path.join(work, "summary_cache.sqlite"),
+        "RUN_MANIFEST_DIR": os.path.join(work, "manifests"),
+        "CODE_INDEX_DIR": os.path.join(work, "code_index"),
+        "METRICS_FILE": "",
+        "TRACE_FILE": "",
+    })
+    return env
+
+
+def run_cold(repos, workers, env):
+    def one(repo):
+        subprocess.run(
+            [sys.executable, "agents_groq.py", repo],
+            cwd=PYTHON_DIR, env=env, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    start = time.perf_counter()
+    # Same parallelism as the warm pool so only startup cost differs
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, repos))
+    return time.perf_counter() - start
+
+
+def run_warm(repos, workers, env):
+    process = subprocess.Popen(
+        [sys.executable, "worker.py", "--workers", str(workers)],
+        cwd=PYTHON_DIR, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+    )
+
+    # Pool warm-up is paid once at server boot, so it is excluded from the timing
+    for line in process.stdout:
+        if json.loads(line).get("type") == "ready":
+            break
+
+    start = time.perf_counter()
+    for i, repo in enumerate(repos):
+        process.stdin.write(json.dumps({"id": str(i), "repo_path": repo}) + "\n")
+    process.stdin.flush()
+
+    finished = 0
+    for line in process.stdout:
+        event = json.loads(line)
+        if event.get("type") in ("done", "error"):
+            finished += 1
+            if finished == len(repos):
+                break
+    elapsed = time.perf_counter() - start
+
+    process.stdin.close()
+    process.wait()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per request (s)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-worker-")
+    try:
+        env = bench_env(args.latency, root)
+        cold = run_cold([make_repo(os.path.join(root, "cold"), i) for i in range(args.jobs)], args.workers, env)
+        warm = run_warm([make_repo(os.path.join(root, "warm"), i) for i in range(args.jobs)], args.workers, env)
+
+        print(f"jobs={args.jobs} workers={args.workers} fake_latency={args.latency}s")
+        print(f"cold spawn : {cold:7.2f}s  {args.jobs / cold * 60:8.1f} jobs/min")
+        print(f"warm pool  : {warm:7.2f}s  {args.jobs / warm * 60:8.1f} jobs/min")
+        print(f"speedup    : {cold / warm:7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
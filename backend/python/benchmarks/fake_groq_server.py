@@ -0,0 +1,225 @@
+"""
+Local stand-in for the Groq chat completions API that enforces requests/min
+and tokens/min per API key and answers with the same x-ratelimit-* and
+retry-after headers Groq sends, including 429s.
+
+    python benchmarks/fake_groq_server.py --port 8765 --rpm 30 --tpm 6000
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=a GROQ_API_KEY_2=b python agents_groq.py <repo>
+
+Requests with "stream": true get an SSE stream of chat.completion.chunk events
+(usage in the last chunk's x_groq, as Groq does). --fail-streams N cuts the
+first N streams off halfway, to exercise mid-stream fallback.
+
+--latency-dist draws each response time around --latency (see fake_llm.py),
+--error-rate answers that share of admitted requests with a 429, and
+--quota-after N answers every request after the first N with an exhausted-quota
+429, so the real LLMFallbackManager's retry and key rotation can be benchmarked.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_llm import LATENCY_DISTRIBUTIONS, sample_latency  # noqa: E402
+
+
+class _Window:
+    def __init__(self):
+        self.requests = []  # timestamps
+        self.tokens = []    # (timestamp, tokens)
+
+
+class FakeGroqState:
+    def __init__(self, rpm, tpm, latency, fail_streams=0, latency_dist="fixed", error_rate=0.0, quota_after=0, seed=0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.latency = latency
+        self.fail_streams = fail_streams
+        self.latency_dist = latency_dist
+        self.error_rate = error_rate
+        self.quota_after = quota_after
+        self.rng = random.Random(seed)
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def admit(self, api_key, tokens):
+        # Sliding one-minute window per key; returns (ok, headers)
+        now = time.time()
+        with self.lock:
+            window = self.windows.setdefault(api_key, _Window())
+            window.requests = [t for t in window.requests if now - t < 60]
+            window.tokens = [(t, n) for t, n in window.tokens if now - t < 60]
+            used_tokens = sum(n for _, n in window.tokens)
+
+            ok = len(window.requests) < self.rpm and used_tokens + tokens <= self.tpm
+            if ok:
+                window.requests.append(now)
+                window.tokens.append((now, tokens))
+                used_tokens += tokens
+                self.accepted += 1
+            else:
+                self.rejected += 1
+
+            oldest = min([t for t in window.requests] + [t for t, _ in window.tokens] or [now])
+            reset = max(60 - (now - oldest), 0.0)
+            headers = {
+                "x-ratelimit-limit-requests": str(self.rpm),
+                "x-ratelimit-remaining-requests": str(max(self.rpm - len(window.requests), 0)),
+                "x-ratelimit-reset-requests": f"{reset:.2f}s",
+                "x-ratelimit-limit-tokens": str(self.tpm),
+                "x-ratelimit-remaining-tokens": str(max(self.tpm - used_tokens, 0)),
+                "x-ratelimit-reset-tokens": f"{reset:.2f}s",
+            }
+            if not ok:
+                headers["retry-after"] = str(max(int(reset), 1))
+            return ok, headers
+
+    def fault(self):
+        # None, or the error body for an injected 429 (called after admit() counted the request)
+        with self.lock:
+            error = None
+            if self.quota_after and self.accepted > self.quota_after:
+                error = {"message": "You exceeded your current quota, please check your plan and billing details",
+                         "type": "insufficient_quota", "code": "insufficient_quota"}
+            elif self.error_rate and self.rng.random() < self.error_rate:
+                error = {"message": "Rate limit reached for model, please try again later (injected)",
+                         "type": "requests", "code": "rate_limit_exceeded"}
+            if error is not None:
+                self.accepted -= 1
+                self.rejected += 1
+            return error
+
+    def sample_latency(self):
+        with self.lock:
+            return sample_latency(self.rng, self.latency, self.latency_dist)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload, headers):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            api_key = self.headers.get("Authorization", "").replace("Bearer ", "")
+            prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+            completion_tokens = min(request.get("max_tokens") or 256, 256)
+
+            ok, headers = state.admit(api_key, prompt_tokens + completion_tokens)
+            if not ok:
+                self._send(429, {"error": {"message": "Rate limit reached for model, please try again later", "type": "tokens", "code": "rate_limit_exceeded"}}, headers)
+                return
+            error = state.fault()
+            if error is not None:
+                self._send(429, {"error": error}, dict(headers, **{"retry-after": "1"}))
+                return
+
+            if request.get("stream"):
+                self._stream(request, headers, prompt_tokens, completion_tokens)
+                return
+
+            time.sleep(state.sample_latency())
+            self._send(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "OK"}}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }, headers)
+
+        def _stream(self, request, headers, prompt_tokens, completion_tokens):
+            with state.lock:
+                fail = state.fail_streams > 0
+                state.fail_streams -= fail
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            pieces = ["# Streamed README\n\n"] + [f"Line {i} from the fake Groq server.\n" for i in range(1, 9)]
+            latency = state.sample_latency()
+            for i, piece in enumerate(pieces):
+                if fail and i == len(pieces) // 2:
+                    return  # connection closes without [DONE]
+                time.sleep(latency / len(pieces))
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            final = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": "req-fake", "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }},
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port=8765, rpm=30, tpm=6000, latency=0.05, fail_streams=0, **faults):
+    # Returns (server, state); the server runs on a daemon thread.
+    # faults: latency_dist, error_rate, quota_after, seed (see FakeGroqState)
+    state = FakeGroqState(rpm, tpm, latency, fail_streams, **faults)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--tpm", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-streams", type=int, default=0)
+    parser.add_argument("--latency-dist", choices=[d for d in LATENCY_DISTRIBUTIONS if d != "recorded"], default="fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of admitted requests answered with a 429")
+    parser.add_argument("--quota-after", type=int, default=0, help="exhaust the quota after this many requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server, state = start_server(args.port, args.rpm, args.tpm, args.latency, args.fail_streams,
+                                 latency_dist=args.latency_dist, error_rate=args.error_rate,
+                                 quota_after=args.quota_after, seed=args.seed)
+    print(f"Fake Groq API on http://127.0.0.1:{args.port} (rpm={args.rpm}, tpm={args.tpm})")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"accepted={state.accepted} rejected={state.rejected}")
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,130 @@
+"""
+Synthetic repositories of controlled size for the pipeline benchmarks.
+
+    python benchmarks/synthetic_repo.py /tmp/synth --files 2000 --seed 1 --git
+
+Deterministic for a given (files, seed): a JS service (src/), a Python package
+(pkg/), tests, docs and config files, with real import edges between modules
+so the code index and the ranking have something to work with, plus noise the
+scanner should skip (node_modules, build output, images, minified bundles).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+
+# Share of source files per area; the rest of the tree is noise
+_AREAS = (("src", ".js", 0.45), ("pkg", ".py", 0.35), ("tests", ".py", 0.1), ("docs", ".md", 0.1))
+_NOISE_SHARE = 0.15
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _js_spec(target, from_dir):
+    spec = os.path.relpath(target, from_dir)
+    return spec if spec.startswith(".") else "./" + spec
+
+
+def _js_module(rng, name, imports, lines):
+    head = "".join(f"import {{ {os.path.basename(i)} }} from '{_js_spec(i, os.path.dirname(name))}';\n"
+                   for i in imports)
+    fn = os.path.basename(name)
+    body = [f"export function {fn}(req, res) {{", f"  const items = [];"]
+    for i in range(lines):
+        body.append(f"  items.push({{ id: {rng.randint(0, 9999)}, label: 'item-{i}' }});")
+    body.append("  return res.json(items);\n}\n")
+    if rng.random() < 0.2:
+        body.append(f"router.get('/api/{fn}', {fn});\n")
+    return head + "\n" + "\n".join(body)
+
+
+def _py_module(rng, name, imports, lines):
+    head = "".join(f"from {i.replace('/', '.')} import {os.path.basename(i)}\n" for i in imports)
+    fn = os.path.basename(name)
+    body = [f"class {fn.title().replace('_', '')}:", "    def __init__(self):", "        self.items = []", ""]
+    body.append(f"def {fn}(values):")
+    body.append("    total = 0")
+    for i in range(lines):
+        body.append(f"    total += values[{i % 7}] * {rng.randint(1, 99)}")
+    body.append("    return total\n")
+    return head + "\n" + "\n".join(body)
+
+
+def make_repo(root, files=500, seed=0, lines=40, git=False):
+    """Write a repo with about `files` files under `root`; returns the list of source paths."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    _write(os.path.join(root, "package.json"), json.dumps({
+        "name": f"synthetic-{files}", "version": "1.0.0", "main": "src/index.js",
+        "scripts": {"start": "node src/index.js", "test": "jest"},
+        "dependencies": {"express": "^4.18.0", "pg": "^8.11.0"},
+    }, indent=2) + "\n")
+    _write(os.path.join(root, "requirements.txt"), "fastapi\nsqlalchemy\nrequests\n")
+    _write(os.path.join(root, ".gitignore"), "node_modules/\nbuild/\n")
+    _write(os.path.join(root, "Dockerfile"), "FROM node:20\nCOPY . /app\nCMD [\"npm\", \"start\"]\n")
+
+    sources = max(files - 4, 1)
+    noise = int(sources * _NOISE_SHARE)
+    sources -= noise
+    written = {".js": [], ".py": []}
+    paths = []
+    for area, suffix, share in _AREAS:
+        count = max(1, int(sources * share))
+        for i in range(count):
+            # ~20 files per directory, two levels deep
+            group = i // 20
+            directory = f"{area}/group_{group // 10}/part_{group % 10}" if count > 20 else area
+            name = f"{directory}/{area}_{i}"
+            path = name + suffix
+            if suffix == ".md":
+                text = f"# {name}\n\n" + "\n".join(f"Paragraph {j} about {name}." for j in range(lines // 4))
+            else:
+                pool = written[suffix]
+                imports = rng.sample(pool[-200:], min(len(pool), rng.randint(0, 3)))
+                make = _js_module if suffix == ".js" else _py_module
+                text = make(rng, name, imports, rng.randint(lines // 2, lines * 3 // 2))
+                if area != "tests":
+                    pool.append(name)
+            _write(os.path.join(root, path), text)
+            paths.append(path)
+    if written[".js"]:
+        _write(os.path.join(root, "src", "index.js"),
+               "".join(f"import {{ {os.path.basename(n)} }} from '{_js_spec(n, 'src')}';\n"
+                       for n in written[".js"][:5])
+               + "const express = require('express');\nconst router = express.Router();\n")
+        paths.append("src/index.js")
+
+    for i in range(noise):
+        kind = i % 3
+        if kind == 0:
+            path = f"node_modules/dep_{i % 40}/index_{i}.js"
+        elif kind == 1:
+            path = f"build/bundle_{i}.min.js"
+        else:
+            path = f"assets/image_{i}.png"
+        _write(os.path.join(root, path), "x" * 200)
+
+    if git:
+        run = lambda *args: subprocess.run(["git", *args], cwd=root, check=True,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        run("init", "-q")
+        run("add", "-A")
+        run("-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "-q", "-m", "synthetic")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lines", type=int, default=40, help="average lines per source file")
+    parser.add_argument("--git", action="store_true", help="commit the tree (code index cache keys on the commit)")
+    args = parser.parse_args()
+    sources = make_repo(args.root, args.files, args.seed, args.lines, args.git)
+    print(f"{len(sources)} source files written to {args.root}")
@@ -0,0 +1,269 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+from typing import List
+from token_packer import count_tokens
+import tracing
+
+# Latency shapes for FAKE_LLM_LATENCY_DIST; each keeps FAKE_LLM_LATENCY as the mean
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal", "recorded")
+
+
+def sample_latency(rng, mean, dist="fixed", sigma=0.6):
+    if mean <= 0:
+        return 0.0
+    if dist == "uniform":
+        return rng.uniform(0, 2 * mean)
+    if dist == "exponential":
+        return rng.expovariate(1 / mean)
+    if dist == "lognormal":
+        # mu chosen so the mean stays `mean`; sigma sets how heavy the tail is
+        return rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+    return mean
+
+
+def replay_key(messages, max_tokens):
+    # Same prompt and output cap -> same recorded response
+    payload = json.dumps([[m.get("role"), m.get("content", "")] for m in messages] + [max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_recording(path):
+    # Last response per key; a torn last line (interrupted recording) is ignored
+    recorded = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            recorded[record["key"]] = record
+    return recorded
+
+
+class InjectedError(Exception):
+    pass
+
+
+# Offline stand-in for LLMFallbackManager. Enabled with LLM_BACKEND=fake so the
+# pipeline (and the benchmarks) can run without spending Groq/Gemini quota.
+# Latency follows a configurable distribution, 429s and an exhausted quota can
+# be injected, and FAKE_LLM_REPLAY serves responses captured by RecordingLLM.
+class FakeLLM:
+    def __init__(self, latency=None, replay=None):
+        # Simulated round-trip time per request, in seconds (the mean for non-fixed distributions)
+        self.latency = float(os.getenv("FAKE_LLM_LATENCY", "0.05")) if latency is None else latency
+        self.latency_dist = os.getenv("FAKE_LLM_LATENCY_DIST", "fixed").lower()
+        if self.latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"FAKE_LLM_LATENCY_DIST must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency_sigma = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.6"))
+        # Fault injection: share of attempts answered with a 429, and calls allowed before the quota runs out
+        self.rate_limit_rate = float(os.getenv("FAKE_LLM_429_RATE", "0"))
+        self.quota_after = int(os.getenv("FAKE_LLM_QUOTA_AFTER", "0"))
+        self.retry_after = float(os.getenv("FAKE_LLM_RETRY_AFTER", "0.5"))
+        self.rng = random.Random(int(os.getenv("FAKE_LLM_SEED", "0")))
+        self._lock = threading.Lock()
+
+        replay = os.getenv("FAKE_LLM_REPLAY") if replay is None else replay
+        self.recorded = load_recording(replay) if replay else {}
+        self.replay_hits = 0
+        self.replay_misses = 0
+
+        self.calls = 0
+        self.tokens_used = 0
+        self.errors = 0
+        self.model_id = "fake"
+
+    def _respond(self, prompt: str, max_tokens: int) -> str:
+        # File selection: echo back the first few files from the tree shown to the model
+        if "file tree of the entire project" in prompt:
+            tree = prompt.split("Below is the file tree of the entire project:", 1)[1]
+            tree = tree.split("From this list", 1)[0]
+            files = [line.strip() for line in tree.splitlines() if line.strip()]
+            return json.dumps(files[:15])
+
+        # Incremental README update: rewrite one section
+        if "maintaining an existing `README.md`" in prompt:
+            return "## 🚀 Features\n\n- Updated by the fake LLM backend.\n"
+
+        # Directory summary in hierarchical mode
+        match = re.search(r"summaries of the files and subdirectories inside `(.+?)`", prompt)
+        if match:
+            count = len(re.findall(r"^### ", prompt, re.MULTILINE))
+            return f"- Stub module summary of {match.group(1)}, folded from {count} summaries."
+
+        # README generation
+        if "README.md" in prompt and "summaries" in prompt.lower():
+            return (
+                "# Fake Project\n\nThis README was produced by the fake LLM backend.\n\n"
+                "## 🚀 Features\n\n- Stub feature\n\n"
+                "## 📦 Installation\n\n```bash\nnpm install\n```\n"
+            )
+
+        # File summaries: a JSON array with one record per "=== FILE: name ===" header,
+        # or a single record for the one-file prompt
+        names = re.findall(r"=== FILE: (.+?) ===", prompt)
+        if names:
+            return json.dumps([self._record(name) for name in names], indent=1)
+        match = re.search(r"Filename: (.+)", prompt)
+        if match:
+            return json.dumps(self._record(match.group(1).strip()))
+
+        return "OK"
+
+    @staticmethod
+    def _record(name):
+        # Shaped like summary_records.py expects; files of one language share their deps
+        suffix = name.rsplit(".", 1)[-1] if "." in name else ""
+        return {"file": name, "purpose": f"Stub summary of {name}.",
+                "components": [f"{name.rsplit('/', 1)[-1]}: stub component"],
+                "deps": [f"stub-{suffix or 'lib'}", "stub-shared"]}
+
+    def _answer(self, messages, prompt, max_tokens):
+        # (response, latency): the recorded response when replaying, else a synthetic one
+        record = self.recorded.get(replay_key(messages, max_tokens)) if self.recorded else None
+        with self._lock:
+            if self.recorded:
+                if record is not None:
+                    self.replay_hits += 1
+                else:
+                    self.replay_misses += 1
+            if record is not None and self.latency_dist == "recorded":
+                latency = record.get("latency", self.latency)
+            else:
+                latency = sample_latency(self.rng, self.latency, self.latency_dist, self.latency_sigma)
+        response = record["response"] if record is not None else self._respond(prompt, max_tokens)
+        return response, latency
+
+    def _fault(self):
+        # None, or (retry_reason, message, backoff before the next attempt)
+        with self._lock:
+            if self.quota_after and self.calls >= self.quota_after:
+                return "quota", "Error code: 429 - You exceeded your current quota (injected)", None
+            if self.rate_limit_rate and self.rng.random() < self.rate_limit_rate:
+                return "rate_limit", "Error code: 429 - Rate limit reached (injected)", self.retry_after
+        return None
+
+    def _failed_attempt(self, prompt, max_tokens, attempt, fault):
+        reason, message, backoff = fault
+        with self._lock:
+            self.errors += 1
+        span = tracing.Span("llm.fake", "llm", tracing.current_span(), provider="fake", model=self.model_id,
+                            attempt=attempt, max_tokens=max_tokens, prompt_tokens=count_tokens(prompt),
+                            retry_reason=reason, backoff_s=backoff or 0)
+        span.end("error", message)
+
+    @staticmethod
+    def _chunks(text, size=16):
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _span(self, prompt, response, max_tokens, on_chunk, attempt=1):
+        # Same span shape as LLMFallbackManager's attempts, so traces and metrics work offline
+        prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(response)
+        with self._lock:
+            self.calls += 1
+            self.tokens_used += prompt_tokens + completion_tokens
+        return tracing.Span("llm.fake", "llm", tracing.current_span(), provider="fake", model=self.model_id,
+                            attempt=attempt, max_tokens=max_tokens, streamed=on_chunk is not None,
+                            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def make_request(self, messages: List[dict], max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        prompt = "\n".join(msg.get("content", "") for msg in messages)
+        attempt = 1
+        while True:
+            fault = self._fault()
+            if fault is None:
+                break
+            self._failed_attempt(prompt, max_tokens, attempt, fault)
+            if fault[2] is None or attempt >= max_retries:
+                raise InjectedError(f"LLM call failed after {attempt} attempts. Last error: {fault[1]}")
+            time.sleep(fault[2])
+            attempt += 1
+
+        response, latency = self._answer(messages, prompt, max_tokens)
+        span = self._span(prompt, response, max_tokens, on_chunk, attempt)
+        if on_chunk is None:
+            if latency:
+                time.sleep(latency)
+            span.end()
+            return response
+        # Streamed: the same total latency, spread over the chunks
+        chunks = self._chunks(response)
+        for chunk in chunks:
+            if latency:
+                time.sleep(latency / len(chunks))
+            on_chunk(chunk)
+        span.end()
+        return response
+
+    async def amake_request(self, messages: List[dict], max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        prompt = "\n".join(msg.get("content", "") for msg in messages)
+        attempt = 1
+        while True:
+            fault = self._fault()
+            if fault is None:
+                break
+            self._failed_attempt(prompt, max_tokens, attempt, fault)
+            if fault[2] is None or attempt >= max_retries:
+                raise InjectedError(f"LLM call failed after {attempt} attempts. Last error: {fault[1]}")
+            await asyncio.sleep(fault[2])
+            attempt += 1
+
+        response, latency = self._answer(messages, prompt, max_tokens)
+        span = self._span(prompt, response, max_tokens, on_chunk, attempt)
+        if on_chunk is None:
+            if latency:
+                await asyncio.sleep(latency)
+            span.end()
+            return response
+        chunks = self._chunks(response)
+        for chunk in chunks:
+            if latency:
+                await asyncio.sleep(latency / len(chunks))
+            on_chunk(chunk)
+        span.end()
+        return response
+
+
+# Wraps the real LLMFallbackManager (LLM_RECORD_FILE) and appends every answered
+# request to a JSON lines file that FakeLLM can replay offline.
+class RecordingLLM:
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __getattr__(self, name):
+        # calls, tokens_used, errors, model_id, use_limiter, ... come from the real manager
+        return getattr(self.inner, name)
+
+    def _record(self, messages, max_tokens, response, latency):
+        line = json.dumps({
+            "key": replay_key(messages, max_tokens),
+            "max_tokens": max_tokens,
+            "latency": round(latency, 3),
+            "response": response,
+        }, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def make_request(self, messages: List[dict], max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        started = time.perf_counter()
+        response = self.inner.make_request(messages, max_tokens=max_tokens, temperature=temperature,
+                                           max_retries=max_retries, on_chunk=on_chunk)
+        self._record(messages, max_tokens, response, time.perf_counter() - started)
+        return response
+
+    async def amake_request(self, messages: List[dict], max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        started = time.perf_counter()
+        response = await self.inner.amake_request(messages, max_tokens=max_tokens, temperature=temperature,
+                                                  max_retries=max_retries, on_chunk=on_chunk)
+        self._record(messages, max_tokens, response, time.perf_counter() - started)
+        return response
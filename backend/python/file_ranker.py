@@ -0,0 +1,199 @@
+"""
+Deterministic local ranking of repository files for README generation.
+
+Every indexed file gets a score from cheap signals:
+    - well-known manifests / entry points / configs (package.json, main.py, server.ts, ...)
+    - path depth (shallow files describe a project better than deep ones)
+    - language (source code > config > docs > data)
+    - size (near-empty and huge files say little)
+    - import-graph centrality (files many others import), from the code index in import_graph.py
+    - penalties for tests, fixtures, examples, styles, generated code
+Selection then walks the ranking with a per-directory decay so one big package
+in a monorepo can't take every slot.
+
+Used by agent_select_files: SELECTION_MODE=local picks straight from the
+ranking (no LLM call), hybrid shows the LLM only the top-ranked candidates.
+"""
+import heapq
+import math
+import posixpath
+from collections import namedtuple, defaultdict
+
+from import_graph import SOURCE_SUFFIXES, to_posix
+
+# Bump when scoring changes, so incremental runs don't reuse an old selection
+RANKER_VERSION = "1"
+
+RankedFile = namedtuple("RankedFile", ["path", "score", "reasons"])
+
+MANIFESTS = frozenset({
+    'package.json', 'pyproject.toml', 'requirements.txt', 'setup.py', 'setup.cfg', 'pipfile',
+    'cargo.toml', 'go.mod', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'gemfile',
+    'composer.json', 'dockerfile', 'docker-compose.yml', 'docker-compose.yaml', 'makefile',
+    'pubspec.yaml', 'mix.exs', 'deno.json',
+})
+ENTRY_POINTS = frozenset({
+    'main', 'index', 'app', 'server', 'cli', 'manage', '__main__', 'wsgi', 'asgi',
+    'lib', 'mod', 'program', 'application', 'routes', 'router', 'api', 'page', 'layout',
+})
+CONFIGS = frozenset({
+    '.env.example', 'tsconfig.json', 'next.config.js', 'next.config.ts', 'next.config.mjs',
+    'vite.config.ts', 'vite.config.js', 'webpack.config.js', 'nodemon.json', 'vercel.json',
+    'netlify.toml', 'procfile', 'render.yaml', 'app.json', 'angular.json', 'nuxt.config.ts',
+})
+CODE_SUFFIXES = SOURCE_SUFFIXES | frozenset({
+    '.go', '.rs', '.rb', '.php', '.c', '.h', '.cpp', '.hpp', '.cs', '.swift', '.scala', '.ex', '.dart',
+})
+CONFIG_SUFFIXES = frozenset({'.toml', '.yml', '.yaml', '.ini', '.cfg', '.json', '.sh', '.sql', '.prisma', '.graphql'})
+DOC_SUFFIXES = frozenset({'.md', '.rst', '.txt'})
+STYLE_SUFFIXES = frozenset({'.css', '.scss', '.sass', '.less', '.styl'})
+
+TEST_DIRS = frozenset({'test', 'tests', '__tests__', 'spec', 'specs', 'e2e', 'cypress', 'testing'})
+LOW_VALUE_DIRS = frozenset({'fixtures', 'examples', 'example', 'samples', 'sample', 'docs', 'doc',
+                            'migrations', 'mocks', '__mocks__', 'stories', 'scripts', 'assets', 'public', 'static'})
+SOURCE_DIRS = frozenset({'src', 'app', 'lib', 'server', 'api', 'backend', 'cmd', 'pkg', 'core'})
+
+# How many source files the code index reads (the highest statically scored ones),
+# and how much of each (imports sit at the top, most top-level definitions soon after)
+INDEX_SCAN_LIMIT = 1500
+INDEX_READ_CHARS = 12000
+
+
+def _is_test(parts, name):
+    if any(part.lower() in TEST_DIRS for part in parts[:-1]):
+        return True
+    stem = name.lower()
+    return (stem.startswith('test_') or '.test.' in stem or '.spec.' in stem
+            or stem.endswith(('_test.go', '_test.py', 'test.java', 'tests.py')))
+
+
+def static_score(path, size):
+    # Score from the path and size alone; returns (score, reasons)
+    parts = path.split('/')
+    name = parts[-1]
+    lower = name.lower()
+    stem, suffix = posixpath.splitext(lower)
+    depth = len(parts) - 1
+    score, reasons = 0.0, []
+
+    if lower in MANIFESTS:
+        score += 8.0 if depth == 0 else 4.0
+        reasons.append("manifest")
+    elif lower in CONFIGS:
+        score += 2.5
+        reasons.append("config")
+    elif stem in ENTRY_POINTS and suffix in CODE_SUFFIXES:
+        score += 3.5 if depth <= 2 else 2.0
+        reasons.append("entry point")
+    elif stem == 'readme' and suffix in DOC_SUFFIXES | {''}:
+        score += 2.0
+        reasons.append("readme")
+
+    if suffix in CODE_SUFFIXES:
+        score += 2.0
+    elif suffix in CONFIG_SUFFIXES:
+        score += 0.5
+    elif suffix in DOC_SUFFIXES:
+        score += 0.25
+    elif suffix in STYLE_SUFFIXES:
+        score -= 2.0
+        reasons.append("style")
+    if lower.endswith('.d.ts') or '.generated.' in lower or lower.endswith('_pb2.py'):
+        score -= 3.0
+        reasons.append("generated")
+
+    # Shallow files describe the project better; source dirs don't count as depth
+    effective_depth = sum(1 for part in parts[:-1] if part.lower() not in SOURCE_DIRS)
+    score -= 0.6 * effective_depth
+
+    if _is_test(parts, name):
+        score -= 4.0
+        reasons.append("test")
+    elif any(part.lower() in LOW_VALUE_DIRS for part in parts[:-1]):
+        score -= 2.0
+        reasons.append("low-value dir")
+
+    # Sweet spot of a few hundred bytes to ~60 KB
+    if size < 80:
+        score -= 1.5
+    elif size > 60_000:
+        score -= min(3.0, math.log2(size / 60_000) + 1.0)
+    else:
+        score += min(1.0, math.log10(max(size, 1)) / 4)
+
+    return score, reasons
+
+
+def is_landmark(path):
+    # Files almost every selection keeps: manifests (Dockerfile, Makefile...) and shallow entry points
+    parts = to_posix(path).split('/')
+    lower = parts[-1].lower()
+    stem, suffix = posixpath.splitext(lower)
+    if lower in MANIFESTS:
+        return True
+    return stem in ENTRY_POINTS and suffix in CODE_SUFFIXES and len(parts) <= 3 and not _is_test(parts, parts[-1])
+
+
+def index_sources(entries, limit=INDEX_SCAN_LIMIT):
+    # The source files worth indexing: the best statically scored ones, in the index's own path form
+    scored = [(static_score(to_posix(e.path), e.size)[0], e.path) for e in entries
+              if posixpath.splitext(e.path)[1].lower() in SOURCE_SUFFIXES]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [path for _, path in scored[:limit]]
+
+
+def rank_files(entries, index=None):
+    """
+    entries: FileEntry-like records with .path and .size (as from tools.get_file_index()).
+    index: a CodeIndex (import_graph.py); enables the centrality signal when given.
+    Returns RankedFile records, best first, with paths in the index's own form.
+    """
+    centrality = index.in_degree() if index is not None else {}
+    ranked = []
+    for entry in entries:
+        path = to_posix(entry.path)
+        score, reasons = static_score(path, entry.size)
+        imported_by = centrality.get(path, 0)
+        if imported_by:
+            score += min(5.0, 1.5 * math.log2(1 + imported_by))
+            reasons = reasons + [f"imported by {imported_by}"]
+        ranked.append(RankedFile(entry.path, round(score, 3), reasons))
+
+    ranked.sort(key=lambda r: (-r.score, r.path))
+    return ranked
+
+
+def pick_diverse(ranked, k, decay=0.75):
+    """
+    Take k files from a ranking, discounting each further pick from the same
+    directory, and each further file with the same name (the util.ts of every
+    package in a monorepo), so selections span the repo. Manifests are exempt
+    from the name discount: each package.json describes a different package.
+    """
+    # The discount is capped at 7 points, so files far down the ranking can't win anyway.
+    # Discounts only grow as files are picked, so a lazy max-heap is exact: an entry whose
+    # recomputed value still beats the next best is the true best.
+    def value(item, directory, name):
+        # Scores can be negative, so the discount is a subtraction that grows per pick
+        return (item.score
+                - (1 - decay ** taken_per_dir[directory]) * 4.0
+                - (1 - decay ** taken_per_name[name]) * 3.0)
+
+    taken_per_dir = defaultdict(int)
+    taken_per_name = defaultdict(int)
+    heap = [(-item.score, i, item, *posixpath.split(to_posix(item.path)))
+            for i, item in enumerate(ranked[:max(k * 25, 200)])]
+    heapq.heapify(heap)
+    picked = []
+    while heap and len(picked) < k:
+        _, order, item, directory, name = heapq.heappop(heap)
+        current = value(item, directory, name)
+        # Ties go to the higher-ranked file, as in rank order
+        if heap and (-current, order) > heap[0][:2]:
+            heapq.heappush(heap, (-current, order, item, directory, name))
+            continue
+        taken_per_dir[directory] += 1
+        if name.lower() not in MANIFESTS:
+            taken_per_name[name] += 1
+        picked.append(item)
+    return picked
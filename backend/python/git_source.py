@@ -0,0 +1,111 @@
+"""
+Read a repository straight from git objects, without a working-tree checkout.
+
+The backend keeps a bare (blobless, depth-1) mirror per repo URL. Instead of
+checking files out, tools.set_repo_path(mirror, rev=...) lists the tree with
+`git ls-tree` and streams file contents through one long-lived
+`git cat-file --batch` process. Blobs left out of a partial clone are fetched
+lazily by git on first read.
+"""
+import os
+import subprocess
+import threading
+
+
+def is_bare_repo(path):
+    return (
+        os.path.isfile(os.path.join(path, "HEAD"))
+        and os.path.isdir(os.path.join(path, "objects"))
+        and not os.path.exists(os.path.join(path, ".git"))
+    )
+
+
+class GitObjectSource:
+    def __init__(self, git_dir, rev="HEAD"):
+        self.git_dir = git_dir
+        self.commit = self._git("rev-parse", "--verify", f"{rev}^{{commit}}").strip()
+        self._blobs = None  # path -> (blob sha, size)
+        self._batch = None
+        self._lock = threading.Lock()  # one request/response at a time on the batch pipe
+
+    def _git(self, *args):
+        return subprocess.run(
+            ["git", "--git-dir", self.git_dir, *args],
+            check=True, capture_output=True, text=True,
+        ).stdout
+
+    def list_files(self):
+        # [(path, size, blob sha)] for every blob in the commit's tree. size is None
+        # for blobs a partial clone left out (the mirror filters out oversized ones);
+        # asking `ls-tree -l` for their size would lazily fetch each of them.
+        if self._blobs is None:
+            out = subprocess.run(
+                ["git", "--git-dir", self.git_dir, "ls-tree", "-r", "-z", self.commit],
+                check=True, capture_output=True,
+            ).stdout.decode("utf-8", errors="replace")
+            shas = {}
+            for record in out.split("\0"):
+                if not record:
+                    continue
+                meta, path = record.split("\t", 1)
+                mode, kind, sha = meta.split()
+                # Submodules ("commit") and symlinks (mode 120000) aren't readable content
+                if kind == "blob" and mode != "120000":
+                    shas[path] = sha
+
+            missing = {
+                line[1:] for line in self._git("rev-list", "--objects", "--missing=print", self.commit).splitlines()
+                if line.startswith("?")
+            }
+            present = [sha for sha in set(shas.values()) if sha not in missing]
+            sizes = {}
+            if present:
+                checked = subprocess.run(
+                    ["git", "--git-dir", self.git_dir, "cat-file", "--batch-check=%(objectname) %(objectsize)"],
+                    input="\n".join(present) + "\n", check=True, capture_output=True, text=True,
+                ).stdout
+                for line in checked.splitlines():
+                    sha, size = line.split()
+                    sizes[sha] = int(size)
+            self._blobs = {path: (sha, sizes.get(sha)) for path, sha in shas.items()}
+        return [(path, size, sha) for path, (sha, size) in self._blobs.items()]
+
+    def blob_id(self, path):
+        self.list_files()
+        return self._blobs[path.replace(os.sep, "/")][0]
+
+    def read(self, path, max_bytes=None):
+        """Return (bytes prefix of at most max_bytes, full size). Raises KeyError for unknown paths."""
+        self.list_files()
+        sha, _ = self._blobs[path.replace(os.sep, "/")]
+        with self._lock:
+            if self._batch is None or self._batch.poll() is not None:
+                self._batch = subprocess.Popen(
+                    ["git", "--git-dir", self.git_dir, "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                )
+            self._batch.stdin.write(f"{sha}\n".encode())
+            self._batch.stdin.flush()
+
+            header = self._batch.stdout.readline().decode().split()
+            if len(header) < 3 or header[1] == "missing":
+                raise OSError(f"git object {sha} for {path} is missing")
+            size = int(header[2])
+
+            # The whole object has to be drained from the pipe, but only the prefix is kept
+            keep = size if max_bytes is None else min(size, max_bytes)
+            data = self._batch.stdout.read(keep)
+            remaining = size - keep + 1  # +1 for the trailing newline
+            while remaining > 0:
+                chunk = self._batch.stdout.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        return data, size
+
+    def close(self):
+        with self._lock:
+            if self._batch is not None:
+                self._batch.stdin.close()
+                self._batch.wait()
+                self._batch = None
@@ -0,0 +1,419 @@
+"""
+Lightweight static code index: imports, symbols and routes per file.
+
+Import statements are pulled out of a bounded prefix of each source file with
+per-language regexes and resolved to files in the repo index:
+    - JS/TS: relative specifiers, "@/" / "~/" aliases, require() / import()
+    - Python: relative imports and dotted module names
+    - Go: import paths under a go.mod module (edges to that package's files)
+    - Rust: `mod x;` and `use crate::...`
+    - Java/Kotlin: fully qualified imports
+Unresolved imports are kept as external package names (stdlib filtered out).
+Top-level definitions and HTTP routes are collected as per-file symbols.
+
+Nothing is parsed or executed. The index steers file ranking and gives the
+summarize prompts compact structural facts (what a file defines, what it
+imports, who imports it) in place of raw text. It is cached per commit.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+from collections import defaultdict
+
+# Bump when extraction changes so cached indexes are rebuilt
+INDEX_VERSION = "1"
+
+JS_SUFFIXES = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.vue', '.svelte')
+PY_SUFFIXES = ('.py',)
+JVM_SUFFIXES = ('.java', '.kt')
+GO_SUFFIXES = ('.go',)
+RUST_SUFFIXES = ('.rs',)
+SOURCE_SUFFIXES = frozenset(JS_SUFFIXES + PY_SUFFIXES + JVM_SUFFIXES + GO_SUFFIXES + RUST_SUFFIXES)
+
+MAX_SYMBOLS_PER_FILE = 30
+
+_JS_IMPORT = re.compile(
+    r"""(?:^|[^\w$.])(?:import|export)\s+(?:[^'";]*?\sfrom\s*)?['"]([^'"]+)['"]"""
+    r"""|(?:require|import)\s*\(\s*['"]([^'"]+)['"]\s*\)""",
+    re.MULTILINE,
+)
+_PY_FROM = re.compile(r"^\s*from\s+(\.*[\w.]*)\s+import\s+(.+)$", re.MULTILINE)
+_PY_IMPORT = re.compile(r"^\s*import\s+([\w.]+(?:\s*,\s*[\w.]+)*)", re.MULTILINE)
+_JVM_IMPORT = re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)", re.MULTILINE)
+_GO_IMPORT_BLOCK = re.compile(r"^import\s*\((.*?)\)", re.MULTILINE | re.DOTALL)
+_GO_IMPORT_LINE = re.compile(r'^import\s+(?:\w+\s+)?"([^"]+)"', re.MULTILINE)
+_GO_QUOTED = re.compile(r'"([^"]+)"')
+_GO_MODULE = re.compile(r"^module\s+(\S+)", re.MULTILINE)
+_RUST_MOD = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)\s*;", re.MULTILINE)
+_RUST_USE = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?use\s+([\w:]+)", re.MULTILINE)
+
+_SYMBOLS = {
+    'py': re.compile(r"^(?:async\s+)?def\s+(\w+)|^class\s+(\w+)", re.MULTILINE),
+    'js': re.compile(
+        r"^\s*export\s+(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?"
+        r"(?:function\*?|class|const|let|var|interface|type|enum)\s+([\w$]+)"
+        r"|^\s*(?:module\.)?exports\.([\w$]+)\s*=",
+        re.MULTILINE,
+    ),
+    'go': re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Z]\w*)|^type\s+([A-Z]\w*)", re.MULTILINE),
+    'rs': re.compile(r"^\s*pub\s+(?:async\s+)?(?:fn|struct|enum|trait|type)\s+(\w+)", re.MULTILINE),
+    'jvm': re.compile(
+        r"^\s*(?:public\s+|internal\s+)?(?:abstract\s+|final\s+|data\s+|sealed\s+|open\s+)*"
+        r"(?:class|interface|enum|object|record)\s+(\w+)",
+        re.MULTILINE,
+    ),
+}
+_ROUTES = re.compile(
+    r"""\b(?:app|router|server|api|bp|blueprint)\.(get|post|put|patch|delete|route)\(\s*['"]([^'"]+)['"]"""
+    r"""|@\w+\.(get|post|put|patch|delete|route)\(\s*['"]([^'"]+)['"]""",
+    re.IGNORECASE,
+)
+
+_STDLIB = frozenset(getattr(sys, "stdlib_module_names", ())) | {"__future__"}
+_RUST_BUILTIN_CRATES = frozenset({'crate', 'self', 'super', 'std', 'core', 'alloc'})
+_JS_EXTERNAL_SKIP = frozenset({'fs', 'path', 'os', 'http', 'https', 'url', 'util', 'crypto', 'child_process',
+                               'events', 'stream', 'readline', 'zlib', 'net', 'assert', 'buffer', 'process'})
+
+# Tried in order when a JS/TS specifier has no extension
+_JS_RESOLVE = ('', '.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '.vue', '.svelte',
+               '/index.ts', '/index.tsx', '/index.js', '/index.jsx')
+
+
+def _suffix(path):
+    return posixpath.splitext(path)[1].lower()
+
+
+def to_posix(path):
+    return path.replace(os.sep, '/')
+
+
+class _Resolver:
+    def __init__(self, paths, read_text):
+        self.paths = set(paths)
+        # Dotted module name -> file, for every suffix of the path ("backend.python.tools", "python.tools", "tools")
+        self.modules = {}
+        self.dir_files = defaultdict(list)
+        for path in sorted(paths, key=lambda p: (p.count('/'), p)):
+            suffix = _suffix(path)
+            self.dir_files[posixpath.dirname(path)].append(path)
+            if suffix not in PY_SUFFIXES + JVM_SUFFIXES:
+                continue
+            parts = path[:-len(suffix)].split('/')
+            if parts[-1] == '__init__':
+                parts = parts[:-1]
+            for i in range(len(parts)):
+                # Shallowest file wins when two share a module name
+                self.modules.setdefault('.'.join(parts[i:]), path)
+
+        # Go module path -> directory holding its go.mod
+        self.go_modules = {}
+        for path in paths:
+            if posixpath.basename(path) == 'go.mod':
+                match = _GO_MODULE.search(read_text(path) or '')
+                if match:
+                    self.go_modules[match.group(1)] = posixpath.dirname(path)
+
+    def js(self, importer, spec):
+        if spec.startswith('.'):
+            bases = [posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))]
+        elif spec.startswith(('@/', '~/')):
+            # Common bundler aliases for the project root or src/
+            bases = [spec[2:], 'src/' + spec[2:]]
+            # Monorepos: the alias is relative to the importer's package
+            if '/' in importer:
+                top = importer.split('/', 1)[0]
+                bases += [f"{top}/{spec[2:]}", f"{top}/src/{spec[2:]}"]
+        else:
+            return None
+        for base in bases:
+            for ending in _JS_RESOLVE:
+                if base + ending in self.paths:
+                    return base + ending
+        return None
+
+    def python(self, importer, module, names):
+        targets = []
+        if module.startswith('.'):
+            level = len(module) - len(module.lstrip('.'))
+            package = posixpath.dirname(importer).split('/') if posixpath.dirname(importer) else []
+            package = package[:len(package) - (level - 1)] if level > 1 else package
+            rest = module.lstrip('.')
+            base = '/'.join(package + rest.split('.')) if rest else '/'.join(package)
+            # "from . import x" / "from .pkg import x" may name submodules
+            for name in names or ['']:
+                stem = f"{base}/{name}" if name else base
+                for path in (f"{stem}.py", f"{stem}/__init__.py"):
+                    if path in self.paths:
+                        targets.append(path)
+                        break
+            if not targets:
+                for path in (f"{base}.py", f"{base}/__init__.py"):
+                    if path in self.paths:
+                        targets.append(path)
+            return targets
+        for name in names or ['']:
+            found = self.modules.get(f"{module}.{name}" if name else module) or self.modules.get(module)
+            if found:
+                targets.append(found)
+        return targets
+
+    def go(self, spec):
+        for module, directory in self.go_modules.items():
+            if spec == module or spec.startswith(module + '/'):
+                sub = spec[len(module):].strip('/')
+                package_dir = posixpath.join(directory, sub) if directory else sub
+                return [p for p in self.dir_files.get(package_dir, [])
+                        if p.endswith('.go') and not p.endswith('_test.go')]
+        return None
+
+    def rust_mod(self, importer, name):
+        directory = posixpath.dirname(importer)
+        stem = posixpath.splitext(posixpath.basename(importer))[0]
+        if stem not in ('lib', 'main', 'mod'):
+            directory = posixpath.join(directory, stem)
+        for path in (posixpath.join(directory, f"{name}.rs"), posixpath.join(directory, name, "mod.rs")):
+            if path in self.paths:
+                return path
+        return None
+
+    def rust_use(self, importer, spec):
+        parts = spec.split('::')
+        if parts[0] != 'crate':
+            return None
+        # The crate root is the nearest enclosing src/ directory
+        segments = importer.split('/')
+        root = '/'.join(segments[:segments.index('src') + 1]) if 'src' in segments[:-1] else posixpath.dirname(importer)
+        for end in range(len(parts), 1, -1):
+            stem = posixpath.join(root, *parts[1:end])
+            for path in (f"{stem}.rs", f"{stem}/mod.rs"):
+                if path in self.paths:
+                    return path
+        return None
+
+    def jvm(self, dotted):
+        # "com.acme.util.Strings" -> the file declaring it
+        return self.modules.get(dotted)
+
+
+def _js_package(spec):
+    if spec.startswith('node:'):
+        return None
+    parts = spec.split('/')
+    name = '/'.join(parts[:2]) if spec.startswith('@') else parts[0]
+    return None if name in _JS_EXTERNAL_SKIP else name
+
+
+def extract(path, text, resolver):
+    """Returns (repo files imported, external package names, symbols) for one file."""
+    suffix = _suffix(path)
+    targets, external, symbols = set(), set(), []
+
+    if suffix in JS_SUFFIXES:
+        kind = 'js'
+        for match in _JS_IMPORT.finditer(text):
+            spec = match.group(1) or match.group(2)
+            resolved = resolver.js(path, spec)
+            if resolved:
+                targets.add(resolved)
+            elif not spec.startswith(('.', '@/', '~/')):
+                package = _js_package(spec)
+                if package:
+                    external.add(package)
+    elif suffix in PY_SUFFIXES:
+        kind = 'py'
+        for match in _PY_FROM.finditer(text):
+            names = [n.strip().split(' ')[0] for n in match.group(2).strip('()').split(',') if n.strip()]
+            resolved = resolver.python(path, match.group(1), [n for n in names if n.isidentifier()])
+            targets.update(resolved)
+            top = match.group(1).split('.')[0]
+            if not resolved and top and top not in _STDLIB:
+                external.add(top)
+        for match in _PY_IMPORT.finditer(text):
+            for module in match.group(1).split(','):
+                module = module.strip()
+                resolved = resolver.python(path, module, [])
+                targets.update(resolved)
+                top = module.split('.')[0]
+                if not resolved and top not in _STDLIB:
+                    external.add(top)
+    elif suffix in GO_SUFFIXES:
+        kind = 'go'
+        specs = _GO_IMPORT_LINE.findall(text)
+        for block in _GO_IMPORT_BLOCK.findall(text):
+            specs += _GO_QUOTED.findall(block)
+        for spec in specs:
+            resolved = resolver.go(spec)
+            if resolved is not None:
+                targets.update(resolved)
+            elif '.' in spec.split('/')[0]:
+                # Standard library paths have no dot in their first segment
+                external.add(spec)
+    elif suffix in RUST_SUFFIXES:
+        kind = 'rs'
+        for name in _RUST_MOD.findall(text):
+            resolved = resolver.rust_mod(path, name)
+            if resolved:
+                targets.add(resolved)
+        for spec in _RUST_USE.findall(text):
+            resolved = resolver.rust_use(path, spec)
+            if resolved:
+                targets.add(resolved)
+            elif spec.split('::')[0] not in _RUST_BUILTIN_CRATES:
+                external.add(spec.split('::')[0])
+    elif suffix in JVM_SUFFIXES:
+        kind = 'jvm'
+        for dotted in _JVM_IMPORT.findall(text):
+            resolved = resolver.jvm(dotted)
+            if resolved:
+                targets.add(resolved)
+            elif not dotted.startswith(('java.', 'javax.', 'kotlin.')):
+                external.add('.'.join(dotted.split('.')[:2]))
+    else:
+        return targets, external, symbols
+
+    seen = set()
+    for match in _SYMBOLS[kind].finditer(text):
+        name = next((group for group in match.groups() if group), None)
+        if name and name not in seen and not name.startswith('_'):
+            seen.add(name)
+            symbols.append(name)
+    for match in _ROUTES.finditer(text):
+        method = (match.group(1) or match.group(3)).upper()
+        route = f"{'ANY' if method == 'ROUTE' else method} {match.group(2) or match.group(4)}"
+        if route not in seen:
+            seen.add(route)
+            symbols.append(route)
+
+    targets.discard(path)
+    return targets, external, symbols[:MAX_SYMBOLS_PER_FILE]
+
+
+class CodeIndex:
+    def __init__(self, imports, external, symbols):
+        self.imports = imports      # path -> [repo paths it imports]
+        self.external = external    # path -> [third-party packages it imports]
+        self.symbols = symbols      # path -> [top-level definitions / routes]
+        self.imported_by = defaultdict(list)
+        for importer, targets in imports.items():
+            for target in targets:
+                self.imported_by[target].append(importer)
+
+    def in_degree(self):
+        # How many files import each file
+        return {path: len(importers) for path, importers in self.imported_by.items()}
+
+    def facts(self, path, limit=8):
+        """Compact structural facts about one file, as prompt lines (empty when nothing is known)."""
+        path = to_posix(path)
+
+        def listing(items):
+            items = sorted(items)
+            more = f" (+{len(items) - limit} more)" if len(items) > limit else ""
+            return ", ".join(items[:limit]) + more
+
+        lines = []
+        symbols = self.symbols.get(path, [])
+        definitions = [s for s in symbols if ' ' not in s]
+        routes = [s for s in symbols if ' ' in s]
+        if definitions:
+            lines.append(f"Defines: {listing(definitions)}")
+        if routes:
+            lines.append(f"Routes: {listing(routes)}")
+        if self.imports.get(path):
+            lines.append(f"Imports (repo): {listing(self.imports[path])}")
+        if self.imported_by.get(path):
+            lines.append(f"Imported by: {listing(self.imported_by[path])}")
+        if self.external.get(path):
+            lines.append(f"External packages: {listing(self.external[path])}")
+        return lines
+
+    def to_dict(self):
+        return {"version": INDEX_VERSION, "imports": self.imports, "external": self.external, "symbols": self.symbols}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["imports"], data["external"], data["symbols"])
+
+
+def build_index(paths, read_text, sources=None):
+    """
+    paths: every file in the repo index ('/' separators).
+    read_text(path) -> text prefix of a file.
+    sources: the subset whose contents are read (defaults to all source files).
+    """
+    resolver = _Resolver(paths, read_text)
+    if sources is None:
+        sources = [p for p in paths if _suffix(p) in SOURCE_SUFFIXES]
+    imports, external, symbols = {}, {}, {}
+    for path in sources:
+        text = read_text(path)
+        if not text:
+            continue
+        targets, packages, names = extract(path, text, resolver)
+        if targets:
+            imports[path] = sorted(targets)
+        if packages:
+            external[path] = sorted(packages)
+        if names:
+            symbols[path] = names
+    return CodeIndex(imports, external, symbols)
+
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "code_index")
+
+
+def index_cache_key(commit, paths_and_sizes):
+    # The commit alone would miss uncommitted edits in a local checkout, so the listing is mixed in
+    digest = hashlib.sha1()
+    for path, size in sorted(paths_and_sizes):
+        digest.update(f"{path}\t{size}\n".encode())
+    return f"{commit}-{digest.hexdigest()[:16]}-v{INDEX_VERSION}"
+
+
+def load_or_build(cache_key, paths, read_text, sources=None):
+    """build_index() behind a small on-disk cache (CODE_INDEX_DIR, newest CODE_INDEX_CACHE_ENTRIES kept)."""
+    directory = os.getenv("CODE_INDEX_DIR", DEFAULT_INDEX_DIR)
+    path = os.path.join(directory, f"{cache_key}.json") if cache_key else None
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                os.utime(path)  # keep recently used indexes
+                return CodeIndex.from_dict(data), True
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = build_index(paths, read_text, sources)
+    if path:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp, path)
+            _prune(directory, int(os.getenv("CODE_INDEX_CACHE_ENTRIES", "200")))
+        except OSError:
+            pass
+    return index, False
+
+
+def _prune(directory, keep):
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            full = os.path.join(directory, name)
+            try:
+                entries.append((os.path.getmtime(full), full))
+            except OSError:
+                continue
+    entries.sort(reverse=True)
+    for _, full in entries[keep:]:
+        try:
+            os.remove(full)
+        except OSError:
+            pass
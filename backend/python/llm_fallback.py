@@ -1,20 +1,23 @@
 import os
-import time
 import random
+import time
+import asyncio
+import threading
 import json
 import re
 from typing import List
-from groq import Groq
 from dotenv import load_dotenv
-import google.generativeai as genai
+from rate_limiter import RateLimiter, AsyncScheduler
+from provider_health import ProviderHealth
+from token_packer import count_tokens
+import tracing
 
 load_dotenv()
 
 # === Gemini configuration ===
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 DEFAULT_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash") if GEMINI_API_KEY else None
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_TARGET = ("gemini", DEFAULT_GEMINI_MODEL)
 
 API_KEYS = [
     os.getenv("GROQ_API_KEY"),
@@ -26,6 +29,17 @@ API_KEYS = [
 
 API_KEYS = [key for key in API_KEYS if key]
 
+# Max concurrent requests per (API key, model); shared by every caller in the process
+MAX_INFLIGHT_PER_KEY = int(os.getenv("LLM_MAX_INFLIGHT_PER_KEY", "4"))
+
+# Hedging: a request that hasn't answered within this percentile of its target's recent
+# latency gets a duplicate on another provider/key; the first answer wins
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))  # seconds
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "10"))  # latencies needed before hedging a target
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))  # extra prompt tokens, as a share of tokens used
+
 FALLBACK_MODELS = [
     "deepseek-r1-distill-llama-70b",
     "llama-3.3-70b-versatile",
@@ -39,6 +53,9 @@ class LLMFallbackManager:
         self.gemini_model = None
         if GEMINI_API_KEY and DEFAULT_GEMINI_MODEL:
             try:
+                # Imported only when configured: the SDK alone takes about a second to load
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
                 self.gemini_model = genai.GenerativeModel(DEFAULT_GEMINI_MODEL)
                 print(f"🚀 Using Gemini model '{DEFAULT_GEMINI_MODEL}' as primary LLM")
             except Exception as e:
@@ -52,36 +69,65 @@ class LLMFallbackManager:
                 print("⚠️  No GROQ API keys found; operating in Gemini-only mode.")
         self.api_keys = API_KEYS
         self.models = FALLBACK_MODELS
-        self.key_index = 0
         self.model_index = 0
-        self.cooldowns = {}  # Key: timestamp when key becomes available
+        # Circuit breaker and latency per (provider, model); decides where each attempt goes
+        self.health = ProviderHealth(on_transition=lambda target, state: tracing.metrics.inc(
+            "llm_circuit_transitions_total", provider=target[0], model=target[1], state=state))
+        # Per-(key, model) request/token buckets fed by the provider's rate-limit headers
+        self.limiter = RateLimiter(len(self.api_keys))
+        self.scheduler = AsyncScheduler(self.limiter)
+        # Per-process totals (successful calls, tokens used, failed attempts), e.g. for batch reports
+        self.calls = 0
+        self.tokens_used = 0
+        self.errors = 0
+        self.hedge_tokens = 0  # prompt tokens sent again by hedges (capped by HEDGE_BUDGET)
+        # Identifies the primary model, e.g. for keying cached summaries
+        self.model_id = DEFAULT_GEMINI_MODEL if self.gemini_model is not None else self.models[0]
 
-    def _current_time(self):
-        return time.time()
-
-    def _key_available(self, index):
-        key = self.api_keys[index]
-        return self.cooldowns.get(key, 0) <= self._current_time()
-
-    def _rotate_key(self):
-        original = self.key_index
-        while True:
-            self.key_index = (self.key_index + 1) % len(self.api_keys)
-            if self._key_available(self.key_index) or self.key_index == original:
-                break
-        print(f"🔁 Switched to API key #{self.key_index + 1}")
+        # All requests run on one private event loop: pooled HTTP clients and the
+        # semaphores below live there, and model state is only touched from that
+        # thread, so no locking is needed.
+        self._clients = {}     # key index -> AsyncGroq (one connection pool per key)
+        self._semaphores = {}  # (key index, model) -> asyncio.Semaphore
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True)
+        self._loop_thread.start()
 
     def _rotate_model(self):
         self.model_index = (self.model_index + 1) % len(self.models)
         print(f"🔁 Switched to model: {self.models[self.model_index]}")
 
-    def _mark_key_on_cooldown(self, seconds=60):
-        key = self.api_keys[self.key_index]
-        self.cooldowns[key] = self._current_time() + seconds
-        print(f"⏳ Key #{self.key_index + 1} on cooldown for {seconds}s")
+    def _mark_key_on_cooldown(self, index, model, error, seconds=60):
+        # Prefer the provider's own retry-after / reset headers over our fixed guess
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if headers and (headers.get("retry-after") or headers.get("x-ratelimit-reset-requests")):
+            self.limiter.update_from_headers(index, model, dict(headers))
+            print(f"⏳ Key #{index + 1} throttled for {model} per provider headers")
+        else:
+            self.limiter.block(index, model, seconds)
+            print(f"⏳ Key #{index + 1} on cooldown for {seconds}s")
 
-    def get_client(self):
-        return Groq(api_key=self.api_keys[self.key_index])
+    def use_limiter(self, limiter):
+        # Swap in a limiter shared with other processes (see rate_limiter.start_shared_limiter)
+        self.limiter = limiter
+        self.scheduler = AsyncScheduler(limiter)
+
+    def limiter_state(self):
+        # Current per-(key, model) headroom, for metrics
+        return self.limiter.snapshot()
+
+    def get_client(self, index):
+        # Reuse one client (and its HTTP connection pool) per API key.
+        # Retries are ours, so the SDK's own retry loop is disabled.
+        if index not in self._clients:
+            from groq import AsyncGroq
+            self._clients[index] = AsyncGroq(api_key=self.api_keys[index], max_retries=0)
+        return self._clients[index]
+
+    def _semaphore(self, index, model):
+        if (index, model) not in self._semaphores:
+            self._semaphores[(index, model)] = asyncio.Semaphore(MAX_INFLIGHT_PER_KEY)
+        return self._semaphores[(index, model)]
 
     def get_model(self):
         return self.models[self.model_index]
@@ -95,74 +141,412 @@ class LLMFallbackManager:
             prompt_lines.append(f"{role.capitalize()}: {content}")
         return "\n".join(prompt_lines)
 
-    def make_request(self, messages, max_tokens=2048, temperature=0.2, max_retries=15):
-        # 1️⃣ Try Gemini
-        if self.gemini_model is not None:
+    def make_request(self, messages, max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        """
+        Sync wrapper: blocks the calling thread only, never the shared loop.
+
+        With on_chunk, the completion is streamed: on_chunk(text) is called (on the
+        LLM loop thread) for every piece as it arrives, and on_chunk(None) when a
+        provider fails mid-stream and the pieces sent so far must be discarded
+        because the fallback starts over. The full text is still returned.
+        """
+        # The caller's span is captured here: the coroutine runs on the loop thread, outside its context
+        future = asyncio.run_coroutine_threadsafe(
+            self._make_request(messages, max_tokens, temperature, max_retries, on_chunk, tracing.current_span()),
+            self._loop,
+        )
+        return future.result()
+
+    async def amake_request(self, messages, max_tokens=2048, temperature=0.2, max_retries=15, on_chunk=None):
+        coro = self._make_request(messages, max_tokens, temperature, max_retries, on_chunk, tracing.current_span())
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        # Called from another event loop: run on ours (where the clients live) and await the result
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    async def _gemini_request(self, messages, max_tokens, temperature, on_chunk):
+        generation_config = {"temperature": temperature, "max_output_tokens": max_tokens}
+        prompt_text = self._messages_to_prompt(messages)
+        if on_chunk is None:
+            response = await self.gemini_model.generate_content_async(prompt_text, generation_config=generation_config)
             try:
-                prompt_text = self._messages_to_prompt(messages)
-                response = self.gemini_model.generate_content(
-                    prompt_text,
-                    generation_config={
-                        "temperature": temperature,
-                        "max_output_tokens": max_tokens,
-                    },
-                )
+                return "".join([part.text for part in response.parts]), _gemini_usage(response)
+            except AttributeError:
+                return getattr(response, "text", str(response)), _gemini_usage(response)
+
+        response = await self.gemini_model.generate_content_async(
+            prompt_text, generation_config=generation_config, stream=True
+        )
+        pieces, usage = [], None
+        try:
+            async for chunk in response:
                 try:
-                    content = "".join([part.text for part in response.parts])
-                except AttributeError:
-                    content = getattr(response, "text", str(response))
-                print("Response received successfully")
-                return content
-            except Exception as gem_err:
-                print(f"❌ Gemini failed ({gem_err}); falling back to Groq...")
-                self.gemini_model = None
+                    text = "".join(part.text for part in chunk.parts)
+                except (AttributeError, ValueError):
+                    text = ""  # e.g. the final chunk carrying only finish metadata
+                if text:
+                    pieces.append(text)
+                    on_chunk(text)
+                usage = _gemini_usage(chunk) or usage
+        except Exception:
+            if pieces:
+                on_chunk(None)
+            raise
+        return "".join(pieces), usage
 
-        # Groq fallback
-        if not self.api_keys:
-            raise Exception("Gemini failed and no GROQ_API_KEYs provided for fallback.")
+    async def _groq_request(self, client, key_index, model, messages, max_tokens, temperature, on_chunk):
+        # Returns (content, (prompt tokens, completion tokens) or None)
+        raw = await client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=on_chunk is not None,
+        )
+        # A plain dict, so the headers can also be sent to a limiter in another process
+        self.limiter.update_from_headers(key_index, model, dict(raw.headers))
+        response = await raw.parse()
+        if on_chunk is None:
+            return response.choices[0].message.content, _groq_usage(response.usage)
 
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                client = self.get_client()
-                model = self.get_model()
-                print(f"⚙️ Attempt {attempt + 1}: Key #{self.key_index + 1}, Model: {model}")
-
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                content = response.choices[0].message.content
-                print(f"✅ Success. Tokens used: {response.usage.total_tokens}")
-                return content
+        pieces, usage, finished = [], None, False
+        try:
+            async for chunk in response:
+                if chunk.choices:
+                    if chunk.choices[0].delta.content:
+                        pieces.append(chunk.choices[0].delta.content)
+                        on_chunk(chunk.choices[0].delta.content)
+                    finished = finished or chunk.choices[0].finish_reason is not None
+                # Groq reports usage on the last chunk
+                chunk_usage = chunk.usage or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if chunk_usage is not None:
+                    usage = _groq_usage(chunk_usage)
+            # A dropped connection just ends the iteration; only a finish_reason means complete
+            if not finished:
+                raise Exception("stream ended before the completion finished")
+        except Exception:
+            if pieces:
+                on_chunk(None)
+            raise
+        return "".join(pieces), usage
 
-            except Exception as e:
-                last_error = e
-                err_str = str(e).lower()
-                print(f"[RETRY] {str(e).splitlines()[0]}")
+    def _candidates(self, exclude=()):
+        # Gemini and the first healthy Groq model in the rotation, in preference order
+        candidates = []
+        if self.gemini_model is not None and GEMINI_TARGET not in exclude:
+            candidates.append(GEMINI_TARGET)
+        if self.api_keys:
+            rotation = [("groq", self.models[(self.model_index + i) % len(self.models)]) for i in range(len(self.models))]
+            candidates.append(next((t for t in rotation if self.health.available(t)), rotation[0]))
+        return candidates
 
-                if "rate limit" in err_str or "too many requests" in err_str:
-                    self._mark_key_on_cooldown(seconds=60)
-                    self._rotate_key()
+    def _route(self, estimated_tokens, exclude=()):
+        """
+        (target, seconds to wait first). Among healthy candidates the lowest recent
+        p50 plus rate-limit wait wins once all have been measured, else preference order.
+        """
+        candidates = self._candidates(exclude)
+        if not candidates:
+            return None, 0.0
 
-                elif "token" in err_str or "context" in err_str:
-                    self._rotate_model()
+        healthy = [t for t in candidates if self.health.available(t)]
+        if not healthy:
+            # Every circuit is open: wait for whichever reopens first
+            target = min(candidates, key=self.health.reopens_in)
+            return target, self.health.reopens_in(target)
+        latencies = [self.health.p50(t) for t in healthy]
+        if len(healthy) == 1 or None in latencies:
+            return healthy[0], 0.0
+        def expected(i):
+            target = healthy[i]
+            wait = self.limiter.wait_estimate(target[1], estimated_tokens) if target[0] == "groq" else 0.0
+            return latencies[i] + wait
+        return healthy[min(range(len(healthy)), key=expected)], 0.0
 
-                elif "quota" in err_str or "billing" in err_str:
-                    self._mark_key_on_cooldown(seconds=600)
-                    self._rotate_key()
+    def health_state(self):
+        # Circuit state and recent p50 per (provider, model), for logs and reports
+        return self.health.snapshot()
 
-                elif "model" in err_str or "not available" in err_str:
-                    self._rotate_model()
+    async def _make_request(self, messages, max_tokens, temperature, max_retries, on_chunk=None, parent=None):
+        call = _Call(messages, max_tokens, temperature, on_chunk, parent,
+                     count_tokens(self._messages_to_prompt(messages)))
+        # Streams aren't hedged: two of them would feed the same client
+        if HEDGE_ENABLED and on_chunk is None:
+            return await self._hedged(call, max_retries)
+        return await self._attempts(call, max_retries)
 
-                else:
-                    self._rotate_key()
+    async def _attempts(self, call, max_retries):
+        last_error = None
+        tried_gemini = False
+        for attempt in range(max_retries):
+            # Gemini gets one attempt per request while Groq can take over
+            exclude = (GEMINI_TARGET,) if tried_gemini and self.api_keys else ()
+            waited_from = time.perf_counter()
+            target, wait = self._route(call.estimated_tokens, exclude)
+            if target is None:
+                break
+            if wait > 0:
+                # Counts as an attempt, so a circuit that never reopens can't stall the call
+                print(f"⏳ All provider circuits open; waiting {wait:.1f}s for {'/'.join(target)}")
+                last_error = last_error or Exception(f"circuit open for {'/'.join(target)}")
+                await asyncio.sleep(wait)
+                continue
+            waited = time.perf_counter() - waited_from
 
+            if target == GEMINI_TARGET:
+                tried_gemini = True
+                content, last_error = await self._gemini_attempt(call, attempt, waited)
+                if last_error is None:
+                    return content
+                if self.api_keys:
+                    print("↪️ Falling back to Groq...")
+                    continue
                 delay = min(2 ** attempt + random.uniform(0, 1), 10)
+            else:
+                content, last_error, delay = await self._groq_attempt(call, target[1], attempt, waited)
+                if last_error is None:
+                    return content
+            if delay and attempt + 1 < max_retries:
                 print(f"⏳ Retrying after {delay:.1f}s...")
-                time.sleep(delay)
+                # Non-blocking: other requests keep running on the loop meanwhile
+                await asyncio.sleep(delay)
 
         print("💥 All retries failed.")
         raise Exception(f"LLM call failed after {max_retries} attempts. Last error: {last_error}")
+
+    def _hedge_delay(self, target):
+        # The configured percentile of the target's recent latency, once there are enough samples
+        if target is None:
+            return None
+        delay = self.health.percentile(target, HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES)
+        return max(delay, HEDGE_MIN_DELAY) if delay is not None else None
+
+    def _hedge_target(self, call):
+        # (target, keys to avoid): another healthy provider first, else the same Groq model on another key
+        for target in self._candidates():
+            if target != call.target and self.health.available(target):
+                if target[0] == "groq" and self.limiter.wait_estimate(target[1], call.estimated_tokens) > 0:
+                    continue  # a hedge that has to queue won't finish first
+                return target, ()
+        if call.target is not None and call.target[0] == "groq" and len(self.api_keys) > 1:
+            return call.target, (call.key_index,)
+        return None, ()
+
+    async def _hedged(self, call, max_retries):
+        """
+        Run the normal attempts; if the one in flight hasn't answered within its
+        target's HEDGE_PERCENTILE latency, send a duplicate to another provider or
+        key. The first answer wins and the other request is cancelled.
+        """
+        primary = asyncio.ensure_future(self._attempts(call, max_retries))
+        sent = asyncio.ensure_future(call.sent.wait())
+        await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+        sent.cancel()
+        delay = self._hedge_delay(call.target)
+        if primary.done() or delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=max(delay - (time.perf_counter() - call.sent_at), 0.0))
+        if done:
+            return primary.result()
+
+        target, avoid_keys = self._hedge_target(call)
+        # Every hedge costs about one more prompt; keep that under HEDGE_BUDGET of what was spent
+        if target is None or self.hedge_tokens + call.prompt_tokens > HEDGE_BUDGET * self.tokens_used:
+            return await primary
+        self.hedge_tokens += call.prompt_tokens
+        print(f"🏇 No answer from {'/'.join(call.target)} after {delay:.1f}s; hedging on {'/'.join(target)}"
+              + (" with another key" if avoid_keys else ""))
+        hedge_call = call.copy()
+        if target == GEMINI_TARGET:
+            hedge = asyncio.ensure_future(self._gemini_attempt(hedge_call, 0, 0.0, hedge=True))
+        else:
+            hedge = asyncio.ensure_future(self._groq_attempt(hedge_call, target[1], 0, 0.0, avoid_keys, hedge=True))
+
+        try:
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if hedge in done and hedge.result()[1] is None:
+                    if not primary.done():
+                        # The primary's latency so far still says something about its target's tail
+                        self.health.observe(call.target, time.perf_counter() - call.sent_at)
+                    tracing.metrics.inc("llm_hedges_total", outcome="won")
+                    print(f"🏁 Hedge on {'/'.join(target)} answered first")
+                    return hedge.result()[0]
+                if primary in done and (primary.exception() is None or not pending):
+                    break
+            # The primary answered first (or failed with nothing left to wait for)
+            hedge_failed = hedge.done() and hedge.result()[1] is not None
+            tracing.metrics.inc("llm_hedges_total", outcome="failed" if hedge_failed else "lost")
+            return primary.result()
+        finally:
+            # The loser (or both, if the caller gave up) is cancelled
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def _gemini_attempt(self, call, attempt, waited, hedge=False):
+        # Returns (content, None) or (None, error)
+        probe = self.health.begin(GEMINI_TARGET)
+        try:
+            return await self._gemini_send(call, attempt, waited, hedge)
+        finally:
+            # A no-op once the outcome was recorded; frees the probe after a cancel or a context error
+            if probe:
+                self.health.release(GEMINI_TARGET)
+
+    async def _gemini_send(self, call, attempt, waited, hedge):
+        call.started(GEMINI_TARGET)
+        span = tracing.Span("llm.gemini", "llm", call.parent, provider="gemini", model=DEFAULT_GEMINI_MODEL,
+                            attempt=attempt + 1, max_tokens=call.max_tokens, streamed=call.on_chunk is not None,
+                            queued_s=round(waited, 3), **({"hedge": True} if hedge else {}))
+        started = time.perf_counter()
+        try:
+            content, usage = await self._gemini_request(call.messages, call.max_tokens, call.temperature, call.on_chunk)
+        except asyncio.CancelledError:
+            span.end("cancelled")
+            raise
+        except Exception as gem_err:
+            self.errors += 1
+            reason = _error_reason(gem_err)
+            if reason in ("rate_limit", "quota"):
+                # Throttled, not broken: keep it out of rotation for a while without counting an error
+                self.health.trip(GEMINI_TARGET, 60, reason.replace("_", " "))
+            elif reason != "context":
+                self.health.record_failure(GEMINI_TARGET)
+            span.set(retry_reason=reason)
+            span.end("error", str(gem_err).splitlines()[0] if str(gem_err) else type(gem_err).__name__)
+            print(f"❌ Gemini failed ({gem_err})")
+            return None, gem_err
+
+        self.health.record_success(GEMINI_TARGET, time.perf_counter() - started)
+        print("Response received successfully")
+        used_prompt, used_completion = usage or (call.prompt_tokens, count_tokens(content))
+        span.set(prompt_tokens=used_prompt, completion_tokens=used_completion)
+        span.end()
+        self.calls += 1
+        self.tokens_used += used_prompt + used_completion
+        return content, None
+
+    async def _groq_attempt(self, call, model, attempt, waited, avoid_keys=(), hedge=False):
+        # Returns (content, None, 0) or (None, error, seconds to back off before the next attempt)
+        target = ("groq", model)
+        probe = self.health.begin(target)
+        try:
+            return await self._groq_send(call, target, attempt, waited, avoid_keys, hedge)
+        finally:
+            # Rate limits, context errors and cancels leave no verdict; let the next request probe
+            if probe:
+                self.health.release(target)
+
+    async def _groq_send(self, call, target, attempt, waited, avoid_keys, hedge):
+        model = target[1]
+        # Picks the key with the most headroom, queueing while none has room
+        queued_from = time.perf_counter()
+        key_index = await self.scheduler.acquire(model, call.estimated_tokens, avoid_keys)
+        call.started(target, key_index)
+        span = tracing.Span("llm.groq", "llm", call.parent, provider="groq", model=model, key=key_index + 1,
+                            attempt=attempt + 1, max_tokens=call.max_tokens, streamed=call.on_chunk is not None,
+                            queued_s=round(waited + time.perf_counter() - queued_from, 3),
+                            **({"hedge": True} if hedge else {}))
+        started = time.perf_counter()
+        try:
+            client = self.get_client(key_index)
+            print(f"⚙️ Attempt {attempt + 1}: Key #{key_index + 1}, Model: {model}" + (" (hedge)" if hedge else ""))
+
+            # A streamed response holds its slot until the last chunk arrives
+            async with self._semaphore(key_index, model):
+                content, usage = await self._groq_request(
+                    client, key_index, model, call.messages, call.max_tokens, call.temperature, call.on_chunk
+                )
+        except asyncio.CancelledError:
+            span.end("cancelled")
+            raise
+        except Exception as e:
+            self.errors += 1
+            print(f"[RETRY] {str(e).splitlines()[0]}")
+            error_line = str(e).splitlines()[0] if str(e) else type(e).__name__
+            reason = _error_reason(e)
+            delay = 0.0
+
+            # Rate limits and quotas are per key (the limiter handles them), and a
+            # prompt that is too long says nothing about the provider's health
+            if reason == "rate_limit":
+                self._mark_key_on_cooldown(key_index, model, e, seconds=60)
+            elif reason == "quota":
+                self._mark_key_on_cooldown(key_index, model, e, seconds=600)
+            else:
+                if reason != "context":
+                    self.health.record_failure(target)
+                if reason in ("context", "model"):
+                    self._rotate_model()
+                delay = min(2 ** attempt + random.uniform(0, 1), 10)
+                span.set(backoff_s=round(delay, 3))
+            # After a rate limit / quota there is no blind sleep: the scheduler queues until a key has room
+            span.set(retry_reason=reason)
+            span.end("error", error_line)
+            return None, e, delay
+
+        self.health.record_success(target, time.perf_counter() - started)
+        total_tokens = sum(usage) if usage else None
+        self.limiter.record_usage(key_index, model, call.estimated_tokens, total_tokens)
+        print(f"✅ Success. Tokens used: {total_tokens}")
+        used_prompt, used_completion = usage or (call.prompt_tokens, count_tokens(content))
+        span.set(prompt_tokens=used_prompt, completion_tokens=used_completion)
+        span.end()
+        self.calls += 1
+        self.tokens_used += used_prompt + used_completion
+        return content, None, 0.0
+
+
+class _Call:
+    """One make_request call, and where its current attempt went (read by the hedger)."""
+
+    def __init__(self, messages, max_tokens, temperature, on_chunk, parent, prompt_tokens):
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.on_chunk = on_chunk
+        self.parent = parent
+        self.prompt_tokens = prompt_tokens
+        # Reserve prompt + max completion up front; corrected from real usage afterwards
+        self.estimated_tokens = prompt_tokens + max_tokens
+        self.target = None
+        self.key_index = None
+        self.sent_at = None
+        self.sent = asyncio.Event()
+
+    def started(self, target, key_index=None):
+        self.target, self.key_index = target, key_index
+        self.sent_at = time.perf_counter()
+        self.sent.set()
+
+    def copy(self):
+        return _Call(self.messages, self.max_tokens, self.temperature, self.on_chunk, self.parent, self.prompt_tokens)
+
+
+def _error_reason(error):
+    err_str = str(error).lower()
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429 \
+            or "rate limit" in err_str or "too many requests" in err_str:
+        return "rate_limit"
+    if "token" in err_str or "context" in err_str:
+        return "context"
+    if "quota" in err_str or "billing" in err_str or "resource has been exhausted" in err_str:
+        return "quota"
+    if "model" in err_str or "not available" in err_str:
+        return "model"
+    return "other"
+
+
+def _groq_usage(usage):
+    if usage is None:
+        return None
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+def _gemini_usage(response):
+    metadata = getattr(response, "usage_metadata", None)
+    if not metadata or not getattr(metadata, "prompt_token_count", None):
+        return None
+    return metadata.prompt_token_count, getattr(metadata, "candidates_token_count", 0) or 0
@@ -0,0 +1,227 @@
+"""
+Near-duplicate file detection: MinHash over line shingles, LSH buckets.
+
+Generated API clients, per-locale configs and pages stamped from one template
+would each cost a summary. Clustering them lets the pipeline summarize one
+representative and tell the README prompt how many similar files it stands for.
+
+    1. Files can only be near-duplicates of files with the same suffix and a
+       similar size (FileEntry sizes, no I/O), so most of a normal tree never
+       gets read.
+    2. The rest are read up to DEDUP_READ_CHARS. Shingles are whole lines with
+       whitespace and digits folded; in data files (JSON, YAML, .properties...)
+       only the key part of a line counts, so per-locale files with the same
+       keys match. Lines every file has ("}", "});") are dropped.
+    3. One-permutation MinHash: the line hashes are sorted once and the smallest
+       hash falling in each of DEDUP_BANDS x DEDUP_ROWS bins is the signature,
+       so the per-file cost is one C-level sort plus a short scan. Empty bins
+       borrow from the next filled one, so short files still get full bands.
+    4. Files sharing a band land in the same LSH bucket; each is checked against
+       one file per cluster already in that bucket with the exact Jaccard
+       similarity of their line sets, and pairs at DEDUP_THRESHOLD or above merge.
+
+Line hashes are CRC-32s rather than Python's salted str hash, so the same tree
+clusters the same way in every process (the candidate list, and with it the
+run manifest, stays stable across reruns).
+"""
+import math
+import os
+import zlib
+from collections import defaultdict
+
+_FOLD_DIGITS = str.maketrans("123456789", "000000000")
+_DATA_SUFFIXES = frozenset({'.json', '.yml', '.yaml', '.toml', '.ini', '.properties', '.env', '.po', '.strings',
+                            '.xml', '.resx', '.arb', '.csv'})
+_KEY_SPLIT = (":", "=")
+
+# Lines too common to say anything about a file
+_TRIVIAL = frozenset(zlib.crc32(line.encode()) for line in (
+    "", "{", "}", "(", ")", "[", "]", "};", ");", "});", "},", "],", "})", "*/", "/**", "*", "end", "else {",
+    "} else {", "return;", "break;", "</div>", "<div>", "\"\"\"", "pass", "export {};",
+))
+
+# Neighbouring size buckets are this ratio apart; files further apart in size aren't compared
+_SIZE_RATIO = 1.3
+# Files with fewer distinct lines than this are never clustered (too little to compare)
+MIN_LINES = 5
+
+
+def _settings():
+    return {
+        "threshold": float(os.getenv("DEDUP_THRESHOLD", "0.75")),
+        "read_chars": int(os.getenv("DEDUP_READ_CHARS", "4000")),
+        "bands": int(os.getenv("DEDUP_BANDS", "10")),
+        "rows": int(os.getenv("DEDUP_ROWS", "3")),
+    }
+
+
+def shingles(text, data=False):
+    lines = text.translate(_FOLD_DIGITS).splitlines()
+    if data:
+        # Keys only: "title": "Bonjour" and "title": "Hello" are the same line
+        lines = [line.split(_KEY_SPLIT[0], 1)[0] if _KEY_SPLIT[0] in line else line.split(_KEY_SPLIT[1], 1)[0]
+                 for line in lines]
+    return frozenset(map(zlib.crc32, map(str.encode, map(" ".join, map(str.split, lines))))) - _TRIVIAL
+
+
+def _signature(hashes, bins):
+    # One-permutation MinHash: smallest hash per bin
+    signature = [None] * bins
+    missing = bins
+    for value in sorted(hashes):
+        slot = value % bins
+        if signature[slot] is None:
+            signature[slot] = value
+            missing -= 1
+            if not missing:
+                return signature
+    # Densify: an empty bin takes the next filled bin's value, tagged with the distance,
+    # so files with fewer lines than bins still fill every band
+    found = list(signature)
+    following, distance = None, 0
+    for i in reversed(range(2 * bins)):
+        slot = i % bins
+        if found[slot] is not None:
+            following, distance = found[slot], 0
+            continue
+        distance += 1
+        if following is not None and signature[slot] is None:
+            signature[slot] = following + (distance << 32)
+    return signature
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicates:
+    """Clusters of near-identical files; every path maps to its cluster (best-ranked member first)."""
+
+    def __init__(self, clusters=()):
+        self.clusters = [list(c) for c in clusters]
+        self._cluster_of = {path: cluster for cluster in self.clusters for path in cluster}
+
+    def __len__(self):
+        return len(self.clusters)
+
+    @property
+    def duplicates(self):
+        # Files that don't need their own summary
+        return sum(len(c) - 1 for c in self.clusters)
+
+    def collapse(self, paths):
+        """
+        Keep the first path of every cluster in `paths` (in order, so the best-ranked
+        member represents it); returns (kept paths, {representative: [similar paths]}).
+        """
+        kept, similar, seen = [], {}, set()
+        for path in paths:
+            cluster = self._cluster_of.get(path)
+            if cluster is None:
+                kept.append(path)
+                continue
+            if id(cluster) in seen:
+                continue
+            seen.add(id(cluster))
+            kept.append(path)
+            similar[path] = [p for p in cluster if p != path]
+        return kept, similar
+
+
+def _size_bucket(size):
+    return int(math.log(max(size, 1)) / math.log(_SIZE_RATIO))
+
+
+def _comparable(entries, min_size=128):
+    # (entry, suffix) for entries with another file of the same suffix in the same or a neighbouring size bucket
+    groups = defaultdict(list)
+    for entry in entries:
+        if entry.size < min_size:
+            continue
+        suffix = os.path.splitext(entry.path)[1].lower()
+        groups[(suffix, _size_bucket(entry.size))].append(entry)
+    keep = []
+    for (suffix, bucket), members in groups.items():
+        if len(members) > 1 or groups.get((suffix, bucket - 1)) or groups.get((suffix, bucket + 1)):
+            keep.extend((entry, suffix) for entry in members)
+    return keep
+
+
+def find_near_duplicates(entries, read_text, threshold=None, read_chars=None, bands=None, rows=None):
+    """
+    Cluster near-identical files among FileEntry records. read_text(path, max_chars)
+    returns the file's leading text (or None when it can't be read). Clusters come back
+    in the order of `entries`, members too.
+    """
+    settings = _settings()
+    threshold = settings["threshold"] if threshold is None else threshold
+    read_chars = settings["read_chars"] if read_chars is None else read_chars
+    bands = settings["bands"] if bands is None else bands
+    rows = settings["rows"] if rows is None else rows
+
+    order = {entry.path: i for i, entry in enumerate(entries)}
+
+    sets = {}
+    buckets = defaultdict(list)
+    for entry, suffix in _comparable(entries):
+        text = read_text(entry.path, read_chars)
+        if not text or not text.strip():
+            continue
+        shingle_set = shingles(text, suffix in _DATA_SUFFIXES)
+        if len(shingle_set) < MIN_LINES:
+            continue
+        sets[entry.path] = shingle_set
+        signature = _signature(shingle_set, bands * rows)
+        for band, values in enumerate(zip(*[iter(signature)] * rows)):
+            buckets[(suffix, band, values)].append(entry.path)
+
+    # Union-find over verified pairs
+    parent = {}
+
+    def find(path):
+        while parent.get(path, path) != path:
+            parent[path] = parent.get(parent[path], parent[path])
+            path = parent[path]
+        return path
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        # The earlier entry stays the root, so clusters keep entry order
+        if order[root_a] < order[root_b]:
+            parent[root_b] = root_a
+        elif root_a != root_b:
+            parent[root_a] = root_b
+
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Each file is compared with one file per cluster already seen in the bucket
+        anchors = [members[0]]
+        for path in members[1:]:
+            for anchor in anchors:
+                if find(anchor) == find(path):
+                    break
+                if (anchor, path) in checked:
+                    continue
+                checked.add((anchor, path))
+                if jaccard(sets[anchor], sets[path]) >= threshold:
+                    union(anchor, path)
+                    break
+            else:
+                anchors.append(path)
+
+    clusters = defaultdict(list)
+    for path in parent:
+        clusters[find(path)].append(path)
+    for root in list(clusters):
+        clusters[root].append(root)
+    result = []
+    for root, members in clusters.items():
+        members = sorted(set(members), key=order.__getitem__)
+        if len(members) > 1:
+            result.append(members)
+    result.sort(key=lambda members: order[members[0]])
+    return NearDuplicates(result)
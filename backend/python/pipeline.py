@@ -0,0 +1,25 @@
+"""
+Minimal executor for the README pipeline: a fixed chain of nodes over one state dict.
+
+Same contract as a compiled linear LangGraph StateGraph, which is all the
+pipeline uses: every node gets the current state and returns a dict of keys to
+overwrite, and invoke() returns the final state. Skipping LangGraph keeps
+langgraph/langchain (about a second of imports) out of every process start.
+"""
+
+
+class Pipeline:
+    def __init__(self, nodes):
+        # [(name, fn)] in execution order
+        self.nodes = list(nodes)
+
+    def invoke(self, state):
+        state = dict(state)
+        for name, node in self.nodes:
+            update = node(state)
+            if update is None:
+                continue
+            if not isinstance(update, dict):
+                raise TypeError(f"Pipeline node {name!r} returned {type(update).__name__}, expected a dict")
+            state.update(update)
+        return state
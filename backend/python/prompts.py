@@ -19,28 +19,56 @@ Avoid test files, style files (CSS, SCSS), images.
 "Only return the list of filenames as a clean JSON array of strings. No markdown formatting, no explanation. Example: ["index.html", "script.js"]"
 """
 
+# Bump when the summarize prompts change so cached summaries are not reused
+SUMMARY_PROMPT_VERSION = "5"
+
+# The per-file record both summarize prompts ask for (parsed by summary_records.py)
+summary_record_schema = """{"file": "<path exactly as given>",
+ "purpose": "<1-2 sentences: what the file does and its role in the project>",
+ "components": ["<name>: <what it does>", ...],
+ "features": ["<core logic, business rule or behaviour>", ...],
+ "routes": ["<API route, page, CLI command or job it exposes, e.g. GET /api/users>", ...],
+ "deps": ["<external library, framework or service it uses>", ...],
+ "config": ["<env var, config key, port, script or setup command it needs>", ...],
+ "links": ["<other project file or module it uses or serves>", ...]}"""
+
 # Prompt to generate summary from a file
 summarize_prompt = """
 You are an AI assistant helping developers document codebases.
 
-Your task is to summarize the purpose and functionality of the following file in clear and concise technical language. Focus on:
-- What this file does
-- Any important functions, classes, or components defined
-- How it fits into the larger application
+Summarize the purpose and functionality of the following file for a README writer.
 
 Filename: {filename}
 
 File Content:
 {content}
 
+🎯 Output: exactly one JSON object, no markdown and no text around it:
+{schema}
+
 🔍 Notes:
-- Mention important libraries used, if applicable.
-- Highlight API routes, handlers, utility logic, etc., based on file type.
+- Use concrete names (functions, classes, routes, libraries, env vars); keep every item short.
+- Leave out fields that don't apply instead of writing "none".
 - Ignore internal implementation details unless necessary to understand functionality.
+"""
+
+# Bump when the reduce prompt changes so incremental runs don't mix old and new module summaries
+REDUCE_PROMPT_VERSION = "1"
 
-🎯 Output:
-Return a short but descriptive paragraph or bullet summary. Use a professional tone.
+# Prompt to fold the summaries of a directory's files and subdirectories into one module summary
+reduce_summaries_prompt = """
+You are documenting a large codebase. Below are summaries of the files and subdirectories inside `{scope}`.
 
+{summaries}
+
+Write one summary of `{scope}` as a module:
+- Its purpose and the role it plays in the project
+- Its most important files, components, functions or API routes (name them)
+- Libraries, frameworks and external services it relies on
+- How it connects to other parts of the project
+- Setup, configuration or commands mentioned in the summaries
+
+Keep concrete names and facts, drop repetition. Use at most {max_words} words of plain Markdown bullets, without a heading.
 """
 
 # Prompt to merge all summaries into a README
@@ -102,3 +130,31 @@ CRITICAL RULES (must be followed literally):
 • Do NOT prepend “markdown”, “bash”, or any language tag.
 • The first character of your answer must be ‘#’ (the title), not a back-tick.
 """
+
+# Bump when the README prompts change so incremental runs don't patch an old-style README
+README_PROMPT_VERSION = "1"
+
+# Prompt to patch only the README sections affected by changed files
+update_readme_prompt = """
+You are maintaining an existing `README.md` for a code repository. Some source files changed since it was written.
+
+📄 Current README:
+{readme}
+
+🔄 Updated summaries of the changed or new files:
+{summaries}
+
+🗑️ Files that are no longer part of the documented set:
+{removed}
+
+Your task:
+- Decide which `## ` sections of the current README are now outdated because of these changes.
+- Return ONLY those sections, each rewritten in full and starting with its exact original `## ` heading line.
+- If a genuinely new section is needed, give it a new `## ` heading.
+- Keep the same tone, emoji style and formatting as the rest of the README.
+- If nothing in the README needs to change, return exactly: NO_CHANGES
+
+CRITICAL RULES:
+• Output plain Markdown only – DO NOT wrap the answer in ``` or any other fence.
+• Do not repeat sections that are still accurate.
+"""
@@ -0,0 +1,179 @@
+"""
+Health tracking and circuit breaking per LLM target (provider, model).
+
+Every attempt reports its outcome here. A target's breaker is:
+    closed     requests flow; the last BREAKER_WINDOW outcomes (within
+               BREAKER_WINDOW_SECONDS) are kept, and once at least
+               BREAKER_MIN_FAILURES of them failed at BREAKER_ERROR_RATE or
+               more, the breaker opens
+    open       no requests for a cool-off (BREAKER_COOLOFF seconds, doubled
+               after every failed probe up to BREAKER_MAX_COOLOFF)
+    half-open  after the cool-off a single real request is let through as a
+               probe: success closes the breaker, failure opens it again, and
+               a probe that ends without a verdict (cancelled, prompt too long)
+               lets the next request probe
+
+A provider that tells us to wait (429 / exhausted quota) is opened for that
+long right away, without counting towards the error rate.
+
+Latency of successful attempts is kept per target too, so the caller can route
+to the healthy target with the best recent p50 and decide when a slow request
+is worth hedging. Only touched from the LLM loop thread, so there is no locking.
+"""
+import os
+import time
+from collections import deque
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+WINDOW = int(os.getenv("BREAKER_WINDOW", "10"))
+WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "300"))
+MIN_FAILURES = int(os.getenv("BREAKER_MIN_FAILURES", "3"))
+ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+COOLOFF = float(os.getenv("BREAKER_COOLOFF", "30"))
+MAX_COOLOFF = float(os.getenv("BREAKER_MAX_COOLOFF", "300"))
+LATENCY_SAMPLES = 50
+
+
+class _Target:
+    def __init__(self):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=WINDOW)           # (monotonic time, ok)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # seconds, successful attempts only
+        self.open_until = 0.0
+        self.cooloff = COOLOFF
+        self.probing = False
+
+    def failures(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > WINDOW_SECONDS:
+            self.outcomes.popleft()
+        failed = sum(1 for _, ok in self.outcomes if not ok)
+        return failed, failed / len(self.outcomes) if self.outcomes else 0.0
+
+
+class ProviderHealth:
+    def __init__(self, log=print, on_transition=None):
+        self._targets = {}
+        self.log = log
+        # on_transition(target, state), e.g. for metrics
+        self.on_transition = on_transition
+
+    def _get(self, target):
+        if target not in self._targets:
+            self._targets[target] = _Target()
+        return self._targets[target]
+
+    def _set_state(self, target, health, state, reason=""):
+        if health.state == state:
+            return
+        health.state = state
+        name = "/".join(target)
+        if state == OPEN:
+            self.log(f"🔌 {name} circuit open for {health.open_until - time.monotonic():.0f}s{reason}")
+        elif state == HALF_OPEN:
+            self.log(f"🩺 {name} circuit half-open, probing with the next request")
+        else:
+            self.log(f"✅ {name} circuit closed, back in rotation")
+        if self.on_transition:
+            self.on_transition(target, state)
+
+    def available(self, target):
+        """Whether a request may go to `target` now (doesn't claim a half-open probe)."""
+        health = self._get(target)
+        if health.state == CLOSED:
+            return True
+        if health.probing:
+            return False
+        return time.monotonic() >= health.open_until
+
+    def begin(self, target):
+        """
+        Called for the target an attempt is actually sent to. Returns True when
+        the attempt is the half-open probe; it must then end in record_success,
+        record_failure, trip or release.
+        """
+        health = self._get(target)
+        if health.state == OPEN and time.monotonic() >= health.open_until:
+            self._set_state(target, health, HALF_OPEN)
+        if health.state == HALF_OPEN and not health.probing:
+            health.probing = True
+            return True
+        return False
+
+    def release(self, target):
+        # The probe ended without a verdict (cancelled, prompt too long): the next request probes
+        health = self._get(target)
+        if health.state == HALF_OPEN:
+            health.probing = False
+
+    def record_success(self, target, seconds):
+        health = self._get(target)
+        health.outcomes.append((time.monotonic(), True))
+        health.latencies.append(seconds)
+        if health.state != CLOSED:
+            health.probing = False
+            health.cooloff = COOLOFF
+            health.outcomes.clear()
+            self._set_state(target, health, CLOSED)
+
+    def record_failure(self, target):
+        now = time.monotonic()
+        health = self._get(target)
+        health.outcomes.append((now, False))
+        if health.state == HALF_OPEN:
+            # The probe failed: back off longer before the next one
+            health.probing = False
+            health.cooloff = min(health.cooloff * 2, MAX_COOLOFF)
+            health.open_until = now + health.cooloff
+            self._set_state(target, health, OPEN, " (probe failed)")
+            return
+        failed, rate = health.failures(now)
+        if health.state == CLOSED and failed >= MIN_FAILURES and rate >= ERROR_RATE:
+            health.open_until = now + health.cooloff
+            self._set_state(target, health, OPEN, f" ({failed} of the last {len(health.outcomes)} attempts failed)")
+
+    def trip(self, target, seconds, reason=""):
+        # The provider said when to come back (rate limit / quota)
+        health = self._get(target)
+        health.probing = False
+        health.open_until = max(health.open_until, time.monotonic() + seconds)
+        if health.state == OPEN:
+            return
+        self._set_state(target, health, OPEN, f" ({reason})" if reason else "")
+
+    def reopens_in(self, target):
+        # Seconds until `target` takes a request again (a probe in flight is polled shortly)
+        health = self._get(target)
+        if health.state == CLOSED:
+            return 0.0
+        if health.probing:
+            return 1.0
+        return max(health.open_until - time.monotonic(), 0.0)
+
+    def observe(self, target, seconds):
+        # A latency without an outcome, e.g. a request cancelled after this long
+        self._get(target).latencies.append(seconds)
+
+    def percentile(self, target, q, min_samples=1):
+        latencies = sorted(self._get(target).latencies)
+        if len(latencies) < max(min_samples, 1):
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def p50(self, target):
+        return self.percentile(target, 0.5)
+
+    def snapshot(self):
+        now = time.monotonic()
+        state = []
+        for target, health in sorted(self._targets.items()):
+            failed, rate = health.failures(now)
+            state.append({
+                "provider": target[0],
+                "model": target[1],
+                "state": health.state,
+                "p50_s": round(self.p50(target), 3) if health.latencies else None,
+                "error_rate": round(rate, 2),
+                "open_for": round(max(health.open_until - now, 0.0), 1) if health.state != CLOSED else 0.0,
+            })
+        return state
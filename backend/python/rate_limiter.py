@@ -0,0 +1,239 @@
+"""
+Proactive per-(API key, model) rate limiting for the Groq fallback path.
+
+Each (key, model) pair gets two token buckets: requests/min and tokens/min.
+Buckets start from configured defaults (GROQ_RPM / GROQ_TPM) and are then
+corrected from what the provider tells us: the x-ratelimit-* headers on every
+response, `retry-after` on 429s, and the real token usage of completed calls.
+
+Before a request is sent, the scheduler picks the key with the most headroom
+for the model and reserves the estimated tokens. When no key has room, callers
+queue (FIFO) until the earliest bucket refills instead of sleeping blindly.
+
+The core (`RateLimiter`) is synchronous and only returns wait times, so it can
+also be hosted in a separate process and shared: start_shared_limiter() does
+that for batch runs, where several worker processes spend the same keys.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+# Groq durations look like "2m59.56s", "7.66s" or "120ms"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+
+def parse_duration(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    def __init__(self, capacity, per_seconds=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        # Requests bigger than the whole bucket are allowed once it is full
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.available -= min(amount, self.capacity)
+
+    def set_limit(self, capacity, remaining, now, reset_seconds=None):
+        # reset_seconds is how long the provider says until the bucket is full again
+        self._refill(now)
+        if capacity:
+            self.capacity = float(capacity)
+            self.rate = self.capacity / 60.0
+        if remaining is not None:
+            self.available = min(self.capacity, float(remaining))
+            if reset_seconds:
+                self.rate = max(self.rate, (self.capacity - self.available) / reset_seconds)
+
+
+class _Limits:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0  # monotonic time; set by retry-after / exhausted daily quota
+        self.sent = 0
+        self.throttled = 0
+
+    def wait_time(self, tokens, now):
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+            0.0,
+        )
+
+
+class RateLimiter:
+    def __init__(self, key_count, rpm=None, tpm=None):
+        self.key_count = key_count
+        self.default_rpm = rpm or int(os.getenv("GROQ_RPM", "30"))
+        self.default_tpm = tpm or int(os.getenv("GROQ_TPM", "12000"))
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key_index, model):
+        limits = self._limits.get((key_index, model))
+        if limits is None:
+            limits = self._limits[(key_index, model)] = _Limits(self.default_rpm, self.default_tpm)
+        return limits
+
+    def reserve(self, model, tokens, exclude=()):
+        """
+        Pick the key with the most headroom for `model`.
+        Returns (key_index, 0.0) with the tokens reserved, or (None, wait) when
+        every key is throttled and the caller should retry after `wait` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [i for i in range(self.key_count) if i not in exclude] or range(self.key_count)
+            best, best_wait, best_room = None, None, -1.0
+            for index in candidates:
+                limits = self._get(index, model)
+                wait = limits.wait_time(tokens, now)
+                room = limits.tokens.available
+                if best is None or wait < best_wait or (wait == best_wait and room > best_room):
+                    best, best_wait, best_room = index, wait, room
+            if best_wait > 0:
+                self._get(best, model).throttled += 1
+                return None, best_wait
+            limits = self._get(best, model)
+            limits.requests.take(1, now)
+            limits.tokens.take(tokens, now)
+            limits.sent += 1
+            return best, 0.0
+
+    def wait_estimate(self, model, tokens):
+        # How long until some key has room for `tokens` of `model`; nothing is reserved
+        with self._lock:
+            now = time.monotonic()
+            return min((self._get(i, model).wait_time(tokens, now) for i in range(self.key_count)), default=0.0)
+
+    def record_usage(self, key_index, model, reserved, used):
+        # Give back (or charge) the difference between the estimate and real usage
+        if used is None:
+            return
+        with self._lock:
+            limits = self._get(key_index, model)
+            limits.tokens.available = min(limits.tokens.capacity, limits.tokens.available + reserved - used)
+
+    def update_from_headers(self, key_index, model, headers):
+        if not headers:
+            return
+        get = lambda name: headers.get(name) if hasattr(headers, "get") else None
+        with self._lock:
+            now = time.monotonic()
+            limits = self._get(key_index, model)
+
+            token_limit = _to_int(get("x-ratelimit-limit-tokens"))
+            token_remaining = _to_int(get("x-ratelimit-remaining-tokens"))
+            if token_limit or token_remaining is not None:
+                limits.tokens.set_limit(token_limit, token_remaining, now, parse_duration(get("x-ratelimit-reset-tokens")))
+
+            # Groq's request headers describe the daily quota: block the key once it runs out
+            request_remaining = _to_int(get("x-ratelimit-remaining-requests"))
+            if request_remaining == 0:
+                reset = parse_duration(get("x-ratelimit-reset-requests"))
+                if reset:
+                    limits.blocked_until = max(limits.blocked_until, now + reset)
+
+            retry_after = parse_duration(get("retry-after"))
+            if retry_after:
+                limits.blocked_until = max(limits.blocked_until, now + retry_after)
+
+    def block(self, key_index, model, seconds):
+        # Used when a 429/quota error arrives without usable headers
+        with self._lock:
+            limits = self._get(key_index, model)
+            limits.blocked_until = max(limits.blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            state = []
+            for (key_index, model), limits in sorted(self._limits.items()):
+                limits.requests._refill(now)
+                limits.tokens._refill(now)
+                state.append({
+                    "key": key_index + 1,
+                    "model": model,
+                    "requests_available": round(limits.requests.available, 2),
+                    "requests_per_min": limits.requests.capacity,
+                    "tokens_available": round(limits.tokens.available),
+                    "tokens_per_min": limits.tokens.capacity,
+                    "blocked_for": round(max(limits.blocked_until - now, 0.0), 2),
+                    "sent": limits.sent,
+                    "throttled": limits.throttled,
+                })
+            return state
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class _LimiterManager(BaseManager):
+    pass
+
+
+_LimiterManager.register("RateLimiter", RateLimiter)
+
+
+def start_shared_limiter(key_count, rpm=None, tpm=None):
+    """
+    Host one RateLimiter in a manager process. Returns (manager, proxy); the proxy
+    has the same methods and can be handed to forked/spawned workers.
+    Call manager.shutdown() when done.
+    """
+    manager = _LimiterManager()
+    manager.start()
+    return manager, manager.RateLimiter(key_count, rpm, tpm)
+
+
+class AsyncScheduler:
+    """Queues callers (FIFO per model) until the limiter has headroom."""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self._queues = {}
+
+    async def acquire(self, model, tokens, exclude=()):
+        lock = self._queues.setdefault(model, asyncio.Lock())
+        async with lock:
+            while True:
+                key_index, wait = self.limiter.reserve(model, tokens, exclude)
+                if key_index is not None:
+                    return key_index
+                print(f"⏳ Rate limit headroom exhausted for {model}, queued for {wait:.1f}s")
+                await asyncio.sleep(wait)
@@ -0,0 +1,186 @@
+"""
+Run manifests for incremental README regeneration.
+
+Every successful run writes readme.manifest.json next to readme.md (and a copy
+in RUN_MANIFEST_DIR keyed by the repo's origin URL, because the backend puts
+each request in a fresh temp folder). The manifest records what the run saw and
+produced: the file list shown to the selector, the selected files with their
+blob hashes and summaries, the final README, and a fingerprint of the prompt
+versions / model / content limits.
+
+On the next run for the same repo, plan_rerun() diffs the repo against it:
+    skip         -> nothing the pipeline looked at changed; reuse the README
+    incremental  -> re-summarize only changed/new files, patch affected README sections
+    full         -> no usable manifest (or too much changed); start over
+"""
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "readme.manifest.json"
+
+DEFAULT_MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "manifests")
+
+
+def repo_identity(repo_path):
+    # The origin URL survives fresh clones/worktrees of the same repo; fall back to the path
+    try:
+        url = subprocess.run(
+            ["git", "-C", repo_path, "config", "--get", "remote.origin.url"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        url = ""
+    return url or os.path.abspath(repo_path)
+
+
+def _store_path(identity):
+    directory = os.getenv("RUN_MANIFEST_DIR", DEFAULT_MANIFEST_DIR)
+    return os.path.join(directory, hashlib.sha1(identity.encode()).hexdigest() + ".json")
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def load_manifest(output_dir, identity):
+    # A manifest sitting in the output folder wins (local reruns); else the per-repo store
+    manifest = _read_json(os.path.join(output_dir, MANIFEST_NAME))
+    if manifest is None:
+        manifest = _read_json(_store_path(identity))
+    return manifest
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def save_manifest(output_dir, identity, *, fingerprint, commit, shown_files, selected_files,
+                  file_hashes, file_summaries, readme):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "repo": identity,
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "fingerprint": fingerprint,
+        "shown_files": shown_files,
+        "selected_files": selected_files,
+        # Files whose summary couldn't be split out of a batch response have no entry
+        # here, so the next run treats them as changed
+        "files": {
+            filename: {"hash": file_hashes[filename], "summary": file_summaries[filename]}
+            for filename in selected_files
+            if filename in file_summaries and file_hashes.get(filename)
+        },
+        "readme": readme,
+    }
+    _write_json(os.path.join(output_dir, MANIFEST_NAME), manifest)
+    _write_json(_store_path(identity), manifest)
+    return manifest
+
+
+class RerunPlan:
+    def __init__(self, mode, reason, selected_files=None, reuse_summaries=None, previous=None):
+        self.mode = mode                          # "skip" | "incremental" | "full"
+        self.reason = reason
+        self.selected_files = selected_files      # reuse the previous selection when set
+        self.reuse_summaries = reuse_summaries or {}
+        self.previous = previous or {}            # the manifest being updated
+
+
+def plan_rerun(manifest, fingerprint, shown_files, hash_file):
+    """
+    Decide how much of the pipeline has to run again.
+    hash_file(path) returns the file's blob hash, or None if it no longer exists.
+    """
+    if manifest is None:
+        return RerunPlan("full", "no previous run")
+    if manifest.get("fingerprint") != fingerprint:
+        return RerunPlan("full", "prompt/model/limits changed since the previous run")
+
+    reuse = {
+        filename: entry["summary"]
+        for filename, entry in manifest.get("files", {}).items()
+        if hash_file(filename) == entry.get("hash")
+    }
+
+    if manifest.get("shown_files") != shown_files:
+        # The selector would see a different list, so selection runs again;
+        # summaries of unchanged files are still reused
+        return RerunPlan("incremental", "file list changed, selecting again",
+                         reuse_summaries=reuse, previous=manifest)
+
+    selected = manifest.get("selected_files", [])
+    changed = [f for f in selected if f not in reuse]
+    if not changed:
+        return RerunPlan("skip", "no selected file changed", selected_files=selected,
+                         reuse_summaries=reuse, previous=manifest)
+
+    # Deleted files simply drop out of the selection
+    still_there = [f for f in selected if f in reuse or hash_file(f) is not None]
+    return RerunPlan("incremental", f"{len(changed)} of {len(selected)} selected files changed",
+                     selected_files=still_there, reuse_summaries=reuse, previous=manifest)
+
+
+def split_sections(readme):
+    """
+    Split a README on its level-2 headings (ignoring fenced code blocks).
+    Returns [(heading line or "" for the preamble, section text)].
+    """
+    sections, heading, lines, in_fence = [], "", [], False
+    for line in readme.splitlines(keepends=True):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not in_fence and line.startswith("## "):
+            if heading or lines:
+                sections.append((heading, "".join(lines)))
+            heading, lines = line.strip(), [line]
+            continue
+        lines.append(line)
+    if heading or lines:
+        sections.append((heading, "".join(lines)))
+    return sections
+
+
+def _heading_key(heading):
+    # Compare headings without emojis, punctuation or case
+    return "".join(ch for ch in heading.lower() if ch.isalnum())
+
+
+def merge_sections(readme, updates):
+    """
+    Replace the README's sections by matching headings with those in `updates`
+    (text made of "## " sections); unknown headings are appended.
+    Returns (new readme, number of sections replaced or added).
+    """
+    sections = split_sections(readme)
+    index = {_heading_key(heading): i for i, (heading, _) in enumerate(sections) if heading}
+
+    applied = 0
+    for heading, text in split_sections(updates):
+        if not heading:
+            continue
+        text = text.rstrip("\n") + "\n\n"
+        position = index.get(_heading_key(heading))
+        if position is None:
+            sections.append((heading, text))
+        else:
+            sections[position] = (heading, text)
+        applied += 1
+
+    merged = "".join(text if text.endswith("\n") else text + "\n" for _, text in sections)
+    return merged.rstrip("\n") + "\n", applied
@@ -0,0 +1,249 @@
+"""
+Single-pass repository scanner.
+
+Walks the tree once with os.scandir (no per-file stat calls beyond what
+scandir already caches), prunes skipped directories and .gitignore'd paths
+as it goes, filters by suffix with set lookups, drops oversized files and
+sniffs binaries from a small prefix read. Directory symlinks are not
+followed; file symlinks are, when they point inside the repo. Returns a compact index of
+FileEntry records instead of bare path strings.
+"""
+import os
+import re
+from collections import namedtuple
+
+FileEntry = namedtuple("FileEntry", ["path", "size", "mtime"])
+
+# Directories to skip completely
+SKIP_DIRS = frozenset({
+    'node_modules', '.git', '__pycache__', '.venv', 'venv', 'env',
+    'dist', 'build', '.next', '.nuxt', 'coverage', '.nyc_output',
+    '.cache', 'tmp', 'temp', '.tmp', '.temp', 'logs', '.DS_Store',
+    'vendor', 'bower_components', '.gradle', '.idea', '.vscode',
+    '.pytest_cache', '.mypy_cache', '.tox', '.eggs'
+})
+
+# File suffixes to skip (matched on the last one or two dotted parts, e.g. ".min.js")
+SKIP_SUFFIXES = frozenset({
+    '.pyc', '.pyo', '.pyd', '.so', '.dll', '.dylib', '.exe', '.bin',
+    '.log', '.tmp', '.temp', '.cache', '.pid', '.lock', '.swp', '.swo',
+    '.DS_Store', '.coverage', '.nyc_output', '.min.js', '.min.css',
+    # Media and archives never help a README
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp', '.bmp',
+    '.mp3', '.mp4', '.mov', '.wav', '.pdf', '.zip', '.tar', '.gz', '.tgz',
+    '.woff', '.woff2', '.ttf', '.eot', '.otf', '.map',
+})
+
+# Hidden files that are still worth indexing
+KEEP_HIDDEN = frozenset({'.env', '.gitignore', '.dockerignore'})
+
+# Known text formats skip the binary sniff entirely
+TEXT_SUFFIXES = frozenset({
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.json', '.md', '.txt',
+    '.yml', '.yaml', '.toml', '.ini', '.cfg', '.html', '.css', '.scss', '.sh',
+    '.go', '.rs', '.java', '.kt', '.rb', '.php', '.c', '.h', '.cpp', '.hpp',
+    '.cs', '.swift', '.sql', '.xml', '.vue', '.svelte', '.env', '.gitignore',
+})
+
+SNIFF_BYTES = 1024
+
+
+def _suffixes(name):
+    # Last and last-two dotted suffixes: "a.min.js" -> (".js", ".min.js")
+    last = name.rfind('.')
+    if last <= 0:
+        return None, None
+    prev = name.rfind('.', 0, last)
+    return name[last:], (name[prev:] if prev > 0 else None)
+
+
+def skip_file_name(name):
+    # Hidden files (except important ones) and skipped suffixes
+    if name[0] == '.' and name not in KEEP_HIDDEN:
+        return True
+    last, last_two = _suffixes(name)
+    return last in SKIP_SUFFIXES or last_two in SKIP_SUFFIXES
+
+
+def index_from_listing(listing, max_file_bytes=None):
+    """
+    Apply the scanner's directory/name/size rules to an existing listing of
+    (relative path with '/' separators, size) pairs, e.g. from `git ls-tree`.
+    A size of None (blob not fetched by a size-filtered partial clone) counts as oversized.
+    """
+    if max_file_bytes is None:
+        max_file_bytes = int(os.getenv("SCAN_MAX_FILE_BYTES", str(2 * 1024 * 1024)))
+    entries = []
+    for rel_path, size in listing:
+        parts = rel_path.split('/')
+        if size is None or size > max_file_bytes or skip_file_name(parts[-1]):
+            continue
+        if any(part in SKIP_DIRS for part in parts[:-1]):
+            continue
+        entries.append(FileEntry(rel_path.replace('/', os.sep), size, 0.0))
+    entries.sort(key=lambda e: (e.path.count(os.sep), e.path))
+    return entries
+
+
+def is_binary(full_path):
+    try:
+        with open(full_path, "rb") as f:
+            chunk = f.read(SNIFF_BYTES)
+    except OSError:
+        return True
+    return b"\0" in chunk
+
+
+class _IgnoreRule:
+    __slots__ = ("regex", "negate", "dir_only")
+
+    def __init__(self, regex, negate, dir_only):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def _compile_gitignore_pattern(pattern):
+    # Translate one .gitignore line into a regex matched against paths
+    # relative to the directory holding the .gitignore
+    negate = pattern.startswith('!')
+    if negate:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    i, out = 0, []
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                out.append(pattern[i:end + 1].replace('[!', '[^'))
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    prefix = '' if anchored else '(?:.*/)?'
+    return _IgnoreRule(re.compile(f"^{prefix}{''.join(out)}$"), negate, dir_only)
+
+
+def _load_gitignore(path):
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.rstrip('\n').rstrip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('\\'):
+                    line = line[1:]
+                rules.append(_compile_gitignore_pattern(line))
+    except OSError:
+        pass
+    return rules
+
+
+def _ignored(rule_sets, rel_path, is_dir):
+    # Later rules (and deeper .gitignore files) win, as in git
+    ignored = False
+    for base, rules in rule_sets:
+        local = rel_path[len(base) + 1:] if base else rel_path
+        for rule in rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(local):
+                ignored = not rule.negate
+    return ignored
+
+
+def _inside(real_root, path):
+    # Does the symlink at `path` resolve to somewhere under the repo root?
+    target = os.path.realpath(path)
+    return target == real_root or target.startswith(real_root.rstrip(os.sep) + os.sep)
+
+
+def scan_repo(root, max_file_bytes=None, use_gitignore=True, sniff_binary=True):
+    if max_file_bytes is None:
+        max_file_bytes = int(os.getenv("SCAN_MAX_FILE_BYTES", str(2 * 1024 * 1024)))
+
+    entries = []
+    real_root = os.path.realpath(root)
+    root_rules = []
+    if use_gitignore:
+        root_rules = _load_gitignore(os.path.join(root, ".gitignore"))
+        root_rules += _load_gitignore(os.path.join(root, ".git", "info", "exclude"))
+
+    # Stack of (absolute dir, relative dir, gitignore rule sets in effect)
+    stack = [(root, "", [("", root_rules)] if root_rules else [])]
+    while stack:
+        dir_path, rel_dir, rule_sets = stack.pop()
+        try:
+            iterator = os.scandir(dir_path)
+        except OSError:
+            continue
+
+        with iterator:
+            children = list(iterator)
+
+        if use_gitignore and rel_dir and any(child.name == ".gitignore" for child in children):
+            local_rules = _load_gitignore(os.path.join(dir_path, ".gitignore"))
+            if local_rules:
+                rule_sets = rule_sets + [(rel_dir, local_rules)]
+
+        for child in children:
+            name = child.name
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            try:
+                if child.is_dir(follow_symlinks=False):
+                    if name in SKIP_DIRS:
+                        continue
+                    if rule_sets and _ignored(rule_sets, rel_path, True):
+                        continue
+                    stack.append((child.path, rel_path, rule_sets))
+                    continue
+                # Directory symlinks are never followed (loops, trees outside the repo);
+                # file symlinks are, as long as the target is inside the repo
+                link = child.is_symlink()
+                if not child.is_file(follow_symlinks=link):
+                    continue
+                if link and not _inside(real_root, child.path):
+                    continue
+            except OSError:
+                continue
+
+            if skip_file_name(name):
+                continue
+            if rule_sets and _ignored(rule_sets, rel_path, False):
+                continue
+
+            try:
+                stat = child.stat(follow_symlinks=link)
+            except OSError:
+                continue
+            if stat.st_size > max_file_bytes:
+                continue
+            if sniff_binary and stat.st_size and _suffixes(name)[0] not in TEXT_SUFFIXES and is_binary(child.path):
+                continue
+
+            entries.append(FileEntry(rel_path.replace('/', os.sep), stat.st_size, stat.st_mtime))
+
+    # Deterministic, shallow-first order (stack-based walking would otherwise reverse siblings)
+    entries.sort(key=lambda e: (e.path.count(os.sep), e.path))
+    return entries
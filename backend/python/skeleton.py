@@ -0,0 +1,403 @@
+"""
+Compact outlines of source files for the summarize prompts.
+
+The first couple of thousand characters of a long file are mostly license
+header, imports and the first helper; the API further down never reaches the
+model. An outline keeps what a summary needs from the whole file:
+    - Python: parsed with ast -> module docstring, imports, constants, classes
+      (bases, fields, methods), function signatures, decorators (routes) and
+      first docstring lines
+    - JS/TS, Go, Java/Kotlin/C#, Rust: a line scanner that tracks brace nesting
+      and keeps declarations with their bodies elided, members of classes /
+      structs / interfaces, doc comments, route registrations and imports
+Entries are ranked (top-level API, public members, docs, imports, private
+members); when the whole outline is over the token budget, the best-ranked
+entries that fit are kept, in file order. Nothing is executed; Python that doesn't parse goes through the line
+scanner like the other languages.
+"""
+import ast
+import re
+
+from token_packer import count_tokens
+
+# Bump when the outline format changes so cached summaries are not reused
+SKELETON_VERSION = "1"
+
+# Entry ranks; an outline over budget loses the highest rank first
+TOP, MEMBER, DOC, IMPORTS, PRIVATE = 0, 1, 2, 3, 4
+
+MAX_LINE = 160
+MAX_IMPORTS = 15
+
+_LANGUAGES = {
+    '.py': 'py',
+    '.js': 'js', '.jsx': 'js', '.ts': 'js', '.tsx': 'js', '.mjs': 'js', '.cjs': 'js',
+    '.go': 'go',
+    '.java': 'jvm', '.kt': 'jvm', '.kts': 'jvm', '.scala': 'jvm', '.cs': 'jvm',
+    '.rs': 'rs',
+}
+
+
+def language(path):
+    # Outline language for a file, or None when we'd only send its raw text
+    dot = path.rfind('.')
+    return _LANGUAGES.get(path[dot:].lower()) if dot != -1 else None
+
+
+def _clip(line):
+    line = line.rstrip()
+    return line if len(line) <= MAX_LINE else line[:MAX_LINE - 1] + "…"
+
+
+def _first_line(doc):
+    for line in doc.strip().splitlines():
+        if line.strip():
+            return _clip(line.strip())
+    return ""
+
+
+def _imports_line(names):
+    unique = list(dict.fromkeys(n for n in names if n))
+    if not unique:
+        return None
+    more = f" (+{len(unique) - MAX_IMPORTS} more)" if len(unique) > MAX_IMPORTS else ""
+    return f"imports: {', '.join(unique[:MAX_IMPORTS])}{more}"
+
+
+# --- Python -------------------------------------------------------------------
+
+def _py_signature(node, indent):
+    lines = [f"{indent}@{_clip(ast.unparse(d))}" for d in node.decorator_list]
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    lines.append(_clip(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."))
+    return "\n".join(lines)
+
+
+def _py_doc(entries, node, indent, rank=DOC):
+    # Docstrings of private definitions go with them
+    doc = ast.get_docstring(node)
+    if doc:
+        entries.append((max(rank, DOC), f'{indent}"""{_first_line(doc)}"""'))
+
+
+def _py_assign_name(node):
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    if len(targets) == 1 and isinstance(targets[0], ast.Name):
+        return targets[0].id
+    return None
+
+
+def _py_class(entries, node, indent, rank):
+    bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+    decorators = "".join(f"{indent}@{_clip(ast.unparse(d))}\n" for d in node.decorator_list)
+    entries.append((rank, f"{decorators}{indent}class {node.name}{'(' + ', '.join(bases) + ')' if bases else ''}:"))
+    _py_doc(entries, node, indent + "    ", rank)
+    inner = indent + "    "
+    for child in node.body:
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            private = child.name.startswith("_") and child.name != "__init__"
+            child_rank = PRIVATE if private or rank == PRIVATE else MEMBER
+            entries.append((child_rank, _py_signature(child, inner)))
+            _py_doc(entries, child, inner + "    ", child_rank)
+        elif isinstance(child, ast.ClassDef):
+            _py_class(entries, child, inner, PRIVATE if child.name.startswith("_") or rank == PRIVATE else MEMBER)
+        elif isinstance(child, ast.AnnAssign) and isinstance(child.target, ast.Name):
+            # Dataclass / model fields
+            default = f" = {ast.unparse(child.value)}" if child.value is not None else ""
+            entries.append((max(rank, MEMBER), _clip(f"{inner}{child.target.id}: {ast.unparse(child.annotation)}{default}")))
+
+
+def _python(text):
+    tree = ast.parse(text)
+    entries, imports = [], []
+    doc = ast.get_docstring(tree)
+    if doc:
+        entries.append((TOP, f'"""{_first_line(doc)}"""'))
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append("." * node.level + (node.module or ""))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            rank = PRIVATE if node.name.startswith("_") else TOP
+            entries.append((rank, _py_signature(node, "")))
+            _py_doc(entries, node, "    ", rank)
+        elif isinstance(node, ast.ClassDef):
+            _py_class(entries, node, "", PRIVATE if node.name.startswith("_") else TOP)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            name = _py_assign_name(node)
+            # app / router objects, then module constants and __all__
+            if name and (name.isupper() or name == "__all__" or isinstance(node.value, ast.Call)):
+                rank = TOP if isinstance(node.value, ast.Call) and not name.isupper() else DOC
+                if node.value is None:
+                    # Bare annotation: "TIMEOUT: int"
+                    entries.append((rank, _clip(f"{name}: {ast.unparse(node.annotation)}")))
+                else:
+                    entries.append((rank, _clip(f"{name} = {ast.unparse(node.value)}")))
+        elif isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+            entries.append((TOP, "if __name__ == '__main__': ..."))
+    line = _imports_line(imports)
+    if line:
+        entries.insert(1 if doc else 0, (IMPORTS, line))
+    return entries
+
+
+# --- Brace languages ------------------------------------------------------------
+
+_STRINGS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`')
+_CONTROL = re.compile(r"^(?:if|else|for|while|do|switch|case|catch|try|finally|return|throw|new|await|yield|"
+                      r"defer|go|select|match|loop|when|super|this)\b")
+_MODIFIERS = (r"(?:(?:public|private|protected|internal|static|final|abstract|sealed|open|override|suspend|"
+              r"synchronized|readonly|async|virtual|partial|data|inline|export|default|declare|get|set)\s+)*")
+
+# Declarations that open a block whose members are worth listing
+_CONTAINERS = {
+    'js': re.compile(r"^(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?"
+                     r"(?:class|interface|enum|namespace|module)\b"),
+    'go': re.compile(r"^type\s+\w+\s+(?:struct|interface)\b|^type\s*\("),
+    'jvm': re.compile(r"^" + _MODIFIERS + r"(?:class|interface|enum|record|object|struct|namespace)\b"),
+    'rs': re.compile(r"^(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|impl|mod)\b"),
+}
+# Other top-level declarations (functions, types, constants, exports)
+_DECLARATIONS = {
+    'js': re.compile(r"^(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:async\s+)?"
+                     r"(?:function\*?\s*[\w$]*|type\s+[\w$]+|const\s+enum)"
+                     r"|^(?:export\s+)?(?:const|let|var)\s+[\w$]+"
+                     r"|^export\s+(?:default\b|\{|\*)|^(?:module\.)?exports(?:\.[\w$]+)?\s*="),
+    'go': re.compile(r"^func\b|^type\s+\w+|^(?:var|const)\s+[A-Z]\w*"),
+    'jvm': re.compile(r"^" + _MODIFIERS + r"(?:fun\b|val\s|var\s|typealias\s|[\w<>\[\],.?]+\s+\w+\s*\()"),
+    'rs': re.compile(r"^(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:const\s+|unsafe\s+|extern\s+\S*\s*)*"
+                     r"(?:fn|type|const|static|macro_rules!)\s*\w+"),
+}
+# Members inside a container block
+_MEMBERS = {
+    'js': re.compile(r"^(?:(?:public|private|protected|static|readonly|abstract|async|get|set|override|declare)\s+)*"
+                     r"[#\w$]+\??\s*(?:<[^>]*>)?\s*[(:=]|^\[|^[A-Z_]\w*\s*,?$"),
+    'go': re.compile(r"^\w+(?:\s*,\s*\w+)*\s+\S+|^\w+\s*\(|^\*?[\w.]+$"),
+    'jvm': re.compile(r"^" + _MODIFIERS + r"(?:fun\b|val\s|var\s|[\w<>\[\],.?]+\s+\w+\s*[(;=])|^[A-Z_]\w*\s*[,(;]?"),
+    'rs': re.compile(r"^(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:fn\s+\w+|\w+\s*:|[A-Z]\w*\s*[,({]?)"),
+}
+_IMPORTS = {
+    'js': re.compile(r"""^(?:import|export)\s.*?from\s*['"]([^'"]+)['"]|^import\s*['"]([^'"]+)['"]"""
+                     r"""|require\(\s*['"]([^'"]+)['"]\s*\)"""),
+    'go': re.compile(r'^import\s+(?:\w+\s+)?"([^"]+)"|^(?:\w+\s+)?"([^"]+)"$'),
+    'jvm': re.compile(r"^(?:import|using)\s+(?:static\s+)?([\w.]+\*?)"),
+    'rs': re.compile(r"^(?:pub\s+)?use\s+([\w:]+)"),
+}
+_ROUTE = re.compile(
+    r"""\b\w+\.(?:get|post|put|patch|delete|all|use|route|handle|handlefunc|group)\s*\(\s*['"`](/[^'"`]*)['"`]""",
+    re.IGNORECASE,
+)
+_JS_FROM = re.compile(r"""from\s*['"]([^'"]+)['"]""")
+
+
+def _private(lang, line):
+    if lang == 'js':
+        return line.startswith(("private ", "#", "_")) or " #" in line.split("(")[0]
+    if lang == 'go':
+        name = re.match(r"^(?:func\s+(?:\([^)]*\)\s*)?|type\s+|var\s+|const\s+)?(\w)", line)
+        return bool(name) and name.group(1).islower()
+    if lang == 'jvm':
+        return line.startswith("private ")
+    return not line.startswith("pub") if lang == 'rs' else False
+
+
+def _signature(line, container):
+    # Declaration line with its body elided
+    stripped = line.rstrip()
+    if stripped.endswith("{"):
+        head = stripped[:-1].rstrip()
+        return _clip(head if container else head + " { … }")
+    if "=>" in line and not container:
+        return _clip(line.split("=>", 1)[0].rstrip() + " => …")
+    if "{" in line:
+        head = line.split("{", 1)[0].rstrip()
+        if head:
+            return _clip(head if container else head + " { … }")
+    return _clip(line.rstrip(";,").rstrip())
+
+
+def _brace_lang(text, lang):
+    entries, imports = [], []
+    container_re, declaration_re = _CONTAINERS[lang], _DECLARATIONS[lang]
+    member_re, import_re = _MEMBERS[lang], _IMPORTS[lang]
+    # One item per open block: True when it's a container whose members we list
+    stack = []
+    doc = None            # first line of the comment right above the current line
+    annotations = []      # decorators / annotations waiting for their declaration
+    in_comment = False
+    in_go_imports = False
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        raw = lines[i]
+        line = raw.strip()
+        i += 1
+
+        # Comments: keep the first line of a doc comment for the next declaration
+        if in_comment:
+            if "*/" in line:
+                in_comment = False
+            elif doc is None and line.lstrip("* ").strip():
+                doc = _clip(line.lstrip("* ").strip())
+            continue
+        if line.startswith("/*"):
+            text_part = line[2:].lstrip("*!").split("*/")[0].strip()
+            in_comment = "*/" not in line[2:]
+            doc = _clip(text_part) if text_part else None
+            continue
+        if line.startswith("//"):
+            text_part = line.lstrip("/!").strip()
+            doc = doc or (_clip(text_part) if text_part else None)
+            continue
+        if not line:
+            doc = None
+            continue
+
+        # Go import blocks
+        if lang == 'go' and line.startswith("import ("):
+            in_go_imports = True
+            continue
+        if in_go_imports:
+            if line.startswith(")"):
+                in_go_imports = False
+            else:
+                match = import_re.match(line)
+                if match:
+                    imports.append(next(g for g in match.groups() if g))
+            continue
+
+        depth = len(stack)
+        listing = all(stack)  # every enclosing block is a container (or we're at the top)
+        route = _ROUTE.search(line)
+        if route is None and line.endswith("(") and i < len(lines):
+            # router.post(\n  "/path", ...
+            joined = line + lines[i].strip()
+            route = _ROUTE.search(joined)
+            if route:
+                line = joined
+
+        if depth == 0 and lang == 'js' and line.startswith("import") and not import_re.match(line):
+            # import { a, b } spread over several lines
+            while i < len(lines) and "from" not in lines[i - 1]:
+                i += 1
+            match = _JS_FROM.search(lines[i - 1])
+            if match:
+                imports.append(match.group(1))
+            continue
+
+        if depth == 0 or listing:
+            match = import_re.match(line) if depth == 0 else None
+            if match:
+                imports.append(next(g for g in match.groups() if g))
+                continue
+            if line.startswith("@"):
+                # Decorators / annotations (@RestController, @GetMapping("/x")) go with the declaration below
+                annotations.append(_clip(line))
+                continue
+            is_container = bool(container_re.match(line))
+            matched = is_container or (declaration_re.match(line) if depth == 0
+                                       else member_re.match(line) and not _CONTROL.match(line))
+            if matched or route:
+                # Signatures split over several lines: join until the parentheses close
+                signature = line
+                while signature.count("(") > signature.count(")") and i < len(lines) and len(signature) < MAX_LINE * 2:
+                    signature += " " + lines[i].strip()
+                    raw += "\n" + lines[i]
+                    i += 1
+                indent = "  " * depth
+                if route and not matched:
+                    rank, text_line = TOP, _clip(line[:route.end()] + ", …)")
+                else:
+                    rank = TOP if depth == 0 else MEMBER
+                    if _private(lang, signature):
+                        rank = PRIVATE
+                    text_line = _signature(signature, is_container)
+                if doc and rank != PRIVATE:
+                    entries.append((DOC, f"{indent}// {doc}"))
+                for annotation in annotations:
+                    entries.append((rank, f"{indent}{annotation}"))
+                entries.append((rank, f"{indent}{text_line}"))
+                annotations = []
+                doc = None
+                _track(stack, raw, is_container)
+                continue
+        elif route:
+            # Routes registered inside a function body (Go, Express setup functions)
+            entries.append((TOP, _clip(line[:route.end()] + ", …)")))
+        doc = None
+        annotations = []
+        _track(stack, raw, False)
+
+    line = _imports_line(imports)
+    if line:
+        entries.insert(0, (IMPORTS, line))
+    return entries
+
+
+def _track(stack, raw, is_container):
+    # Update the block stack with the braces on this line (string contents ignored)
+    code = _STRINGS.sub("", raw)
+    code = code.split("//", 1)[0]
+    first_open = True
+    for char in code:
+        if char == "{":
+            stack.append(is_container and first_open)
+            first_open = False
+        elif char == "}" and stack:
+            stack.pop()
+
+
+# --- Fitting ------------------------------------------------------------------------
+
+def _fit(entries, max_tokens):
+    # Best-ranked entries first, each only if it still fits; printed in file order
+    kept, used = set(), 0
+    for index in sorted(range(len(entries)), key=lambda n: entries[n][0]):
+        cost = count_tokens(entries[index][1]) + 1
+        if used + cost <= max_tokens:
+            kept.add(index)
+            used += cost
+    return "\n".join(text for index, (_, text) in enumerate(entries) if index in kept)
+
+
+def outline(path, text, max_tokens):
+    """
+    Outline of a whole source file within max_tokens, or None when the file's
+    language isn't supported or nothing worth listing was found.
+    """
+    lang = language(path)
+    if lang is None or not text.strip():
+        return None
+    if lang == 'py':
+        try:
+            entries = _python(text)
+        except (SyntaxError, ValueError, RecursionError):
+            # Python 2, templates, partial files: def / class lines are still found
+            entries = _py_lines(text)
+    else:
+        entries = _brace_lang(text, lang)
+    if not any(rank in (TOP, MEMBER) for rank, _ in entries):
+        return None
+
+    rendered = "\n".join(text for _, text in entries)
+    if count_tokens(rendered) <= max_tokens:
+        return rendered
+    return _fit(entries, max_tokens)
+
+
+_PY_DEF = re.compile(r"^( {0,4})(?:async\s+)?(?:def|class)\s+(\w+)")
+
+
+def _py_lines(text):
+    # Python ast can't parse: top-level and first-level def / class lines
+    entries = []
+    for line in text.splitlines():
+        match = _PY_DEF.match(line)
+        if match:
+            rank = MEMBER if match.group(1) else TOP
+            if match.group(2).startswith("_") and match.group(2) != "__init__":
+                rank = PRIVATE
+            entries.append((rank, _clip(line.rstrip().rstrip(":") + ": ...")))
+    return entries
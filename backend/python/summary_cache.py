@@ -0,0 +1,172 @@
+"""
+Content-addressed cache for per-file summaries.
+
+Entries are keyed by (git blob hash of the file, summary prompt version, model,
+MAX_CONTENT_PER_FILE), so an unchanged file in a repo we have already seen is
+never sent to the LLM again. Storage is a single SQLite file with size-bounded
+LRU eviction, safe to share between the warm worker processes.
+
+CLI:
+    python summary_cache.py stats
+    python summary_cache.py list [--limit 20]
+    python summary_cache.py prune [--max-bytes N]
+    python summary_cache.py clear
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "summaries.sqlite")
+
+
+def make_key(blob_hash, prompt_version, model, max_content):
+    raw = f"{blob_hash}|{prompt_version}|{model}|{max_content}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.getenv("SUMMARY_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                filename TEXT,
+                model TEXT,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE summaries SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, summary, filename=None, model=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO summaries (key, filename, model, summary, size, created, last_used, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, 0)""",
+                (key, filename, model, summary, len(summary.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self._evict_locked(self.max_bytes)
+
+    def _evict_locked(self, max_bytes):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        removed = 0
+        # Drop least recently used entries until we are back under the bound
+        for key, size in self._conn.execute("SELECT key, size FROM summaries ORDER BY last_used ASC").fetchall():
+            if total <= max_bytes:
+                break
+            self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        return removed
+
+    def prune(self, max_bytes=None):
+        with self._lock:
+            return self._evict_locked(self.max_bytes if max_bytes is None else max_bytes)
+
+    def clear(self):
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM summaries").rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            return removed
+
+    def stats(self):
+        with self._lock:
+            entries, total, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM summaries"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "lifetime_hits": hits,
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+        }
+
+    def entries(self, limit=20):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT filename, model, size, hits, last_used FROM summaries ORDER BY last_used DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+
+_cache = None
+
+
+def get_summary_cache():
+    # SUMMARY_CACHE=0 disables caching entirely
+    global _cache
+    if os.getenv("SUMMARY_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = SummaryCache()
+    return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the per-file summary cache")
+    parser.add_argument("--path", default=None, help="cache file (default: SUMMARY_CACHE_PATH or .cache/summaries.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show entry count and size")
+    list_parser = sub.add_parser("list", help="show most recently used entries")
+    list_parser.add_argument("--limit", type=int, default=20)
+    prune_parser = sub.add_parser("prune", help="evict LRU entries down to a size")
+    prune_parser.add_argument("--max-bytes", type=int, default=None)
+    sub.add_parser("clear", help="delete every entry")
+    args = parser.parse_args()
+
+    cache = SummaryCache(path=args.path)
+    if args.command == "stats":
+        for name, value in cache.stats().items():
+            print(f"{name:15} {value}")
+    elif args.command == "list":
+        for filename, model, size, hits, last_used in cache.entries(args.limit):
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used))
+            print(f"{used}  {hits:4} hits  {size:7} B  {model}  {filename}")
+    elif args.command == "prune":
+        removed = cache.prune(args.max_bytes)
+        print(f"🧹 Evicted {removed} entries")
+    elif args.command == "clear":
+        print(f"🧹 Removed {cache.clear()} entries")
+
+
+if __name__ == "__main__":
+    main()
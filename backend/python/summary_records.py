@@ -0,0 +1,226 @@
+"""
+Compact per-file summary records.
+
+The summarize prompts ask for one JSON object per file instead of free-form
+markdown:
+
+    {"file": "src/server.js", "purpose": "...", "components": ["createApp: builds the Express app"],
+     "features": [...], "routes": ["GET /api/users"], "deps": ["express", "mongoose"],
+     "config": ["PORT", "MONGO_URI"], "links": ["src/routes/users.js"]}
+
+Responses are parsed by decoding every JSON value in them (fences, prose around
+the JSON, one object per line and arrays cut off by the token limit all work),
+then each record is validated and normalized: known keys and common aliases
+only, lists of short strings, capped lengths. A record is stored as its
+summary string "### <file>\\n<compact JSON>", so the summary cache, the run
+manifest and the summary tree keep handling plain strings.
+
+render() turns a set of summaries into the dense text that goes into the
+README prompt: one short line per field, and dependencies that several files
+share listed once at the top instead of under every file. Summaries that
+aren't records (older cache entries, responses that weren't JSON) pass through
+unchanged.
+"""
+import json
+import re
+from collections import Counter
+
+# Field -> max items (None for the one prose field); also the order fields are rendered in
+FIELDS = {
+    "purpose": None,
+    "components": 16,
+    "features": 8,
+    "routes": 16,
+    "deps": 16,
+    "config": 12,
+    "links": 16,
+}
+MAX_PURPOSE_CHARS = 400
+MAX_ITEM_CHARS = 160
+
+_ALIASES = {
+    "path": "file", "filename": "file", "file_path": "file", "name": "file",
+    "summary": "purpose", "description": "purpose", "role": "purpose",
+    "key_components": "components", "classes": "components", "functions": "components", "exports": "components",
+    "functionality": "features", "behaviour": "features", "behavior": "features",
+    "endpoints": "routes", "api": "routes", "commands": "routes",
+    "dependencies": "deps", "libraries": "deps", "imports": "deps", "packages": "deps",
+    "configuration": "config", "env": "config", "settings": "config",
+    "integration": "links", "connections": "links", "related": "links", "used_by": "links",
+}
+# Containers some models wrap the records in
+_WRAPPERS = ("files", "summaries", "records", "results")
+
+_FENCE = re.compile(r"^\s*```[\w-]*\s*$", re.MULTILINE)
+# A trailing comma before ] or }; string literals match first so commas inside them are kept
+_TRAILING_COMMA = re.compile(r'"(?:\\.|[^"\\])*"|,(\s*[\]}])')
+
+
+def _drop_trailing_commas(text):
+    return _TRAILING_COMMA.sub(lambda m: m.group(1) if m.group(1) is not None else m.group(0), text)
+
+
+def _json_values(text):
+    # Every top-level JSON value in the text, left to right
+    text = _FENCE.sub("", text)
+    decoder = json.JSONDecoder()
+    values, i = [], 0
+    while True:
+        starts = [p for p in (text.find("{", i), text.find("[", i)) if p != -1]
+        if not starts:
+            return values
+        start = min(starts)
+        try:
+            value, i = decoder.raw_decode(text, start)
+        except ValueError:
+            # Retry without trailing commas, only from where plain decoding failed
+            fixed = text[:start] + _drop_trailing_commas(text[start:])
+            try:
+                value, i = decoder.raw_decode(fixed, start)
+            except ValueError:
+                # Not JSON from here (or cut off): complete objects further in are still found
+                i = start + 1
+                continue
+            text = fixed
+        values.append(value)
+
+
+def _candidates(value):
+    # Record-shaped dicts in a decoded value
+    if isinstance(value, list):
+        for item in value:
+            yield from _candidates(item)
+    elif isinstance(value, dict):
+        for key in _WRAPPERS:
+            if isinstance(value.get(key), list):
+                yield from _candidates(value[key])
+                return
+        if value and all(isinstance(v, dict) for v in value.values()) and not any(k in value for k in FIELDS):
+            # {"src/a.js": {...}, "src/b.js": {...}}
+            for path, record in value.items():
+                yield dict(record, file=record.get("file") or path)
+            return
+        yield value
+
+
+def _text(value, limit):
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def validate(raw):
+    """A normalized record, or None when `raw` has no usable purpose."""
+    if not isinstance(raw, dict):
+        return None
+    fields = {}
+    for key, value in raw.items():
+        key = _ALIASES.get(str(key).strip().lower().replace(" ", "_"), str(key).strip().lower())
+        if key in fields or value in (None, "", []):
+            continue
+        if key == "file" or FIELDS.get(key, 0) is None:
+            fields[key] = _text(value, MAX_PURPOSE_CHARS)
+        elif key in FIELDS:
+            items = value if isinstance(value, list) else re.split(r"[;\n]|,\s", str(value))
+            seen, clean = set(), []
+            for item in items:
+                item = _text(item, MAX_ITEM_CHARS).strip(" -*")
+                if item and item.lower() not in seen:
+                    seen.add(item.lower())
+                    clean.append(item)
+            if clean:
+                fields[key] = clean[:FIELDS[key]]
+    if not fields.get("purpose"):
+        return None
+    return {key: fields[key] for key in ("file", *FIELDS) if key in fields}
+
+
+def _normalize_path(path):
+    path = path.strip().strip("`'\"").replace("\\", "/")
+    return path[2:] if path.startswith("./") else path
+
+
+def parse_records(response, paths):
+    """
+    {path: record} for the files in `paths` that the response has a valid record
+    for. Records are matched on their "file" (tolerating ./, backticks and
+    backslashes, or a unique basename); a lone record without one goes to a lone path.
+    """
+    by_name = {_normalize_path(p): p for p in paths}
+    basenames = Counter(p.rsplit("/", 1)[-1] for p in by_name)
+    records = {}
+    for value in _json_values(response):
+        for raw in _candidates(value):
+            record = validate(raw)
+            if record is None:
+                continue
+            name = _normalize_path(record.get("file", ""))
+            path = by_name.get(name)
+            if path is None and name and basenames[name.rsplit("/", 1)[-1]] == 1:
+                path = next((p for n, p in by_name.items() if n.rsplit("/", 1)[-1] == name.rsplit("/", 1)[-1]), None)
+            if path is None and not name and len(paths) == 1:
+                path = paths[0]
+            if path is not None and path not in records:
+                record["file"] = path
+                records[path] = record
+    return records
+
+
+def dumps(record):
+    # The stored summary string for a record
+    body = {key: value for key, value in record.items() if key != "file"}
+    return f"### {record['file']}\n" + json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+
+
+def load(summary):
+    """(header line, record) for a stored record summary, or None for any other summary."""
+    header, _, body = summary.partition("\n")
+    body = body.strip()
+    if not header.startswith("### ") or not body.startswith("{"):
+        return None
+    try:
+        record = json.loads(body)
+    except ValueError:
+        return None
+    record = validate(record)
+    return (header, record) if record is not None else None
+
+
+def _render_one(header, record, shared=frozenset(), brief=False):
+    lines = [header, record["purpose"]]
+    for key, limit in FIELDS.items():
+        if limit is None or key not in record or (brief and key in ("components", "links")):
+            continue
+        items = [item for item in record[key] if not (key == "deps" and item.lower() in shared)]
+        if items:
+            lines.append(f"- {key}: " + "; ".join(items))
+    return "\n".join(lines)
+
+
+def render(summaries, brief=False):
+    """
+    Dense text of the summaries for a prompt. Dependencies listed by two or
+    more records move to one "Shared dependencies" line; brief=True also drops
+    components and links (the fallback README prompt).
+    """
+    loaded = [load(summary) for summary in summaries]
+    counts = Counter(dep.lower() for item in loaded if item is not None for dep in item[1].get("deps", []))
+    shared = {dep for dep, count in counts.items() if count > 1}
+    spelled = {}
+    for item in loaded:
+        for dep in (item[1].get("deps", []) if item is not None else []):
+            spelled.setdefault(dep.lower(), dep)
+    blocks = []
+    if shared:
+        ordered = sorted(shared, key=lambda dep: (-counts[dep], dep))
+        blocks.append("Shared dependencies: " + ", ".join(f"{spelled[dep]} ({counts[dep]} files)" for dep in ordered))
+    for summary, item in zip(summaries, loaded):
+        blocks.append(summary if item is None else _render_one(*item, shared=shared, brief=brief))
+    return "\n\n".join(blocks)
+
+
+def render_one(summary):
+    # One summary on its own (summary tree items), dependencies kept
+    item = load(summary)
+    return summary if item is None else _render_one(*item)
@@ -0,0 +1,141 @@
+"""
+Hierarchical reduction of file summaries for large repositories.
+
+The README prompt can only hold so many tokens of summaries. Instead of cutting
+the list (or the joined text) at an arbitrary point, summaries are folded up the
+directory tree until they fit:
+
+    files ──> summaries per file (the normal summarize step, in parallel)
+          ──> per-directory summaries, deepest directories first
+          ──> ... ──> top-level module summaries that fit `final_budget`
+
+Each round looks at the deepest directory level still present. Its directories
+are reduced largest first, just enough that the total gets under the budget;
+the rest move up to their parent unchanged, so small directories are folded
+into their parent's summary later rather than getting a call of their own.
+A directory with more than `reduce_budget` tokens is split over several reduce
+calls. All reduce calls of a round run in parallel, so the number of sequential
+rounds grows with the tree depth, not with the number of files.
+
+The LLM call is injected (`reduce_fn(label, texts) -> text`), which keeps this
+module free of prompts and clients.
+"""
+import posixpath
+from collections import namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from token_packer import count_tokens, truncate_to_tokens
+
+# scope: directory the item currently belongs to ("" = repo root)
+# label: what the text describes (a file path, or a directory for reduced items)
+Item = namedtuple("Item", ["scope", "label", "text", "tokens"])
+
+
+def _depth(scope):
+    return scope.count("/") + 1 if scope else 0
+
+
+def _parent(scope):
+    return posixpath.dirname(scope)
+
+
+def _bins(items, budget):
+    # Next-fit in path order, so each request covers neighbouring files
+    bins, current, used = [], [], 0
+    for item in sorted(items, key=lambda i: i.label):
+        if current and used + item.tokens > budget:
+            bins.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += item.tokens
+    if current:
+        bins.append(current)
+    return bins
+
+
+class SummaryTree:
+    def __init__(self, reduce_fn, final_budget, reduce_budget, reduce_output_tokens, concurrency=3, log=print):
+        self.reduce_fn = reduce_fn
+        self.final_budget = final_budget
+        self.reduce_budget = reduce_budget
+        self.reduce_output_tokens = reduce_output_tokens
+        self.concurrency = concurrency
+        self.log = log
+        self.calls = 0
+        self.rounds = 0
+
+    def items_for_files(self, file_summaries):
+        # file_summaries: [(path, summary text)]
+        return [
+            Item(_parent(path.replace("\\", "/")), path, text, count_tokens(text))
+            for path, text in file_summaries
+        ]
+
+    def _reduce_bin(self, scope, bin_items, part, parts):
+        label = scope or "(repository root)"
+        if parts > 1:
+            label = f"{label} (part {part}/{parts})"
+        text = self.reduce_fn(label, [item.text for item in bin_items])
+        text = f"### 📁 {label}\n{text.strip()}"
+        return Item(_parent(scope), label, text, count_tokens(text))
+
+    def _plan(self, groups, total, budget):
+        # Largest directories first, until the projected total fits the budget
+        chosen = []
+        for scope, members in sorted(groups.items(), key=lambda g: -sum(i.tokens for i in g[1])):
+            if total <= budget:
+                break
+            size = sum(i.tokens for i in members)
+            bins = _bins(members, self.reduce_budget)
+            projected = len(bins) * self.reduce_output_tokens
+            if projected >= size:
+                continue  # reducing wouldn't make it smaller
+            chosen.append((scope, bins))
+            total -= size - projected
+        return chosen
+
+    def fit(self, items, final_budget=None):
+        """Reduce `items` until their total tokens fit; returns the remaining items in path order."""
+        final_budget = final_budget or self.final_budget
+        while True:
+            total = sum(i.tokens for i in items)
+            if total <= final_budget or not items:
+                break
+            depth = max(_depth(i.scope) for i in items)
+            deepest = [i for i in items if _depth(i.scope) == depth]
+            others = [i for i in items if _depth(i.scope) != depth]
+
+            groups = defaultdict(list)
+            for item in deepest:
+                groups[item.scope].append(item)
+            chosen = self._plan(groups, total, final_budget)
+
+            if not chosen and depth == 0:
+                # Nothing left to fold and still too big: cut the texts as a last resort
+                self.log(f"⚠️ Summaries still {total} tokens after reduction, truncating to {final_budget}")
+                return self._truncate(items, final_budget)
+
+            reduced = []
+            if chosen:
+                self.rounds += 1
+                jobs = [(scope, b, n, len(bins)) for scope, bins in chosen for n, b in enumerate(bins, start=1)]
+                self.log(f"🌳 Reduce round {self.rounds}: {len(jobs)} calls over {len(chosen)} "
+                         f"directories at depth {depth} ({total} tokens > {final_budget})")
+                with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(jobs)))) as pool:
+                    reduced = list(pool.map(lambda job: self._reduce_bin(*job), jobs))
+                self.calls += len(jobs)
+
+            done = {scope for scope, _ in chosen}
+            # Everything else at this depth moves up a level unchanged
+            lifted = [i._replace(scope=_parent(i.scope)) for i in deepest if i.scope not in done]
+            items = others + lifted + reduced
+        return sorted(items, key=lambda i: i.label)
+
+    @staticmethod
+    def _truncate(items, budget):
+        share = max(budget // max(len(items), 1), 50)
+        cut = []
+        for item in sorted(items, key=lambda i: i.label):
+            text, _ = truncate_to_tokens(item.text, share)
+            cut.append(item._replace(text=text, tokens=count_tokens(text)))
+        return cut
@@ -0,0 +1,88 @@
+"""
+Offline test setup: the fake LLM backend, no summary cache, no metrics or trace
+files, and the backend/python modules importable as top-level modules.
+"""
+import os
+import sys
+
+os.environ.update({
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_LATENCY": "0",
+    "SUMMARY_CACHE": "0",
+    "METRICS_FILE": "",
+    "TRACE_FILE": "",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+class FakeGemini:
+    """
+    Stands in for genai.GenerativeModel. Each call takes the next scripted
+    outcome: a string answers, an exception is raised; `delay` seconds first.
+    """
+
+    def __init__(self, outcomes=(), delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if self.outcomes else "OK"
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        class _Part:
+            text = outcome
+
+        class _Response:
+            parts = [_Part()]
+            usage_metadata = None
+
+        return _Response()
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """
+    make_manager(gemini=None, keys=()) builds a real LLMFallbackManager with the
+    given FakeGemini as its primary and Groq keys (point GROQ_BASE_URL at
+    benchmarks/fake_groq_server.py to use them). Its loop thread is stopped afterwards.
+    """
+    import llm_fallback
+
+    managers = []
+
+    def make_manager(gemini=None, keys=()):
+        monkeypatch.setattr(llm_fallback, "API_KEYS", list(keys) or ["unused"])
+        monkeypatch.setattr(llm_fallback, "DEFAULT_GEMINI_MODEL", "gemini-test")
+        monkeypatch.setattr(llm_fallback, "GEMINI_TARGET", ("gemini", "gemini-test"))
+        instance = llm_fallback.LLMFallbackManager()
+        instance.api_keys = list(keys)
+        instance.gemini_model = gemini
+        managers.append(instance)
+        return instance
+
+    yield make_manager
+    for instance in managers:
+        instance._loop.call_soon_threadsafe(instance._loop.stop)
+
+
+@pytest.fixture
+def fake_groq(request, monkeypatch):
+    """
+    benchmarks/fake_groq_server.py on a free port, with GROQ_BASE_URL pointing at
+    it; yields its FakeGroqState. Parametrize indirectly to pass start_server options.
+    """
+    from benchmarks.fake_groq_server import start_server
+
+    options = dict({"tpm": 100_000, "latency": 0.0}, **getattr(request, "param", {}))
+    server, state = start_server(port=0, **options)
+    monkeypatch.setenv("GROQ_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield state
+    server.shutdown()
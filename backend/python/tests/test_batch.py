@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import batch
+
+
+@pytest.fixture
+def batch_dir(tmp_path, monkeypatch):
+    # Manifests and the code index go to the temp folder, not backend/python/.cache
+    monkeypatch.setenv("RUN_MANIFEST_DIR", str(tmp_path / "manifests"))
+    monkeypatch.setenv("CODE_INDEX_DIR", str(tmp_path / "code_index"))
+    return tmp_path
+
+
+def _repo(root, name):
+    repo = root / name
+    repo.mkdir()
+    (repo / "main.py").write_text("def main():\n    print('hello')\n")
+    (repo / "package.json").write_text('{"name": "%s"}\n' % name)
+    return str(repo)
+
+
+def _run(jobs, root):
+    return batch.run_batch(jobs, 2, str(root / "state.jsonl"), str(root / "report.json"), str(root / "logs"))
+
+
+def test_read_jobs_accepts_paths_and_json_objects(tmp_path):
+    path = tmp_path / "repos.txt"
+    path.write_text('# comment\n\n/repos/a\n{"repo_path": "/repos/b", "rev": "v1", "full": true}\n')
+    assert batch.read_jobs(str(path)) == [
+        {"repo_path": "/repos/a"},
+        {"repo_path": "/repos/b", "rev": "v1", "full": True},
+    ]
+    path.write_text('{"rev": "v1"}\n')
+    with pytest.raises(ValueError, match="repo_path"):
+        batch.read_jobs(str(path))
+
+
+def test_load_state_keeps_the_last_record_and_ignores_a_torn_line(tmp_path):
+    path = tmp_path / "state.jsonl"
+    path.write_text(
+        json.dumps({"key": "a", "status": "failed"}) + "\n"
+        + json.dumps({"key": "a", "status": "done"}) + "\n"
+        + '{"key": "b", "sta'
+    )
+    assert batch.load_state(str(path)) == {"a": {"key": "a", "status": "done"}}
+    assert batch.load_state(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_rerun_skips_finished_jobs_and_retries_failed_ones(batch_dir):
+    first, second = _repo(batch_dir, "first"), _repo(batch_dir, "second")
+    missing = str(batch_dir / "missing")
+    jobs = [{"repo_path": first}, {"repo_path": missing}, {"repo_path": second}, {"repo_path": first}]
+
+    report = _run(jobs, batch_dir)
+    assert (report["totals"]["run"], report["totals"]["done"], report["totals"]["failed"]) == (3, 2, 1)
+    assert report["totals"]["llm_calls"] > 0
+    assert report["batch"] == {"jobs": 4, "done": 3, "failed": 1, "pending": 0}
+    assert (batch_dir / "first" / "readme.md").exists()
+    state = batch.load_state(str(batch_dir / "state.jsonl"))
+    assert state[batch.job_key({"repo_path": missing})]["status"] == "failed"
+
+    # Only the failed job runs again; once its repo exists it finishes
+    _repo(batch_dir, "missing")
+    report = _run(jobs, batch_dir)
+    assert report["totals"]["run"] == 1 and report["totals"]["done"] == 1
+    assert report["batch"] == {"jobs": 4, "done": 4, "failed": 0, "pending": 0}
+    assert [repo["status"] for repo in report["repos"]] == ["done"] * 4
+
+    report = _run(jobs, batch_dir)
+    assert report["totals"]["run"] == 0
@@ -0,0 +1,38 @@
+import pytest
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+MODEL = "llama-3.3-70b-versatile"
+
+
+def _key(limiter, index):
+    return next(item for item in limiter.snapshot() if item["key"] == index + 1 and item["model"] == MODEL)
+
+
+@pytest.mark.parametrize("fake_groq", [{"rpm": 3}], indirect=True)
+def test_429_with_retry_after_rotates_to_the_next_key(fake_groq, manager):
+    llm = manager(keys=["key-a", "key-b"])
+    llm.models = [MODEL]
+    # Someone else already spent key-a's requests for this minute; our limiter doesn't know yet
+    for _ in range(3):
+        fake_groq.admit("key-a", 10)
+
+    assert llm.make_request(MESSAGES, max_tokens=16, max_retries=3) == "OK"
+    assert fake_groq.rejected == 1
+    # The 429's retry-after / reset headers took key-a out of rotation...
+    assert _key(llm.limiter, 0)["blocked_for"] > 1
+    # ...so the next requests go straight to key-b without another 429
+    for _ in range(2):
+        assert llm.make_request(MESSAGES, max_tokens=16, max_retries=3) == "OK"
+    assert fake_groq.rejected == 1
+    assert len(fake_groq.windows["key-b"].requests) == 3
+
+
+@pytest.mark.parametrize("fake_groq", [{"rpm": 3}], indirect=True)
+def test_headers_steer_requests_before_a_429(fake_groq, manager):
+    llm = manager(keys=["key-a", "key-b"])
+    llm.models = [MODEL]
+    # 3 requests/min per key: the x-ratelimit headers spread six requests over both keys
+    for _ in range(6):
+        assert llm.make_request(MESSAGES, max_tokens=16, max_retries=3) == "OK"
+    assert fake_groq.rejected == 0
+    assert {len(fake_groq.windows[key].requests) for key in ("key-a", "key-b")} == {3}
@@ -0,0 +1,56 @@
+import pytest
+
+import llm_fallback
+import provider_health
+from conftest import FakeGemini
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+GEMINI = ("gemini", "gemini-test")  # set by the manager fixture
+MODEL = "llama-3.3-70b-versatile"
+
+
+@pytest.fixture
+def hedged(monkeypatch, manager, fake_groq):
+    # Gemini primary with Groq (on the fake server) to hedge on; hedging after 50ms
+    monkeypatch.setattr(llm_fallback, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_fallback, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(llm_fallback, "HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(llm_fallback, "HEDGE_BUDGET", 1.0)
+
+    def make(gemini):
+        llm = manager(gemini, keys=["key-a"])
+        llm.models = [MODEL]
+        llm.health.record_success(GEMINI, 0.01)
+        llm.tokens_used = 100_000
+        return llm
+
+    return make
+
+
+def test_slow_primary_is_hedged_and_the_hedge_wins(hedged, fake_groq):
+    llm = hedged(FakeGemini(["from gemini"], delay=3))
+    assert llm.make_request(MESSAGES, max_tokens=16) == "OK"
+    assert fake_groq.accepted == 1
+    assert llm.hedge_tokens > 0
+
+
+def test_fast_primary_is_not_hedged(hedged, fake_groq):
+    llm = hedged(FakeGemini(["from gemini"]))
+    assert llm.make_request(MESSAGES, max_tokens=16) == "from gemini"
+    assert fake_groq.accepted == 0 and llm.hedge_tokens == 0
+
+
+def test_hedges_stay_within_the_token_budget(hedged, fake_groq):
+    llm = hedged(FakeGemini(["from gemini"], delay=0.3))
+    llm.tokens_used = 0
+    assert llm.make_request(MESSAGES, max_tokens=16) == "from gemini"
+    assert fake_groq.accepted == 0
+
+
+def test_losing_probe_is_released_when_the_hedge_wins(hedged, fake_groq):
+    # The primary is the half-open probe; cancelling it must not leave the circuit stuck
+    llm = hedged(FakeGemini(["from gemini"], delay=3))
+    llm.health.trip(GEMINI, 0.0)
+    assert llm.make_request(MESSAGES, max_tokens=16) == "OK"
+    assert llm.health_state()[0]["state"] == provider_health.HALF_OPEN
+    assert llm.health.available(GEMINI)
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import llm_fallback
+from conftest import FakeGemini
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def test_sync_callers_share_the_loop_without_blocking_each_other(manager):
+    llm = manager(FakeGemini(delay=0.2))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm.make_request(MESSAGES))) for _ in range(5)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["OK"] * 5
+    # Five 0.2s requests overlap on the one loop thread instead of running back to back
+    assert time.perf_counter() - started < 0.6
+
+
+def test_amake_request_from_another_event_loop(manager):
+    llm = manager(FakeGemini(["a", "b", "c"], delay=0.1))
+
+    async def main():
+        assert asyncio.get_running_loop() is not llm._loop
+        return await asyncio.gather(*(llm.amake_request(MESSAGES) for _ in range(3)))
+
+    assert sorted(asyncio.run(main())) == ["a", "b", "c"]
+
+
+def test_amake_request_on_the_manager_loop(manager):
+    llm = manager(FakeGemini(["on loop"]))
+
+    async def on_loop():
+        assert threading.current_thread() is llm._loop_thread
+        return await llm.amake_request(MESSAGES)
+
+    assert asyncio.run_coroutine_threadsafe(on_loop(), llm._loop).result(timeout=5) == "on loop"
+
+
+def test_groq_requests_are_bounded_per_key_and_model(manager, fake_groq, monkeypatch):
+    monkeypatch.setattr(llm_fallback, "MAX_INFLIGHT_PER_KEY", 2)
+    fake_groq.latency = 0.2
+    llm = manager(keys=["key-a"])
+    llm.models = ["llama-3.3-70b-versatile"]
+
+    async def main():
+        return await asyncio.gather(*(llm.amake_request(MESSAGES, max_tokens=16) for _ in range(4)))
+
+    started = time.perf_counter()
+    assert asyncio.run(main()) == ["OK"] * 4
+    # Two at a time: two rounds of 0.2s
+    assert 0.38 < time.perf_counter() - started < 1.5
@@ -0,0 +1,92 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+import llm_fallback
+import provider_health
+from conftest import FakeGemini
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+GEMINI = ("gemini", "gemini-test")  # set by the manager fixture
+
+
+@pytest.fixture(autouse=True)
+def quick_breaker(monkeypatch):
+    monkeypatch.setattr(provider_health, "COOLOFF", 0.2)
+    monkeypatch.setattr(provider_health, "MIN_FAILURES", 3)
+
+
+def _request(llm, **kwargs):
+    # Off the test thread, so a hang fails the test instead of blocking the run
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(llm.make_request(MESSAGES, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future.result(timeout=5)
+
+
+def _on_loop(llm, coro):
+    return asyncio.run_coroutine_threadsafe(coro, llm._loop).result(timeout=5)
+
+
+def _open_gemini(llm):
+    for _ in range(3):
+        llm.health.record_failure(GEMINI)
+    assert llm.health_state()[0]["state"] == provider_health.OPEN
+    time.sleep(0.25)  # past the cool-off
+
+
+def test_context_error_on_a_probe_does_not_wedge_the_breaker(manager):
+    # Gemini-only: three failures open the circuit, then the probe hits a too-long prompt
+    llm = manager(FakeGemini([Exception("input token count exceeds the limit")]))
+    _open_gemini(llm)
+    with pytest.raises(Exception, match="token count"):
+        _request(llm, max_retries=1)
+    assert llm.health_state()[0]["state"] == provider_health.HALF_OPEN
+    # The probe was released, so the next request probes (and closes the circuit)
+    assert _request(llm, max_retries=1) == "OK"
+    assert llm.health_state()[0]["state"] == provider_health.CLOSED
+
+
+def test_probe_failure_and_success(manager):
+    llm = manager(FakeGemini([Exception("503 backend error"), "fine"]))
+    _open_gemini(llm)
+    with pytest.raises(Exception, match="503"):
+        _request(llm, max_retries=1)
+    assert llm.health_state()[0]["state"] == provider_health.OPEN
+    time.sleep(0.45)  # the cool-off doubled
+    assert _request(llm, max_retries=1) == "fine"
+    assert llm.health_state()[0]["state"] == provider_health.CLOSED
+
+
+def test_cancelled_probe_is_released(manager):
+    llm = manager(FakeGemini(delay=5))
+    llm.health.trip(GEMINI, 0.0)
+
+    async def cancel_probe():
+        call = llm_fallback._Call(MESSAGES, 16, 0.2, None, None, 1)
+        task = asyncio.ensure_future(llm._gemini_attempt(call, 0, 0.0))
+        await asyncio.sleep(0.05)
+        assert not llm.health.available(GEMINI)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    _on_loop(llm, cancel_probe())
+    assert llm.health.available(GEMINI)
+
+
+def test_circuit_waits_count_towards_max_retries(manager):
+    gemini = FakeGemini()
+    llm = manager(gemini)
+    llm.health.trip(GEMINI, 0.1, "quota")
+    with pytest.raises(Exception, match="after 1 attempts"):
+        _request(llm, max_retries=1)
+    assert gemini.calls == 0
@@ -0,0 +1,56 @@
+from near_dup import NearDuplicates, find_near_duplicates, jaccard, shingles
+from scanner import FileEntry
+
+
+def _page(name, extra=""):
+    lines = [f"import {{ Layout }} from '../components/Layout';", f"export const title = '{name} page';",
+             "export default function Page() {", "  const [state, setState] = useState(null);",
+             "  useEffect(() => { load().then(setState); }, []);", "  if (!state) return <Spinner />;",
+             "  const onSave = () => save(state).then(() => toast('Saved'));",
+             "  const onReset = () => setState(null);", "  const columns = useColumns(state);",
+             "  const filters = useFilters(state, columns);", "  const rows = applyFilters(state.rows, filters);",
+             "  return <Layout title={title}>{render(rows, columns, onSave, onReset)}</Layout>;", "}", extra]
+    return "\n".join(lines * 3)
+
+
+def _find(files, **kwargs):
+    entries = [FileEntry(path, len(text), 0.0) for path, text in files.items()]
+    return find_near_duplicates(entries, lambda path, max_chars: files[path][:max_chars], **kwargs)
+
+
+def test_shingles_fold_digits_and_keep_data_keys():
+    assert shingles("port = 3000\nport = 8080") == shingles("port = 1111")
+    assert shingles('"title": "Hello"', data=True) == shingles('"title": "Bonjour"', data=True)
+    assert jaccard(set(), set()) == 0.0
+
+
+def test_template_pages_cluster_and_unrelated_files_dont():
+    files = {
+        "pages/a.jsx": _page("A"),
+        "pages/b.jsx": _page("B", "// b"),
+        "pages/c.jsx": _page("C"),
+        "src/server.jsx": "\n".join(f"const handler{i} = route('/api/v{i}', controller{chr(97 + i)});" for i in range(20)),
+        "pages/a.py": _page("A"),
+    }
+    result = _find(files, threshold=0.75)
+    assert result.clusters == [["pages/a.jsx", "pages/b.jsx", "pages/c.jsx"]]
+    assert result.duplicates == 2
+
+
+def test_locale_files_cluster_on_keys():
+    keys = ["title", "subtitle", "login", "logout", "signup", "welcome", "error", "retry"]
+    files = {
+        f"locales/{lang}.json": "{\n" + ",\n".join(f'  "{key}": "{lang}-{key}-text"' for key in keys) + "\n}"
+        for lang in ("en", "fr", "de")
+    }
+    assert len(_find(files, threshold=0.75)) == 1
+
+
+def test_clustering_is_deterministic():
+    files = {f"gen/client{i}.jsx": _page(f"client{i}") for i in range(6)}
+    assert _find(files).clusters == _find(files).clusters
+
+
+def test_collapse_keeps_the_best_ranked_member():
+    dups = NearDuplicates([["a", "b", "c"]])
+    assert dups.collapse(["x", "c", "a", "y"]) == (["x", "c", "y"], {"c": ["a", "b"]})
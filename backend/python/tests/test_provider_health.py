@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+import provider_health
+from provider_health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+
+TARGET = ("groq", "m")
+
+
+@pytest.fixture
+def health(monkeypatch):
+    monkeypatch.setattr(provider_health, "COOLOFF", 0.05)
+    monkeypatch.setattr(provider_health, "MIN_FAILURES", 3)
+    return ProviderHealth(log=lambda message: None)
+
+
+def _trip(health):
+    for _ in range(3):
+        health.begin(TARGET)
+        health.record_failure(TARGET)
+    assert health.snapshot()[0]["state"] == OPEN
+    assert not health.available(TARGET)
+    time.sleep(0.06)
+    assert health.available(TARGET)
+
+
+def _state(health):
+    return health.snapshot()[0]["state"]
+
+
+def test_probe_success_closes(health):
+    _trip(health)
+    assert health.begin(TARGET) is True
+    assert _state(health) == HALF_OPEN
+    # Only one probe at a time
+    assert not health.available(TARGET) and health.begin(TARGET) is False
+    health.record_success(TARGET, 0.1)
+    assert _state(health) == CLOSED and health.available(TARGET)
+
+
+def test_probe_failure_reopens_with_a_longer_cooloff(health):
+    _trip(health)
+    health.begin(TARGET)
+    health.record_failure(TARGET)
+    assert _state(health) == OPEN
+    assert health.reopens_in(TARGET) > 0.08
+
+
+def test_probe_without_verdict_is_released(health):
+    # A cancelled probe, or one that failed on a too-long prompt
+    _trip(health)
+    assert health.begin(TARGET) is True
+    assert health.reopens_in(TARGET) == 1.0
+    health.release(TARGET)
+    assert _state(health) == HALF_OPEN
+    assert health.available(TARGET) and health.reopens_in(TARGET) == 0.0
+    assert health.begin(TARGET) is True
+
+
+def test_release_leaves_other_states_alone(health):
+    health.release(TARGET)
+    assert _state(health) == CLOSED
+    health.trip(TARGET, 60, "rate limit")
+    health.release(TARGET)
+    assert _state(health) == OPEN and not health.available(TARGET)
+
+
+def test_trip_clears_a_probe(health):
+    _trip(health)
+    health.begin(TARGET)
+    health.trip(TARGET, 0.01, "rate limit")
+    time.sleep(0.02)
+    assert health.available(TARGET)
@@ -0,0 +1,50 @@
+import pytest
+
+from rate_limiter import RateLimiter, parse_duration
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("2m59.56s", 179.56), ("7.66s", 7.66), ("120ms", 0.12), ("1h", 3600), ("3", 3.0), (None, None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def _state(limiter):
+    return limiter.snapshot()[0]
+
+
+def test_token_headers_set_capacity_and_remaining():
+    limiter = RateLimiter(1, rpm=30, tpm=12000)
+    limiter.update_from_headers(0, "m", {
+        "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-remaining-tokens": "1500",
+        "x-ratelimit-reset-tokens": "45s",
+    })
+    state = _state(limiter)
+    assert state["tokens_per_min"] == 6000
+    assert 1500 <= state["tokens_available"] < 1600
+    assert state["blocked_for"] == 0
+
+
+def test_exhausted_daily_requests_block_the_key():
+    limiter = RateLimiter(2, rpm=30, tpm=12000)
+    limiter.update_from_headers(0, "m", {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2m"})
+    assert _state(limiter)["blocked_for"] > 100
+    # The other key takes the next request
+    assert limiter.reserve("m", 100) == (1, 0.0)
+
+
+def test_retry_after_blocks_and_throttles():
+    limiter = RateLimiter(1, rpm=30, tpm=12000)
+    limiter.update_from_headers(0, "m", {"retry-after": "7"})
+    key, wait = limiter.reserve("m", 100)
+    assert key is None and 6 < wait <= 7
+
+
+def test_missing_or_bad_headers_change_nothing():
+    limiter = RateLimiter(1, rpm=30, tpm=12000)
+    limiter.update_from_headers(0, "m", None)
+    limiter.update_from_headers(0, "m", {"x-ratelimit-remaining-tokens": "lots"})
+    assert limiter.reserve("m", 100) == (0, 0.0)
+    assert _state(limiter)["tokens_per_min"] == 12000
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from agents_groq import README_CHUNK_PREFIX, README_RESET, ReadmeStream
+
+MESSAGES = [{"role": "user", "content": "write a readme"}]
+MODEL = "llama-3.3-70b-versatile"
+
+
+def _markers(capsys):
+    return [line for line in capsys.readouterr().out.splitlines()
+            if line.startswith((README_CHUNK_PREFIX, README_RESET))]
+
+
+def test_stream_forwards_whole_lines(capsys):
+    stream = ReadmeStream(min_chars=200)
+    for piece in ["# Ti", "tle\n", "Some ", "text"]:
+        stream(piece)
+    stream.flush()
+    assert _markers(capsys) == [
+        README_CHUNK_PREFIX + json.dumps("# Title\n"),
+        README_CHUNK_PREFIX + json.dumps("Some text"),
+    ]
+
+
+def test_reset_is_only_sent_after_text_was_shown(capsys):
+    stream = ReadmeStream()
+    stream("unsent")
+    stream(None)
+    assert _markers(capsys) == []
+
+    stream("line\n")
+    stream(None)
+    stream("again\n")
+    assert _markers(capsys) == [
+        README_CHUNK_PREFIX + json.dumps("line\n"),
+        README_RESET,
+        README_CHUNK_PREFIX + json.dumps("again\n"),
+    ]
+
+
+class _Collector:
+    # What a client rebuilds from on_chunk calls, dropping its text on a reset
+    def __init__(self):
+        self.text, self.resets = "", 0
+
+    def __call__(self, piece):
+        if piece is None:
+            self.text, self.resets = "", self.resets + 1
+        else:
+            self.text += piece
+
+
+def test_streamed_completion_matches_the_chunks(fake_groq, manager):
+    llm = manager(keys=["key-a"])
+    llm.models = [MODEL]
+    collector = _Collector()
+    content = llm.make_request(MESSAGES, max_tokens=64, on_chunk=collector)
+    assert content.startswith("# Streamed README")
+    assert collector.text == content and collector.resets == 0
+
+
+@pytest.mark.parametrize("fake_groq", [{"fail_streams": 1}], indirect=True)
+def test_stream_cut_off_midway_is_reset_and_retried(fake_groq, manager):
+    llm = manager(keys=["key-a"])
+    llm.models = [MODEL]
+    collector = _Collector()
+    content = llm.make_request(MESSAGES, max_tokens=64, max_retries=3, on_chunk=collector)
+    # The half-finished first stream was discarded; the client ends up with exactly the retry
+    assert collector.resets == 1
+    assert collector.text == content
+    assert content.count("# Streamed README") == 1 and "Line 8" in content
+    assert fake_groq.accepted == 2
@@ -0,0 +1,82 @@
+import pytest
+
+from run_manifest import load_manifest, merge_sections, plan_rerun, save_manifest, split_sections
+
+README = """# Project
+
+Intro text.
+
+## 🚀 Features
+
+- Old feature
+
+## Installation
+
+```bash
+## not a heading inside a fence
+npm install
+```
+
+## License
+
+MIT
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_MANIFEST_DIR", str(tmp_path / "store"))
+    return save_manifest(
+        str(tmp_path / "out"), "https://example.com/repo.git",
+        fingerprint="fp1", commit="abc", shown_files=["a.py", "b.py", "c.py"], selected_files=["a.py", "b.py"],
+        file_hashes={"a.py": "h-a", "b.py": "h-b"}, file_summaries={"a.py": "### a.py\nA", "b.py": "### b.py\nB"},
+        readme=README,
+    )
+
+
+def _hashes(**overrides):
+    hashes = {"a.py": "h-a", "b.py": "h-b", "c.py": "h-c"}
+    hashes.update(overrides)
+    return hashes.get
+
+
+def test_manifest_round_trip_through_the_store(manifest, tmp_path):
+    # A fresh output folder (new request) still finds the manifest by repo identity
+    assert load_manifest(str(tmp_path / "elsewhere"), "https://example.com/repo.git") == manifest
+    assert load_manifest(str(tmp_path / "elsewhere"), "https://example.com/other.git") is None
+
+
+def test_plan_modes(manifest):
+    shown = ["a.py", "b.py", "c.py"]
+    assert plan_rerun(None, "fp1", shown, _hashes()).mode == "full"
+    assert plan_rerun(manifest, "fp2", shown, _hashes()).mode == "full"
+
+    skip = plan_rerun(manifest, "fp1", shown, _hashes())
+    assert skip.mode == "skip" and skip.selected_files == ["a.py", "b.py"]
+
+    changed = plan_rerun(manifest, "fp1", shown, _hashes(**{"b.py": "h-b2"}))
+    assert changed.mode == "incremental"
+    assert changed.selected_files == ["a.py", "b.py"] and list(changed.reuse_summaries) == ["a.py"]
+
+    deleted = plan_rerun(manifest, "fp1", shown, _hashes(**{"b.py": None}))
+    assert deleted.mode == "incremental" and deleted.selected_files == ["a.py"]
+
+    reselect = plan_rerun(manifest, "fp1", shown + ["d.py"], _hashes())
+    assert reselect.mode == "incremental" and reselect.selected_files is None
+    assert set(reselect.reuse_summaries) == {"a.py", "b.py"}
+
+
+def test_split_sections_ignores_headings_in_code_fences():
+    headings = [heading for heading, _ in split_sections(README)]
+    assert headings == ["", "## 🚀 Features", "## Installation", "## License"]
+
+
+def test_merge_sections_replaces_by_heading_and_appends_new_ones():
+    updates = "## Features\n\n- New feature\n\n## Usage\n\nRun it.\n"
+    merged, applied = merge_sections(README, updates)
+    assert applied == 2
+    assert "- New feature" in merged and "Old feature" not in merged
+    # The rest is untouched, in order, with the new section at the end
+    assert merged.index("## Installation") < merged.index("## License") < merged.index("## Usage")
+    assert "npm install" in merged and merged.startswith("# Project\n\nIntro text.")
+    assert merge_sections(README, "no headings here") == (README, 0)
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from scanner import scan_repo, index_from_listing
+
+
+def _write(root, rel_path, text="x = 1\n"):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _paths(root, **kwargs):
+    return [entry.path.replace(os.sep, "/") for entry in scan_repo(str(root), **kwargs)]
+
+
+def test_skips_junk_dirs_suffixes_and_hidden_files(tmp_path):
+    for rel_path in ("app.py", "src/index.js", "node_modules/lib/index.js", "dist/bundle.js",
+                     "static/app.min.js", "logo.png", ".secret", ".env"):
+        _write(tmp_path, rel_path)
+    assert _paths(tmp_path) == [".env", "app.py", "src/index.js"]
+
+
+def test_gitignore_rules(tmp_path):
+    _write(tmp_path, ".gitignore", "*.generated.js\n/out\nbuild-*/\n!keep.generated.js\nsrc/**/fixtures\n")
+    _write(tmp_path, "src/.gitignore", "local.txt\n")
+    for rel_path in ("a.generated.js", "keep.generated.js", "out/report.txt", "lib/out/kept.txt",
+                     "build-x/main.js", "build-y", "src/deep/fixtures/data.json", "src/local.txt",
+                     "local.txt", "src/main.js"):
+        _write(tmp_path, rel_path)
+    assert _paths(tmp_path) == [
+        ".gitignore", "build-y", "keep.generated.js", "local.txt",
+        "src/.gitignore", "src/main.js", "lib/out/kept.txt",
+    ]
+    assert "out/report.txt" in _paths(tmp_path, use_gitignore=False)
+
+
+def test_size_limit_and_binary_sniff(tmp_path):
+    _write(tmp_path, "big.txt", "x" * 200)
+    _write(tmp_path, "small.txt", "x" * 20)
+    (tmp_path / "blob.dat").write_bytes(b"abc\0def")
+    (tmp_path / "notes.dat").write_bytes(b"plain text")
+    assert _paths(tmp_path, max_file_bytes=100) == ["notes.dat", "small.txt"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlinks(tmp_path):
+    repo, outside = tmp_path / "repo", tmp_path / "outside"
+    _write(repo, "src/real.py")
+    _write(outside, "secret.py")
+    _write(outside, "tree/mod.py")
+    try:
+        os.symlink(repo / "src" / "real.py", repo / "alias.py")
+    except OSError:
+        pytest.skip("symlinks not permitted")
+    os.symlink(outside / "secret.py", repo / "escape.py")
+    os.symlink(outside / "tree", repo / "linked_tree")
+    os.symlink(repo / "src", repo / "src_again")
+    os.symlink(repo / "missing.py", repo / "dangling.py")
+
+    entries = {entry.path.replace(os.sep, "/"): entry for entry in scan_repo(str(repo))}
+    # File links inside the repo are kept (with the target's size); links out of it,
+    # directory links and dangling links are not
+    assert sorted(entries) == ["alias.py", "src/real.py"]
+    assert entries["alias.py"].size == entries["src/real.py"].size
+
+
+def test_index_from_listing():
+    listing = [("src/app.py", 10), ("node_modules/x/index.js", 10), ("big.js", 999), ("lfs.bin", 10),
+               ("partial.js", None), ("README.md", 5)]
+    entries = index_from_listing(listing, max_file_bytes=100)
+    assert [entry.path.replace(os.sep, "/") for entry in entries] == ["README.md", "src/app.py"]
@@ -0,0 +1,61 @@
+import agents_groq
+from skeleton import outline, language
+from tools import FileContent
+
+
+def _handlers(count):
+    return "".join(f"\n\ndef handler_{i}(request):\n    \"\"\"Handle case {i}.\"\"\"\n    return {i}\n" for i in range(count))
+
+
+def test_language():
+    assert language("src/app.py") == "py"
+    assert language("README.md") is None
+
+
+def test_python_outline_keeps_signatures_and_drops_bodies():
+    text = '"""Service entry point."""\nimport os\n\nclass Store:\n    def get(self, key):\n        return key * 2\n' + _handlers(3)
+    result = outline("main.py", text, 500)
+    assert '"""Service entry point."""' in result
+    assert "class Store" in result and "def get(self, key)" in result
+    assert "def handler_2(request)" in result
+    assert "return key * 2" not in result
+
+
+def test_bare_annotation_does_not_crash():
+    # Annotation-only assigns have no value (used to raise in ast.unparse)
+    text = "TIMEOUT: int\nRETRIES: int = 3\n" + _handlers(200)
+    result = outline("main.py", text, 400)
+    assert result is not None
+    assert "def handler_0(request)" in result
+
+
+def test_outline_fits_budget():
+    from token_packer import count_tokens
+    result = outline("main.py", _handlers(500), 300)
+    assert count_tokens(result) <= 300
+
+
+def test_brace_language_outline():
+    text = ("import express from 'express';\nconst app = express();\n\n"
+            "export function start(port) {\n  const server = app.listen(port);\n  return server;\n}\n\n"
+            "app.get('/api/users', (req, res) => {\n  res.json([]);\n});\n")
+    result = outline("src/server.js", text, 300)
+    assert "start(port)" in result
+    assert "/api/users" in result
+    assert "app.listen(port)" not in result
+
+
+def test_unsupported_language():
+    assert outline("notes.txt", "hello", 100) is None
+
+
+def test_file_content_falls_back_to_prefix_when_outline_fails(monkeypatch):
+    def broken(path, text, max_tokens):
+        raise AttributeError("boom")
+
+    monkeypatch.setattr(agents_groq, "outline", broken)
+    text = "import os\n" + _handlers(200)
+    label, content, cut = agents_groq._file_content("main.py", FileContent(text, False, len(text), False, None), 2500, 200)
+    assert label == "Content"
+    assert cut
+    assert content.startswith("import os")
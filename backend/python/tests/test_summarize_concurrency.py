@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+import agents_groq
+import tools
+from fake_llm import FakeLLM
+
+
+class _CountingLLM(FakeLLM):
+    # Records the most requests that were ever in flight at once
+    def __init__(self, latency):
+        super().__init__(latency=latency)
+        self.in_flight = 0
+        self.peak = 0
+        self.counter_lock = threading.Lock()
+
+    def make_request(self, messages, **kwargs):
+        with self.counter_lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super().make_request(messages, **kwargs)
+        finally:
+            with self.counter_lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    names = ["package.json", "Dockerfile", "main.py"] + [f"src/mod{i}.py" for i in range(8)]
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"# {name}\nVALUE = 1\n")
+    for name in ("repo_base_path", "git_source", "code_index"):
+        monkeypatch.setattr(tools, name, getattr(tools, name))
+    tools.set_repo_path(str(tmp_path))
+    monkeypatch.setenv("FILES_PER_REQUEST", "1")
+    monkeypatch.setenv("SUMMARIZE_CONCURRENCY", "2")
+    return names
+
+
+def test_speculation_and_batches_share_the_concurrency_cap(repo, monkeypatch):
+    llm = _CountingLLM(latency=0.05)
+    monkeypatch.setattr(agents_groq, "llm", llm)
+    speculation = agents_groq._start_speculation(repo)
+    assert speculation is not None and "package.json" in speculation.files
+
+    selected = list(reversed(repo))
+    result = agents_groq.agent_summarize_files({"selected_files": selected, "speculation": speculation})
+    speculation.future.result(timeout=5)
+
+    assert llm.peak <= 2
+    # Summaries come back in selection order, whichever batch finished first
+    assert [summary.split("\n", 1)[0][4:] for summary in result["summaries"]] == selected
+
+
+def test_batches_run_concurrently(repo, monkeypatch):
+    llm = _CountingLLM(latency=0.1)
+    monkeypatch.setattr(agents_groq, "llm", llm)
+    started = time.perf_counter()
+    agents_groq.agent_summarize_files({"selected_files": repo})
+    # 11 one-file batches at 0.1s each, two at a time
+    assert llm.peak == 2
+    assert time.perf_counter() - started < 1.0
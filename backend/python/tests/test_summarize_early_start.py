@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+import agents_groq
+import summary_cache
+import tools
+from fake_llm import FakeLLM
+
+
+class _GatedLLM(FakeLLM):
+    # Requests mentioning `slow_file` wait until the test opens the gate
+    def __init__(self, slow_file):
+        super().__init__(latency=0)
+        self.slow_file = slow_file
+        self.gate = threading.Event()
+
+    def make_request(self, messages, **kwargs):
+        if self.slow_file in messages[0]["content"]:
+            assert self.gate.wait(5)
+        return super().make_request(messages, **kwargs)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    for name in ("a.py", "b.py", "c.py", "slow.py"):
+        (tmp_path / name).write_text(f"def {name[:-3]}():\n    return 1\n")
+    for name in ("repo_base_path", "git_source", "code_index"):
+        monkeypatch.setattr(tools, name, getattr(tools, name))
+    tools.set_repo_path(str(tmp_path))
+    monkeypatch.setenv("SUMMARY_CACHE", "1")
+    monkeypatch.setenv("SUMMARY_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(summary_cache, "_cache", None)
+    monkeypatch.setenv("FILES_PER_REQUEST", "1")
+    monkeypatch.setenv("SUMMARIZE_CONCURRENCY", "4")
+    return tmp_path
+
+
+def test_batches_left_running_at_an_early_start_still_fill_the_cache(repo, monkeypatch):
+    llm = _GatedLLM("slow.py")
+    monkeypatch.setattr(agents_groq, "llm", llm)
+    monkeypatch.setenv("README_START_FRACTION", "0.75")
+
+    result = agents_groq.agent_summarize_files({"selected_files": ["a.py", "b.py", "c.py", "slow.py"]})
+    assert sorted(result["file_summaries"]) == ["a.py", "b.py", "c.py"]
+
+    llm.gate.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        found, _, _ = agents_groq._cache_lookup(["slow.py"])
+        if found:
+            break
+        time.sleep(0.02)
+    assert "slow.py" in found
+
+    # The next run pays for nothing
+    calls = llm.calls
+    result = agents_groq.agent_summarize_files({"selected_files": ["a.py", "b.py", "c.py", "slow.py"]})
+    assert len(result["file_summaries"]) == 4 and llm.calls == calls
@@ -0,0 +1,82 @@
+import json
+
+from fake_llm import FakeLLM
+from summary_records import dumps, load, parse_records, render, render_one, validate
+
+PATHS = ["src/server.js", "src/routes/users.js"]
+
+
+def test_fenced_array_with_aliases_and_prose():
+    response = (
+        "Here are the summaries:\n```json\n"
+        '[{"path": "./src/server.js", "summary": "Starts the API.", "dependencies": "express, mongoose",},\n'
+        ' {"file": "`src\\\\routes\\\\users.js`", "description": "User routes.", "endpoints": ["GET /api/users"]}]\n'
+        "```\nLet me know if you need more."
+    )
+    records = parse_records(response, PATHS)
+    assert records["src/server.js"] == {"file": "src/server.js", "purpose": "Starts the API.",
+                                        "deps": ["express", "mongoose"]}
+    assert records["src/routes/users.js"]["routes"] == ["GET /api/users"]
+
+
+def test_wrappers_basenames_and_a_lone_record():
+    wrapped = json.dumps({"files": [{"file": "users.js", "purpose": "User routes."}]})
+    assert list(parse_records(wrapped, PATHS)) == ["src/routes/users.js"]
+    keyed = json.dumps({"src/server.js": {"purpose": "Starts the API."}})
+    assert list(parse_records(keyed, PATHS)) == ["src/server.js"]
+    assert list(parse_records('{"purpose": "Starts the API."}', ["src/server.js"])) == ["src/server.js"]
+
+
+def test_truncated_response_keeps_complete_records():
+    response = '[{"file": "src/server.js", "purpose": "Starts the API."}, {"file": "src/routes/users.js", "purp'
+    assert list(parse_records(response, PATHS)) == ["src/server.js"]
+
+
+def test_records_without_purpose_or_unknown_files_are_dropped():
+    response = '[{"file": "src/server.js", "deps": ["express"]}, {"file": "other.js", "purpose": "x"}]'
+    assert parse_records(response, PATHS) == {}
+    assert validate("not a dict") is None
+
+
+def test_validate_caps_and_dedupes():
+    record = validate({"purpose": "p" * 1000, "deps": ["a", "A", "b"] + [f"d{i}" for i in range(40)]})
+    assert len(record["purpose"]) == 400 and record["purpose"].endswith("...")
+    assert record["deps"][:3] == ["a", "b", "d0"] and len(record["deps"]) == 16
+
+
+def test_fake_backend_records_round_trip():
+    prompt = "".join(f"=== FILE: {path} ===\ncode\n" for path in PATHS)
+    records = parse_records(FakeLLM(latency=0)._respond(prompt, 1024), PATHS)
+    assert sorted(records) == sorted(PATHS)
+    summary = dumps(records["src/server.js"])
+    assert summary.startswith("### src/server.js\n{")
+    header, record = load(summary)
+    assert header == "### src/server.js"
+    assert dict(record, file="src/server.js") == records["src/server.js"]
+
+
+def test_render_moves_shared_deps_to_the_top():
+    summaries = [
+        dumps({"file": "a.js", "purpose": "A.", "components": ["makeA"], "deps": ["express", "lodash"]}),
+        dumps({"file": "b.js", "purpose": "B.", "deps": ["Express", "zod"]}),
+        "### legacy.md\n**Purpose:** Old markdown summary.",
+    ]
+    text = render(summaries)
+    assert text.startswith("Shared dependencies: express (2 files)")
+    assert "- deps: lodash" in text and "- deps: zod" in text
+    assert "- components: makeA" in text
+    assert text.endswith("### legacy.md\n**Purpose:** Old markdown summary.")
+    assert "components" not in render(summaries, brief=True)
+    assert "- deps: express; lodash" in render_one(summaries[0])
+
+
+def test_trailing_comma_repair_leaves_strings_alone():
+    response = ('[{"file": "src/server.js", "purpose": "Parses [a,] and {b,} literals.", "deps": ["express",],},'
+                ' {"file": "src/routes/users.js", "purpose": "Keeps \\"x,]\\" intact."}]')
+    records = parse_records(response, PATHS)
+    assert records["src/server.js"]["purpose"] == "Parses [a,] and {b,} literals."
+    assert records["src/server.js"]["deps"] == ["express"]
+    assert records["src/routes/users.js"]["purpose"] == 'Keeps "x,]" intact.'
+    # Valid JSON is never rewritten
+    valid = '{"file": "src/server.js", "purpose": "A list: [1,] stays."}'
+    assert parse_records(valid, PATHS)["src/server.js"]["purpose"] == "A list: [1,] stays."
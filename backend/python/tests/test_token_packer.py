@@ -0,0 +1,35 @@
+from token_packer import pack, truncate_to_tokens, count_tokens
+
+
+def test_pack_respects_budget_and_item_limit():
+    items = [(f"f{i}", cost) for i, cost in enumerate([500, 300, 300, 200, 100, 100, 50])]
+    result = pack(items, fixed_overhead=100, budget=1000, max_items=3)
+    costs = dict(items)
+    assert sorted(name for b in result.bins for name in b) == sorted(costs)
+    for b, used in zip(result.bins, result.used):
+        assert len(b) <= 3
+        assert used == 100 + sum(costs[name] for name in b) <= 1000
+
+
+def test_pack_keeps_original_order():
+    items = [("a", 10), ("b", 400), ("c", 20), ("d", 400)]
+    result = pack(items, fixed_overhead=0, budget=1000, max_items=10)
+    assert result.bins == [["a", "b", "c", "d"]]
+
+
+def test_oversized_item_gets_its_own_request():
+    result = pack([("small", 10), ("huge", 5000)], fixed_overhead=50, budget=1000, max_items=4)
+    assert ["huge"] in result.bins
+    assert "requests" in result.describe()
+
+
+def test_pack_empty():
+    result = pack([], fixed_overhead=10, budget=100, max_items=4)
+    assert result.bins == [] and result.efficiency == 1.0
+
+
+def test_truncate_to_tokens():
+    text = "word " * 500
+    cut, truncated = truncate_to_tokens(text, 50)
+    assert truncated and count_tokens(cut) <= 50 and text.startswith(cut)
+    assert truncate_to_tokens("short", 50) == ("short", False)
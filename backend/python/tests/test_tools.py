@@ -0,0 +1,55 @@
+import codecs
+
+import pytest
+
+import tools
+from tools import read_file_bounded, set_repo_path
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    # set_repo_path swaps module globals; monkeypatch puts them back afterwards
+    for name in ("repo_base_path", "git_source", "code_index"):
+        monkeypatch.setattr(tools, name, getattr(tools, name))
+    set_repo_path(str(tmp_path))
+    return tmp_path
+
+
+def test_whole_file(repo):
+    (repo / "a.py").write_text("print('hi')\n")
+    assert read_file_bounded("a.py") == tools.FileContent("print('hi')\n", False, 12, False, None)
+
+
+def test_prefix_keeps_real_size(repo):
+    (repo / "big.txt").write_text("x" * 1000)
+    result = read_file_bounded("big.txt", max_chars=100)
+    assert (result.content, result.truncated, result.size) == ("x" * 100, True, 1000)
+
+
+def test_multibyte_char_cut_at_the_byte_limit(repo):
+    # 3-byte chars: max_chars=5 reads 20 bytes, which ends inside the 7th char
+    (repo / "cjk.txt").write_text("漢" * 50, encoding="utf-8")
+    result = read_file_bounded("cjk.txt", max_chars=5)
+    assert result.content == "漢" * 5
+    assert "�" not in result.content
+
+
+def test_head_tail(repo):
+    (repo / "log.txt").write_text("HEAD" + "-" * 1000 + "TAIL")
+    result = read_file_bounded("log.txt", max_chars=40, head_tail=True)
+    assert result.truncated
+    assert result.content.startswith("HEAD") and result.content.endswith("TAIL")
+    assert "\n...\n" in result.content
+
+
+def test_utf16_with_bom(repo):
+    (repo / "w.txt").write_bytes(codecs.BOM_UTF16_LE + "hello".encode("utf-16-le"))
+    result = read_file_bounded("w.txt")
+    assert (result.content, result.binary) == ("hello", False)
+
+
+def test_binary_and_missing(repo):
+    (repo / "blob").write_bytes(b"abc\0def")
+    assert read_file_bounded("blob").binary
+    missing = read_file_bounded("nope.txt")
+    assert missing.error and missing.content == ""
@@ -0,0 +1,38 @@
+import io
+import sys
+import threading
+
+import worker
+
+
+def test_worker_that_cannot_start_exits_non_zero_and_is_not_respawned(monkeypatch):
+    # The forked workers inherit this: `import agents_groq` raises
+    monkeypatch.setitem(sys.modules, "agents_groq", None)
+    pool = worker.WorkerPool(workers=1)
+    events = []
+    monkeypatch.setattr(pool, "write", events.append)
+    pool.start()
+    first = pool.processes[0]
+    first.join(10)
+    assert first.exitcode == 1
+
+    stop = threading.Event()
+    pump = threading.Thread(target=pool.pump, args=(stop,))
+    pump.start()
+    stop.set()
+    pump.join(10)
+    assert not pump.is_alive()
+    assert [event["type"] for event in events] == ["fatal"]
+    assert "failed to start" in events[0]["message"]
+    assert pool.processes == [first]
+
+
+def test_serve_rejects_lines_that_are_not_job_objects(monkeypatch):
+    submitted, events = [], []
+    monkeypatch.setattr(worker.WorkerPool, "start", lambda self: None)
+    monkeypatch.setattr(worker.WorkerPool, "submit", lambda self, job: submitted.append(job))
+    monkeypatch.setattr(worker.WorkerPool, "write", lambda self, event: events.append(event))
+    monkeypatch.setattr(sys, "stdin", io.StringIO('5\n[]\n"x"\n{"id": "1"}\nnot json\n{"id": "2", "repo_path": "/r"}\n'))
+    worker.serve(1)
+    assert submitted == [{"id": "2", "repo_path": "/r"}]
+    assert len(events) == 5 and all(event["type"] == "error" for event in events)
@@ -0,0 +1,87 @@
+import queue
+import re
+import threading
+
+from worker import _JobStream
+
+
+def _drain(out_queue):
+    events = []
+    while not out_queue.empty():
+        events.append(out_queue.get_nowait())
+    return events
+
+
+def test_lines_and_readme_chunks():
+    out_queue = queue.Queue()
+    stream = _JobStream(out_queue)
+    stream.job_id = "1"
+    stream.write('hello\n[README_CHUNK]"# Ti')
+    stream.write('tle"\n[README_RESET]\npartial')
+    stream.flush()
+    assert _drain(out_queue) == [
+        {"id": "1", "type": "log", "message": "hello"},
+        {"id": "1", "type": "readme_chunk", "text": "# Title"},
+        {"id": "1", "type": "readme_reset"},
+        {"id": "1", "type": "log", "message": "partial"},
+    ]
+
+
+def test_bad_chunk_line_is_logged_not_raised():
+    out_queue = queue.Queue()
+    stream = _JobStream(out_queue)
+    stream.write('[README_CHUNK]"cut in ha\n')
+    assert _drain(out_queue)[0]["type"] == "log"
+
+
+def test_concurrent_writers_keep_lines_whole():
+    out_queue = queue.Queue()
+    stream = _JobStream(out_queue)
+
+    def writer(n):
+        for i in range(500):
+            # Split writes, like print() sending the text and the newline separately
+            stream.write(f"thread-{n} line-{i}")
+            stream.write("\n")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    messages = [event["message"] for event in _drain(out_queue)]
+    assert len(messages) == 2000
+    assert all(re.fullmatch(r"thread-\d line-\d+", message) for message in messages)
+
+
+def test_flush_leaves_other_threads_partial_lines():
+    out_queue = queue.Queue()
+    stream = _JobStream(out_queue)
+    started, release = threading.Event(), threading.Event()
+
+    def other():
+        stream.write("half of a ")
+        started.set()
+        release.wait(5)
+        stream.write("line\n")
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    started.wait(5)
+    stream.write("mine")
+    stream.flush()
+    release.set()
+    thread.join()
+    assert [event["message"] for event in _drain(out_queue)] == ["mine", "half of a line"]
+
+
+def test_end_job_emits_partial_lines_of_finished_threads():
+    out_queue = queue.Queue()
+    stream = _JobStream(out_queue)
+    thread = threading.Thread(target=stream.write, args=("no newline",))
+    thread.start()
+    thread.join()
+    stream.flush()
+    assert _drain(out_queue) == []
+    stream.end_job()
+    assert [event["message"] for event in _drain(out_queue)] == ["no newline"]
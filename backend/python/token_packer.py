@@ -0,0 +1,90 @@
+import os
+from typing import List, Tuple
+
+# Token counting uses tiktoken when its encoding is available; otherwise a
+# ~4 chars/token estimate (close enough for budgeting, and keeps us offline-safe).
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(os.getenv("TOKENIZER_ENCODING", "cl100k_base"))
+        except Exception:
+            # tiktoken missing, or its BPE file can't be downloaded
+            _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    # Returns (text cut to at most max_tokens, whether anything was cut)
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text, False
+        return encoding.decode(tokens[:max_tokens]), True
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text, False
+    return text[:max_chars], True
+
+
+class PackResult:
+    def __init__(self, bins: List[List[str]], used: List[int], budget: int, naive_requests: int):
+        self.bins = bins
+        self.used = used
+        self.budget = budget
+        self.naive_requests = naive_requests
+
+    @property
+    def efficiency(self) -> float:
+        # Share of the purchased budget actually filled, across all requests
+        if not self.bins:
+            return 1.0
+        return sum(self.used) / (len(self.bins) * self.budget)
+
+    def describe(self) -> str:
+        return (
+            f"{len(self.bins)} requests (fixed batching: {self.naive_requests}), "
+            f"{self.efficiency:.0%} of token budget used"
+        )
+
+
+def pack(items: List[Tuple[str, int]], fixed_overhead: int, budget: int, max_items: int) -> PackResult:
+    """
+    First-fit-decreasing bin packing of (name, cost) items into requests of at
+    most `budget` tokens (including `fixed_overhead` for the prompt scaffolding)
+    and at most `max_items` files each. Oversized items get a request of their own.
+    Bins keep the items' original relative order.
+    """
+    order = {name: i for i, (name, _) in enumerate(items)}
+
+    bins: List[List[str]] = []
+    used: List[int] = []
+    for name, cost in sorted(items, key=lambda item: item[1], reverse=True):
+        for i in range(len(bins)):
+            if used[i] + cost <= budget and len(bins[i]) < max_items:
+                bins[i].append(name)
+                used[i] += cost
+                break
+        else:
+            bins.append([name])
+            used.append(fixed_overhead + cost)
+
+    for b in bins:
+        b.sort(key=order.get)
+    # Stable output: requests ordered by their first file
+    paired = sorted(zip(bins, used), key=lambda pair: order[pair[0][0]])
+    naive = (len(items) + 3) // 4  # the old FILES_PER_REQUEST=4 fixed batching
+    return PackResult([b for b, _ in paired], [u for _, u in paired], budget, naive)
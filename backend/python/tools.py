@@ -1,71 +1,180 @@
 import os
+import codecs
+import hashlib
+import subprocess
+from collections import namedtuple
+from scanner import scan_repo, index_from_listing, SNIFF_BYTES
+from git_source import GitObjectSource, is_bare_repo
+from import_graph import load_or_build, index_cache_key, to_posix
 
 
 repo_base_path = None
+git_source = None  # set when reading straight from git objects instead of a checkout
+code_index = None  # CodeIndex for the current repo, built by build_code_index()
 
-def set_repo_path(path):
-    global repo_base_path
+def set_repo_path(path, rev=None):
+    # A bare repo (or an explicit rev) is read via `git ls-tree` / `cat-file --batch`
+    global repo_base_path, git_source, code_index
+    code_index = None
+    if git_source is not None:
+        git_source.close()
+        git_source = None
     repo_base_path = path
+    if rev is not None or is_bare_repo(path):
+        git_source = GitObjectSource(path, rev or "HEAD")
+
+
+def get_commit():
+    # Commit being documented, or None when the repo isn't a git checkout
+    if git_source is not None:
+        return git_source.commit
+    try:
+        return subprocess.run(
+            ["git", "-C", repo_base_path, "rev-parse", "HEAD"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
 
 
 # Step 1: List all files in the cloned repo (recursively) with filtering
-def get_file_tree():
-    file_tree = []
-    
-    # Directories to skip completely
-    skip_dirs = {
-        'node_modules', '.git', '__pycache__', '.venv', 'venv', 'env',
-        'dist', 'build', '.next', '.nuxt', 'coverage', '.nyc_output',
-        '.cache', 'tmp', 'temp', '.tmp', '.temp', 'logs', '.DS_Store',
-        'vendor', 'bower_components', '.gradle', '.idea', '.vscode',
-        '.pytest_cache', '.mypy_cache', '.tox', '.eggs'
-    }
-    
-    # File extensions to skip
-    skip_extensions = {
-        '.pyc', '.pyo', '.pyd', '.so', '.dll', '.dylib', '.exe', '.bin',
-        '.log', '.tmp', '.temp', '.cache', '.pid', '.lock', '.swp', '.swo',
-        '.DS_Store', '.coverage', '.nyc_output', '.min.js', '.min.css'
-    }
-    
-    for dirpath, dirnames, filenames in os.walk(repo_base_path):
-        # Filter out directories we want to skip
-        dirnames[:] = [d for d in dirnames if d not in skip_dirs]
-        
-        for filename in filenames:
-            # Skip files with problematic extensions
-            if any(filename.endswith(ext) for ext in skip_extensions):
-                continue
-                
-            # Skip hidden files (except important ones)
-            if filename.startswith('.') and filename not in {'.env', '.gitignore', '.dockerignore'}:
-                continue
-                
-            full_path = os.path.join(dirpath, filename)
-            rel_path = os.path.relpath(full_path, repo_base_path) 
-            file_tree.append(rel_path)
+def get_file_index():
     '''
     ✅ What it does:
-        Converts the full absolute file path to a relative path from temp/.
-        For example:
-        If the file is at temp/src/index.js, rel_path becomes src/index.js.
-        Then appends it to file_tree.
+        Scans the repo once (see scanner.py): skips junk dirs, .gitignore'd paths,
+        binaries and oversized files, and returns FileEntry(path, size, mtime)
+        records with paths relative to the repo root.
+        For example, temp/src/index.js is recorded as src/index.js.
     '''
+    if git_source is not None:
+        return index_from_listing((path, size) for path, size, _ in git_source.list_files())
+    return scan_repo(repo_base_path)
 
-    return file_tree
+
+def get_file_tree():
+    return [entry.path for entry in get_file_index()]
 
 # Step 2: Read content of a file, safely
-def read_file(path):
+FileContent = namedtuple("FileContent", ["content", "truncated", "size", "binary", "error"])
+
+# Text encodings are sniffed from a BOM; everything else is read as UTF-8
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+
+def _decode_prefix(data, encoding, at_eof):
+    # Decode a byte prefix without choking on a multi-byte char cut in half at the end
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    return decoder.decode(data, final=at_eof)
+
+
+def _sniff_encoding(data):
+    for bom, name in _BOMS:
+        if data.startswith(bom):
+            return name
+    return "utf-8"
+
+
+def _content_from_bytes(data, size, max_chars):
+    # data is a prefix of the file (or all of it); size is the full size
+    if b"\0" in data[:SNIFF_BYTES] and not data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return FileContent("", False, size, True, None)
+
+    encoding = _sniff_encoding(data)
+    text = _decode_prefix(data, encoding, len(data) >= size).lstrip("\ufeff")
+    truncated = len(data) < size
+    if max_chars is not None and len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    return FileContent(text, truncated, size, False, None)
+
+
+def read_file_bounded(path, max_chars=None, head_tail=False):
+    '''
+    ✅ What it does:
+        Reads at most ~max_chars characters of a file instead of the whole thing.
+        With head_tail=True a large file is sampled as its first and last halves.
+        Always returns a FileContent(content, truncated, size, binary, error);
+        size is the real size on disk (from stat), not the length we read.
+        In git mode (see set_repo_path) the bytes come from the object store.
+    '''
+    # UTF-8 needs at most 4 bytes per char, so this always covers max_chars
+    byte_limit = None if max_chars is None else max_chars * 4
+
+    if git_source is not None:
+        try:
+            data, size = git_source.read(path, byte_limit)
+        except (KeyError, OSError) as e:
+            return FileContent("", False, 0, False, f"Error reading {path}: {e}")
+        return _content_from_bytes(data, size, max_chars)
+
+    full_path = os.path.join(repo_base_path, path)
+    try:
+        with open(full_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if head_tail and byte_limit is not None and size > byte_limit:
+                half = max_chars // 2
+                prefix = f.read(half * 4)
+                head = _content_from_bytes(prefix, size, half)
+                if head.binary:
+                    return head
+                encoding = _sniff_encoding(prefix)
+                offset = max(size - half * 4, 0)
+                f.seek(offset - offset % 2 if encoding.startswith("utf-16") else offset)
+                tail = f.read().decode(encoding, errors="replace")[-half:]
+                return FileContent(f"{head.content}\n...\n{tail}", True, size, False, None)
+
+            data = f.read() if byte_limit is None else f.read(byte_limit)
+    except OSError as e:
+        return FileContent("", False, 0, False, f"Error reading {path}: {e}")
+
+    return _content_from_bytes(data, size, max_chars)
+
+
+def read_file(path, max_chars=None):
 
     '''
     ✅ What it does:
     upr wale function ne jo her file k aage se /temp hataya tha aur file ka naam save kiya tha jo imp lagi 
     to ab ye vala function pehle vaps /temp lgayega taaki files read ho sake
+    (string-returning wrapper around read_file_bounded, kept for older callers)
     '''
+    result = read_file_bounded(path, max_chars)
+    if result.error:
+        return result.error
+    return result.content
+
+# Git-style blob hash of a file (same id `git hash-object` prints), used as a content key for caching
+def file_blob_hash(path):
+    if git_source is not None:
+        return git_source.blob_id(path)
     full_path = os.path.join(repo_base_path, path)
+    digest = hashlib.sha1()
+    digest.update(f"blob {os.path.getsize(full_path)}\0".encode())
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    try:
-        with open(full_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        return f"Error reading {path}: {e}"
\ No newline at end of file
+
+# Step 3: Static code index (imports, symbols, routes) for ranking and prompt context
+def build_code_index(entries, sources, read_chars):
+    '''
+    ✅ What it does:
+        Builds (or loads, cached per commit + file listing) the CodeIndex of the
+        current repo from the first read_chars of each file in sources.
+        Returns (index, cache_hit); later calls to get_code_index() return it.
+    '''
+    global code_index
+    paths = [to_posix(entry.path) for entry in entries]
+    original = {to_posix(entry.path): entry.path for entry in entries}
+    commit = get_commit()
+    key = index_cache_key(commit, [(to_posix(e.path), e.size) for e in entries]) if commit else None
+    code_index, hit = load_or_build(
+        key, paths,
+        lambda path: read_file_bounded(original.get(path, path), read_chars).content,
+        [to_posix(path) for path in sources],
+    )
+    return code_index, hit
+
+
+def get_code_index():
+    return code_index
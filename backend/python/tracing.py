@@ -0,0 +1,302 @@
+"""
+Structured tracing and metrics for README runs.
+
+Spans form a tree per run:
+    run ─┬─ step   (code index, ranking, rerun plan)
+         ├─ node   (select_files, summarize, generate_readme)
+         │   └─ llm   (one per make_request attempt: provider, model, key,
+         │             prompt/completion tokens, queue wait, retry reason, backoff)
+         └─ ...
+LLM spans roll their calls, failed attempts, tokens and backoff up into every
+ancestor, so a node span says what that stage spent. With TRACE_FILE set, each
+finished span is appended to it as one JSON line.
+
+Metrics (counters and histograms) are collected per process. With METRICS_FILE
+set they are merged into that file after every run, under a file lock, in the
+Prometheus text format (state kept next to it in <METRICS_FILE>.json). Warm
+workers, batch workers and spawn-per-request runs all add up into one set of
+totals, which the backend serves at GET /metrics.
+"""
+import contextvars
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("current_span", default=None)
+# Threads from a pool don't inherit the context; their spans attach to the newest open node
+_open_nodes = []
+_lock = threading.Lock()
+
+# What LLM spans add to their ancestors
+ROLLUP_KEYS = ("llm_calls", "llm_errors", "prompt_tokens", "completion_tokens", "backoff_s", "queued_s")
+
+
+class Span:
+    def __init__(self, name, kind="step", parent=None, **attrs):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attrs = attrs
+        self.totals = defaultdict(float)
+        self.stages = []  # (name, seconds, totals) of finished node spans, for run summaries
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, status="ok", error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.status = status
+        self.error = error
+        if self.kind == "llm":
+            rollup = {
+                "llm_calls": 1 if status == "ok" else 0,
+                "llm_errors": 1 if status == "error" else 0,  # cancelled hedge losers are neither
+                "prompt_tokens": self.attrs.get("prompt_tokens") or 0,
+                "completion_tokens": self.attrs.get("completion_tokens") or 0,
+                "backoff_s": self.attrs.get("backoff_s") or 0,
+                "queued_s": self.attrs.get("queued_s") or 0,
+            }
+            with _lock:
+                ancestor = self.parent
+                while ancestor is not None:
+                    for key, value in rollup.items():
+                        ancestor.totals[key] += value
+                    ancestor = ancestor.parent
+        elif self.kind == "node" and self.parent is not None:
+            with _lock:
+                self.parent.stages.append((self.name, self.duration, dict(self.totals)))
+        metrics.record_span(self)
+        _export(self)
+
+    def to_dict(self):
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "pid": os.getpid(),
+        }
+        if self.error:
+            record["error"] = self.error
+        record.update(self.attrs)
+        if self.totals:
+            record["totals"] = {key: round(value, 3) for key, value in self.totals.items()}
+        return record
+
+
+def current_span():
+    span = _current.get()
+    if span is None and _open_nodes:
+        span = _open_nodes[-1]
+    return span
+
+
+@contextmanager
+def span(name, kind="step", parent=None, **attrs):
+    current = Span(name, kind, parent if parent is not None else current_span(), **attrs)
+    token = _current.set(current)
+    if kind in ("node", "run"):
+        with _lock:
+            _open_nodes.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end("error", str(e).splitlines()[0] if str(e) else type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        if kind in ("node", "run"):
+            with _lock:
+                _open_nodes.remove(current)
+        current.end()
+
+
+def traced_node(name, fn):
+    # Wraps a pipeline node function in a "node" span
+    def node(state):
+        with span(name, kind="node"):
+            return fn(state)
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
+
+
+def _export(finished):
+    path = os.getenv("TRACE_FILE")
+    if not path:
+        return
+    line = (json.dumps(finished.to_dict(), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One O_APPEND write per span keeps lines from concurrent processes whole
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def format_stages(run_span):
+    # One line per graph node: time, LLM calls, tokens, failed attempts
+    lines = []
+    for name, seconds, totals in run_span.stages:
+        detail = ""
+        if totals.get("llm_calls") or totals.get("llm_errors"):
+            detail = (f" ({int(totals.get('llm_calls', 0))} LLM calls, "
+                      f"{int(totals.get('prompt_tokens', 0))}+{int(totals.get('completion_tokens', 0))} tokens"
+                      + (f", {int(totals['llm_errors'])} failed attempts" if totals.get("llm_errors") else "")
+                      + (f", {totals['backoff_s']:.1f}s backoff" if totals.get("backoff_s") else "")
+                      + ")")
+        lines.append(f"⏱️ {name}: {seconds:.2f}s{detail}")
+    return lines
+
+
+# --- Metrics ---------------------------------------------------------------
+
+_DEFINITIONS = {
+    "readme_runs_total": ("counter", "README runs by outcome"),
+    "readme_run_seconds": ("histogram", "Duration of a README run"),
+    "readme_stage_seconds": ("histogram", "Duration of each pipeline stage"),
+    "llm_requests_total": ("counter", "LLM request attempts by provider, model and outcome"),
+    "llm_tokens_total": ("counter", "LLM tokens by provider, model and kind"),
+    "llm_request_seconds": ("histogram", "Latency of LLM request attempts"),
+    "llm_queue_seconds_total": ("counter", "Time spent waiting for rate-limit headroom"),
+    "llm_backoff_seconds_total": ("counter", "Backoff slept before retrying, by reason"),
+    "llm_circuit_transitions_total": ("counter", "Circuit breaker state changes by provider and model"),
+    "llm_hedges_total": ("counter", "Hedged LLM requests by outcome (won: the duplicate answered first)"),
+}
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(name, labels):
+    return name + "|" + json.dumps(sorted(labels.items()))
+
+
+class Metrics:
+    """Counters and histograms not yet merged into METRICS_FILE."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, value=1.0, **labels):
+        with self._lock:
+            self.counters[_key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            histogram = self.histograms.setdefault(_key(name, labels), {"buckets": [0] * len(_BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def record_span(self, finished):
+        attrs = finished.attrs
+        if finished.kind == "llm":
+            labels = {"provider": attrs.get("provider", "unknown"), "model": attrs.get("model", "unknown")}
+            self.inc("llm_requests_total", outcome=finished.status if finished.status in ("ok", "cancelled") else "error", **labels)
+            self.observe("llm_request_seconds", finished.duration, **labels)
+            for kind in ("prompt", "completion"):
+                if attrs.get(f"{kind}_tokens"):
+                    self.inc("llm_tokens_total", attrs[f"{kind}_tokens"], kind=kind, **labels)
+            if attrs.get("queued_s"):
+                self.inc("llm_queue_seconds_total", attrs["queued_s"], **labels)
+            if attrs.get("backoff_s"):
+                self.inc("llm_backoff_seconds_total", attrs["backoff_s"], reason=attrs.get("retry_reason", "other"))
+        elif finished.kind == "node":
+            self.observe("readme_stage_seconds", finished.duration, stage=finished.name)
+        elif finished.kind == "run":
+            self.inc("readme_runs_total", status=finished.status)
+            self.observe("readme_run_seconds", finished.duration)
+
+    def flush(self, path=None):
+        """Merge what was collected since the last flush into METRICS_FILE (and its .json state)."""
+        path = path or os.getenv("METRICS_FILE")
+        if not path:
+            return
+        with self._lock:
+            counters, histograms = dict(self.counters), self.histograms
+            self.counters, self.histograms = defaultdict(float), {}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path + ".lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    with open(path + ".json", "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {"counters": {}, "histograms": {}}
+                for key, value in counters.items():
+                    state["counters"][key] = state["counters"].get(key, 0.0) + value
+                for key, histogram in histograms.items():
+                    merged = state["histograms"].setdefault(key, {"buckets": [0] * len(_BUCKETS), "sum": 0.0, "count": 0})
+                    merged["buckets"] = [a + b for a, b in zip(merged["buckets"], histogram["buckets"])]
+                    merged["sum"] += histogram["sum"]
+                    merged["count"] += histogram["count"]
+                _write_atomic(path + ".json", json.dumps(state))
+                _write_atomic(path, render_prometheus(state))
+        except OSError:
+            pass
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _labels_text(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus(state):
+    families = defaultdict(list)
+    for key, value in state["counters"].items():
+        name, labels = key.split("|", 1)
+        families[name].append(f"{name}{_labels_text(json.loads(labels))} {value:g}")
+    for key, histogram in state["histograms"].items():
+        name, labels = key.split("|", 1)
+        labels = json.loads(labels)
+        for bound, count in zip(_BUCKETS, histogram["buckets"]):
+            families[name].append(f"{name}_bucket{_labels_text(labels, ('le', f'{bound:g}'))} {count}")
+        families[name].append(f"{name}_bucket{_labels_text(labels, ('le', '+Inf'))} {histogram['count']}")
+        families[name].append(f"{name}_sum{_labels_text(labels)} {histogram['sum']:g}")
+        families[name].append(f"{name}_count{_labels_text(labels)} {histogram['count']}")
+
+    lines = []
+    for name in sorted(families):
+        kind, description = _DEFINITIONS.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(sorted(families[name]))
+    return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
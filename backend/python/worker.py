@@ -0,0 +1,241 @@
+"""
+Warm worker pool for README generation.
+
+Instead of spawning `python agents_groq.py <path>` for every request (which
+re-imports the provider SDKs and rebuilds the LLM manager, losing its
+provider health and latency history, each time), the backend starts this once:
+
+    python worker.py --workers 4
+
+Each worker process imports agents_groq a single time, keeping the LLM
+clients and the built pipeline in memory, then serves jobs forever.
+
+Protocol (one JSON object per line):
+    stdin  -> {"id": "<job id>", "repo_path": "<cloned repo>"}
+              optional: "rev" (read that commit from git objects), "output_dir"
+    stdout <- {"type": "ready", "workers": N}
+              {"id": ..., "type": "start"}
+              {"id": ..., "type": "log", "message": "<same line run_agent prints>"}
+              {"id": ..., "type": "readme_chunk", "text": "<next piece of the README>"}
+              {"id": ..., "type": "readme_reset"}  (drop streamed text, generation restarts)
+              {"id": ..., "type": "done", "readme_path": ".../readme.md"}
+              {"id": ..., "type": "error", "message": "..."}
+              {"id": null, "type": "fatal", "message": "..."}  (a worker couldn't start)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+
+# Mirrors agents_groq's stdout markers; not imported from there to keep the parent process light
+README_CHUNK_PREFIX = "[README_CHUNK]"
+README_RESET = "[README_RESET]"
+
+
+class _JobStream:
+    # Replaces sys.stdout/sys.stderr inside a worker so every line printed by
+    # agents_groq or llm_fallback is tagged with the job that produced it.
+    def __init__(self, out_queue, kind="log"):
+        self.out_queue = out_queue
+        self.kind = kind
+        self.job_id = None
+        # Writes come from the job thread, the summarize pool and the LLM event-loop thread.
+        # print() sends the text and the newline as separate writes, so partial lines are
+        # buffered per thread and only whole lines are emitted.
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        thread = threading.get_ident()
+        with self._lock:
+            buffer = self._buffers.pop(thread, "") + text
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                self._emit(line)
+            if buffer:
+                self._buffers[thread] = buffer
+        return len(text)
+
+    def flush(self):
+        # Only the caller's partial line: other threads may be halfway through one
+        with self._lock:
+            buffer = self._buffers.pop(threading.get_ident(), "")
+            if buffer:
+                self._emit(buffer)
+
+    def end_job(self):
+        # Also emit what threads that have since exited left without a newline, before job_id changes
+        alive = {thread.ident for thread in threading.enumerate()}
+        with self._lock:
+            for thread in list(self._buffers):
+                if thread == threading.get_ident() or thread not in alive:
+                    self._emit(self._buffers.pop(thread))
+
+    def _emit(self, line):
+        # README text streamed by agents_groq travels as its own event types
+        if line.startswith(README_CHUNK_PREFIX):
+            try:
+                text = json.loads(line[len(README_CHUNK_PREFIX):])
+            except ValueError:
+                # A mangled chunk line must not kill the job; pass it on as a log line
+                self.out_queue.put({"id": self.job_id, "type": self.kind, "message": line})
+                return
+            self.out_queue.put({"id": self.job_id, "type": "readme_chunk", "text": text})
+        elif line == README_RESET:
+            self.out_queue.put({"id": self.job_id, "type": "readme_reset"})
+        elif line.strip():
+            self.out_queue.put({"id": self.job_id, "type": self.kind, "message": line})
+
+
+def _worker_main(job_queue, out_queue):
+    stdout = _JobStream(out_queue, "log")
+    stderr = _JobStream(out_queue, "stderr")
+    sys.stdout, sys.stderr = stdout, stderr
+
+    try:
+        # Heavy imports + LLM client setup happen exactly once per worker
+        import agents_groq
+        agents_groq.build_graph()
+        stdout.end_job()
+    except Exception as e:
+        stdout.end_job()
+        out_queue.put({"id": None, "type": "fatal", "pid": os.getpid(), "message": f"Worker failed to start: {e}"})
+        # Non-zero, so the pool notices (and doesn't respawn it)
+        sys.exit(1)
+
+    out_queue.put({"id": None, "type": "worker_ready", "pid": os.getpid()})
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+
+        job_id = job.get("id")
+        stdout.job_id = stderr.job_id = job_id
+        out_queue.put({"id": job_id, "type": "start", "pid": os.getpid()})
+        try:
+            output_dir = job.get("output_dir") or job["repo_path"]
+            agents_groq.run_agent(
+                job["repo_path"], rev=job.get("rev"), output_dir=output_dir
+            )
+            stdout.end_job()
+            stderr.end_job()
+            out_queue.put({
+                "id": job_id,
+                "type": "done",
+                "readme_path": os.path.join(output_dir, "readme.md"),
+            })
+        except Exception as e:
+            stdout.end_job()
+            stderr.end_job()
+            out_queue.put({"id": job_id, "type": "error", "message": str(e)})
+        finally:
+            stdout.job_id = stderr.job_id = None
+
+
+class WorkerPool:
+    def __init__(self, workers=2):
+        # fork keeps startup cheap and avoids re-running this module in the children
+        self.ctx = multiprocessing.get_context("fork")
+        self.workers = workers
+        self.job_queue = self.ctx.Queue()
+        self.out_queue = self.ctx.Queue()
+        self.processes = []
+        self.running = {}  # pid -> job id currently being processed
+        self.reaped = set()  # pids of crashed workers already reported
+        self.started = set()  # pids of workers that finished starting up (only those are respawned)
+        self._write_lock = threading.Lock()
+
+    def _spawn(self):
+        process = self.ctx.Process(target=_worker_main, args=(self.job_queue, self.out_queue), daemon=True)
+        process.start()
+        return process
+
+    def start(self):
+        self.processes = [self._spawn() for _ in range(self.workers)]
+
+    def submit(self, job):
+        self.job_queue.put(job)
+
+    def write(self, event):
+        with self._write_lock:
+            sys.__stdout__.write(json.dumps(event) + "\n")
+            sys.__stdout__.flush()
+
+    def _replace_dead_workers(self, respawn=True):
+        for i, process in enumerate(self.processes):
+            if process.is_alive() or process.exitcode in (None, 0) or process.pid in self.reaped:
+                continue
+            self.reaped.add(process.pid)
+            job_id = self.running.pop(process.pid, None)
+            if job_id is not None:
+                self.write({"id": job_id, "type": "error", "message": f"Worker {process.pid} crashed (exit code {process.exitcode})"})
+            # One that died during start-up (see the "fatal" event) would only fail again
+            if respawn and process.pid in self.started:
+                self.processes[i] = self._spawn()
+
+    def pump(self, stop_event):
+        # Forward worker events to our stdout until asked to stop and drained
+        ready = 0
+        while not (stop_event.is_set() and self.out_queue.empty() and not any(p.is_alive() for p in self.processes)):
+            self._replace_dead_workers(respawn=not stop_event.is_set())
+            try:
+                event = self.out_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            kind = event.get("type")
+            if kind == "worker_ready":
+                self.started.add(event["pid"])
+                ready += 1
+                if ready == self.workers:
+                    self.write({"type": "ready", "workers": self.workers})
+                continue
+            if kind == "fatal":
+                event.pop("pid")
+            elif kind == "start":
+                self.running[event.pop("pid")] = event["id"]
+            elif kind in ("done", "error"):
+                self.running = {pid: job for pid, job in self.running.items() if job != event["id"]}
+            self.write(event)
+
+    def stop(self):
+        for _ in self.processes:
+            self.job_queue.put(None)
+
+
+def serve(workers):
+    pool = WorkerPool(workers)
+    pool.start()
+
+    stop_event = threading.Event()
+    pump_thread = threading.Thread(target=pool.pump, args=(stop_event,), daemon=True)
+    pump_thread.start()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict) or "id" not in job or "repo_path" not in job:
+                raise ValueError("job needs 'id' and 'repo_path'")
+        except ValueError as e:
+            pool.write({"id": None, "type": "error", "message": f"Invalid job: {e}"})
+            continue
+        pool.submit(job)
+
+    # stdin closed: let queued jobs finish, then exit
+    pool.stop()
+    stop_event.set()
+    pump_thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve README generation jobs from warm worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PYTHON_WORKERS", "2")))
+    args = parser.parse_args()
+    serve(max(1, args.workers))
@@ -1,19 +1,16 @@
 import express, { Request, Response, NextFunction } from "express";
-import { prepareClonePath } from "../utils/make-dir";
-import { cloneRepo } from "../utils/clone-repo";
 import path from "path";
 import fs from "fs";
 import { readFile } from "fs/promises";
 import Repository from "../models/repository";
+import { readmeJobs } from "../utils/readme-jobs";
 
 const router = express.Router();
-import { spawn } from "child_process";
 
 // POST /api/generate-readme
 router.post(
   "/generate-readme",
   async (req: Request, res: Response): Promise<void> => {
-    let finalDestination = "";
     try {
       const { githubLink } = req.body;
       
@@ -82,98 +79,22 @@ router.post(
 
       emit(`🌟 Starting README generation for: ${finalGithubLink}`);
 
-      // Prepare destination directory
-      finalDestination = prepareClonePath(finalGithubLink);
-
-      emit(`📂 Cloning repository to: ${finalDestination}`);
-
-      // Clone the repository (may take time)
-      await cloneRepo(finalGithubLink, finalDestination);
-
-      emit(`✅ Repository cloned successfully.`);
-
-      // Path to Python script
-      const pythonScriptPath = path.resolve(
-        __dirname,
-        "..",
-        "..",
-        "python",
-        "agents_groq.py"
-      );
-
-      const pythonCommand =
-        process.env.NODE_ENV === "production"
-          ? "python"
-          : path.resolve(
-              __dirname,
-              "..",
-              "..",
-              "python",
-              "venv",
-              "bin",
-              "python"
-            );
-
-      emit(`🐍 Running Python script: ${pythonScriptPath}`);
-
-      const pythonProcess = spawn(
-        pythonCommand,
-        [pythonScriptPath, finalDestination],
-        {
-          cwd: path.dirname(pythonScriptPath),
-          env: process.env,
-        }
-      );
-
-      // Stream Python logs to client
-      pythonProcess.stdout.on("data", (data) => {
-        const message = data.toString();
-        emit(`📝 ${message.trim()}`);
-      });
-
-      pythonProcess.stderr.on("data", (data) => {
-        const error = data.toString();
-        emit(`[ERROR] ${error}`);
-      });
-
-      pythonProcess.on("close", async (code) => {
-        emit(`✅ Python process exited with code ${code}`);
-        if (code === 0) {
-          try {
-            const readmePath = path.join(finalDestination, "readme.md");
-            const readmeContent = await readFile(readmePath, "utf-8");
-            emit(`[DONE] README generated successfully.`);
-
-            // Send README content Base64-encoded so it survives SSE formatting
-            const encoded = Buffer.from(readmeContent, "utf-8").toString(
-              "base64"
-            );
-            res.write(`data: [README]${encoded}\n\n`);
-            res.end();
-          } catch (readErr) {
-            console.error("Failed to read generated README:", readErr);
-            res.write(`data: [ERROR] Failed to read README file.\n\n`);
-            res.end();
-          }
-        } else {
-          res.write(
-            `data: [ERROR] Python process exited with code ${code}\n\n`
-          );
-          res.end();
-        }
+      // Joins a running job for the same commit, reuses a cached README, or queues a new job
+      const unsubscribe = await readmeJobs.submit(finalGithubLink, {
+        send: (payload) => res.write(`data: ${payload}\n\n`),
+        end: () => res.end(),
       });
+      // A queued job nobody listens to anymore never starts
+      if (res.destroyed) unsubscribe();
+      else res.on("close", unsubscribe);
     } catch (err) {
       console.error("❌ Error in README generation:", err);
-      if (finalDestination && fs.existsSync(finalDestination)) {
-        try {
-          fs.rmSync(finalDestination, { recursive: true, force: true });
-          console.log(`🧹 Cleaned up directory: ${finalDestination}`);
-        } catch (cleanupErr) {
-          console.error("Cleanup error:", cleanupErr);
-        }
+      if (res.headersSent) {
+        res.write(`data: [ERROR] README generation failed.\n\n`);
+        res.end();
+      } else {
+        res.status(500).json({ error: "README generation failed" });
       }
-      res.write(`data: [ERROR] README generation failed.\n\n`);
-      res.end();
     }
   }
 );
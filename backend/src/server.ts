@@ -3,6 +3,10 @@ import cors from "cors";
 import dotenv from "dotenv";
 import readmeRoutes from "./routes/readme";
 import mongoose from "mongoose";
+import { promises as fs } from "fs";
+import { getWorkerPool, getMetricsFile } from "./utils/python-worker";
+import { startWorkspaceSweeper } from "./utils/clone-repo";
+import { readmeJobs } from "./utils/readme-jobs";
 
 dotenv.config();
 
@@ -66,7 +70,23 @@ app.use("/api", readmeRoutes);
 
 // for uptime robot
 app.get("/health", (req, res) => {
-  res.json({ status: "OK", message: "Backend server is running" });
+  res.json({ status: "OK", message: "Backend server is running", jobs: readmeJobs.stats() });
+});
+
+// Prometheus scrape target: README runs, stages and LLM usage recorded by the Python pipeline
+app.get("/metrics", async (req, res) => {
+  const metricsFile = getMetricsFile();
+  if (!metricsFile) {
+    res.status(404).send("METRICS_FILE is not configured\n");
+    return;
+  }
+  try {
+    const text = await fs.readFile(metricsFile, "utf-8");
+    res.type("text/plain; version=0.0.4").send(text);
+  } catch {
+    // Nothing has run yet
+    res.type("text/plain; version=0.0.4").send("");
+  }
 });
 
 if (MONGODB_URI)
@@ -81,6 +101,10 @@ else console.error("MONGO_URI not found in .env file");
 
 const server = app.listen(PORT, () => {
   console.log(`Server is running on port ${PORT}`);
+  // Pre-warm the Python workers so the first request doesn't pay start-up
+  getWorkerPool()?.warmUp();
+  // Expired temp/<repo>-<timestamp> folders (and their worktrees) are removed in the background
+  startWorkspaceSweeper();
 });
 
 // Increase server timeout to 15 minutes for large repositories
@@ -1,9 +1,214 @@
+import path from "path";
+import fs from "fs";
+import crypto from "crypto";
 import simpleGit from "simple-git";
+import { tempDir } from "./make-dir";
+
+// Bare, shallow, partial mirrors of every repo we've seen, refreshed with fetch
+const mirrorDir = path.join(__dirname, "..", "..", "cache", "mirrors");
+
+export interface ClonedRepo {
+  // What the Python side reads: a checkout, or the bare mirror in "objects" mode
+  repoPath: string;
+  // Commit to read straight from git objects (objects mode only)
+  rev?: string;
+  // Where readme.md gets written (the per-request temp folder)
+  outputDir: string;
+  // Commit the README is generated from, when known (mirror modes)
+  commit?: string;
+}
+
+/**
+ * CLONE_MODE:
+ *   worktree (default) -> depth-1 blobless mirror + `git worktree add` per request
+ *   objects            -> same mirror, no checkout: Python reads via ls-tree / cat-file
+ *   full               -> the old full `git clone` per request
+ */
+const getCloneMode = (): string => process.env.CLONE_MODE || "worktree";
+
+// Blobs above this size are left on the server (they're skipped by the scanner anyway).
+// Worktrees leave those files out of the checkout so git doesn't fetch them on demand.
+const getBlobLimit = (): string => process.env.CLONE_BLOB_LIMIT || "2m";
+
+const mirrorPathFor = (repoUrl: string): string => {
+  const name = path.basename(repoUrl).replace(/\.git$/, "");
+  const hash = crypto.createHash("sha1").update(repoUrl).digest("hex").slice(0, 12);
+  return path.join(mirrorDir, `${name}-${hash}.git`);
+};
+
+// Fetches and worktree changes on the same mirror must not overlap (shallow.lock, worktree metadata)
+const mirrorLocks = new Map<string, Promise<unknown>>();
+
+const withMirrorLock = <T>(mirrorPath: string, task: () => Promise<T>): Promise<T> => {
+  const previous = mirrorLocks.get(mirrorPath) || Promise.resolve();
+  const next = previous.catch(() => undefined).then(task);
+  mirrorLocks.set(mirrorPath, next);
+  next.finally(() => {
+    if (mirrorLocks.get(mirrorPath) === next) mirrorLocks.delete(mirrorPath);
+  }).catch(() => undefined);
+  return next;
+};
+
+// Clone the mirror on first use, otherwise fetch the latest default-branch commit.
+// Returns the commit SHA to generate from.
+const refreshMirror = async (repoUrl: string, mirrorPath: string): Promise<string> => {
+  if (!fs.existsSync(path.join(mirrorPath, "HEAD"))) {
+    fs.mkdirSync(mirrorDir, { recursive: true });
+    await simpleGit().clone(repoUrl, mirrorPath, [
+      "--bare",
+      "--depth=1",
+      "--single-branch",
+      `--filter=blob:limit=${getBlobLimit()}`,
+    ]);
+    return (await simpleGit(mirrorPath).revparse(["HEAD"])).trim();
+  }
+
+  const git = simpleGit(mirrorPath);
+  // The partial-clone filter is remembered in the mirror's config
+  await git.fetch(["--depth=1", "origin", "HEAD"]);
+  const sha = (await git.revparse(["FETCH_HEAD"])).trim();
+  // Keep HEAD on the fetched commit so a bare mirror is readable on its own
+  await git.raw(["update-ref", "--no-deref", "HEAD", sha]);
+  return sha;
+};
+
+// Paths at `sha` whose blobs the partial clone didn't download
+const missingBlobPaths = async (mirrorPath: string, sha: string): Promise<string[]> => {
+  const git = simpleGit(mirrorPath);
+  // --missing=print lists absent objects as "?<sha>" instead of fetching them
+  const missing = new Set(
+    (await git.raw(["rev-list", "--objects", "--missing=print", sha]))
+      .split("\n")
+      .filter((line) => line.startsWith("?"))
+      .map((line) => line.slice(1).trim())
+  );
+  if (missing.size === 0) return [];
+  const paths: string[] = [];
+  for (const record of (await git.raw(["ls-tree", "-r", "-z", sha])).split("\0")) {
+    // "<mode> <type> <object>\t<path>"
+    const tab = record.indexOf("\t");
+    if (tab === -1) continue;
+    const [, type, object] = record.slice(0, tab).split(" ");
+    if (type === "blob" && missing.has(object)) paths.push(record.slice(tab + 1));
+  }
+  return paths;
+};
+
+// A path as a literal, root-anchored sparse-checkout (gitignore-syntax) pattern
+const literalPattern = (filePath: string): string =>
+  "/" + filePath.replace(/[\\*?[\]!#]/g, "\\$&").replace(/ $/, "\\ ");
+
+// Check out `sha` into a new worktree, leaving out files whose blobs were filtered
+const addWorktree = async (
+  mirrorPath: string,
+  destinationPath: string,
+  sha: string
+): Promise<void> => {
+  const skipped = await missingBlobPaths(mirrorPath, sha);
+  if (skipped.length === 0) {
+    await simpleGit(mirrorPath).raw(["worktree", "add", "--detach", destinationPath, sha]);
+    return;
+  }
+
+  // A plain checkout would fetch every filtered blob one by one; a sparse checkout
+  // that excludes them never touches them (the setting is per worktree)
+  await simpleGit(mirrorPath).raw(["worktree", "add", "--no-checkout", "--detach", destinationPath, sha]);
+  const worktree = simpleGit(destinationPath);
+  const patterns = ["/*", ...skipped.map((filePath) => "!" + literalPattern(filePath))];
+  await worktree.raw(["sparse-checkout", "init", "--no-cone"]);
+  const sparseFile = path.resolve(
+    destinationPath,
+    (await worktree.revparse(["--git-path", "info/sparse-checkout"])).trim()
+  );
+  fs.writeFileSync(sparseFile, patterns.join("\n") + "\n");
+  await worktree.raw(["reset", "--hard", "--quiet"]);
+  console.log(`🪶 Left ${skipped.length} file(s) over ${getBlobLimit()} out of the checkout`);
+};
 
 export const cloneRepo = async (
   repoUrl: string,
   destinationPath: string
-): Promise<void> => {
-  const git = simpleGit();
-  await git.clone(repoUrl, destinationPath);
+): Promise<ClonedRepo> => {
+  const mode = getCloneMode();
+
+  if (mode === "full") {
+    await simpleGit().clone(repoUrl, destinationPath);
+    return { repoPath: destinationPath, outputDir: destinationPath };
+  }
+
+  const mirrorPath = mirrorPathFor(repoUrl);
+  return withMirrorLock(mirrorPath, async () => {
+    const sha = await refreshMirror(repoUrl, mirrorPath);
+
+    if (mode === "objects") {
+      // Nothing is checked out; the folder only receives readme.md
+      fs.mkdirSync(destinationPath, { recursive: true });
+      return { repoPath: mirrorPath, rev: sha, outputDir: destinationPath, commit: sha };
+    }
+
+    await addWorktree(mirrorPath, destinationPath, sha);
+    return { repoPath: destinationPath, outputDir: destinationPath, commit: sha };
+  });
+};
+
+// Commit the remote's HEAD points at, without cloning or fetching anything
+export const resolveHead = async (repoUrl: string): Promise<string | null> => {
+  const output = await simpleGit({ timeout: { block: 15_000 } }).listRemote([repoUrl, "HEAD"]);
+  const sha = output.split(/\s+/)[0];
+  return /^[0-9a-f]{40}$/.test(sha) ? sha : null;
+};
+
+// Delete a request folder and drop its worktree registration from the mirror
+export const removeWorkspace = async (workspacePath: string): Promise<void> => {
+  fs.rmSync(workspacePath, { recursive: true, force: true });
+  await pruneWorktrees();
+};
+
+const pruneWorktrees = async (): Promise<void> => {
+  if (!fs.existsSync(mirrorDir)) return;
+  for (const entry of fs.readdirSync(mirrorDir)) {
+    const mirrorPath = path.join(mirrorDir, entry);
+    await withMirrorLock(mirrorPath, () => simpleGit(mirrorPath).raw(["worktree", "prune"])).catch(
+      (err) => console.error(`⚠️ worktree prune failed for ${mirrorPath}:`, err)
+    );
+  }
+};
+
+/**
+ * check-readme / get-readme read temp/<folder>/readme.md after generation,
+ * so request folders can't be deleted right away. They're swept once they
+ * are older than WORKSPACE_TTL_MINUTES instead.
+ */
+export const sweepWorkspaces = async (): Promise<void> => {
+  if (!fs.existsSync(tempDir)) return;
+  const ttlMs = parseFloat(process.env.WORKSPACE_TTL_MINUTES || "60") * 60_000;
+  const cutoff = Date.now() - ttlMs;
+
+  let removed = 0;
+  for (const entry of fs.readdirSync(tempDir)) {
+    const workspacePath = path.join(tempDir, entry);
+    try {
+      if (fs.statSync(workspacePath).mtimeMs < cutoff) {
+        fs.rmSync(workspacePath, { recursive: true, force: true });
+        removed++;
+      }
+    } catch (err) {
+      console.error(`⚠️ Failed to sweep ${workspacePath}:`, err);
+    }
+  }
+  if (removed > 0) {
+    await pruneWorktrees();
+    console.log(`🧹 Removed ${removed} expired workspace(s)`);
+  }
+};
+
+export const startWorkspaceSweeper = (): NodeJS.Timeout => {
+  const ttlMinutes = parseFloat(process.env.WORKSPACE_TTL_MINUTES || "60");
+  const everyMs = Math.min(ttlMinutes, 10) * 60_000;
+  sweepWorkspaces().catch((err) => console.error("Workspace sweep failed:", err));
+  const timer = setInterval(() => {
+    sweepWorkspaces().catch((err) => console.error("Workspace sweep failed:", err));
+  }, everyMs);
+  timer.unref();
+  return timer;
 };
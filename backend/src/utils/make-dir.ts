@@ -2,7 +2,7 @@ import path from "path";
 import fs from "fs";
 
 // STEP: 1 -> get the location of the backend folder and create temp inside it
-const tempDir = path.join(__dirname, "..", "..", "temp");
+export const tempDir = path.join(__dirname, "..", "..", "temp");
 /**
  * __dirname is the current directory of this file (backend/src/utils)
  * Going up two levels (.., ..) gets us to the backend folder
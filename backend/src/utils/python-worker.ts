@@ -0,0 +1,127 @@
+import path from "path";
+import readline from "readline";
+import { spawn, ChildProcessWithoutNullStreams } from "child_process";
+import type { ClonedRepo } from "./clone-repo";
+
+// Event emitted by python/worker.py for a single job
+export interface WorkerEvent {
+  id: string | null;
+  type: "start" | "log" | "stderr" | "done" | "error" | "ready" | "fatal" | "readme_chunk" | "readme_reset";
+  message?: string;
+  readme_path?: string;
+  text?: string;
+}
+
+// stdout markers agents_groq.py prints for streamed README text (see ReadmeStream)
+export const README_CHUNK_PREFIX = "[README_CHUNK]";
+export const README_RESET = "[README_RESET]";
+
+type JobListener = (event: WorkerEvent) => void;
+
+const pythonDir = path.resolve(__dirname, "..", "..", "python");
+
+// Prometheus text file the Python side merges its metrics into after every run
+// (METRICS_FILE, relative paths are relative to the python folder like for the scripts)
+export const getMetricsFile = (): string | null =>
+  process.env.METRICS_FILE ? path.resolve(pythonDir, process.env.METRICS_FILE) : null;
+
+export const getPythonCommand = (): string =>
+  process.env.NODE_ENV === "production"
+    ? "python"
+    : path.resolve(pythonDir, "venv", "bin", "python");
+
+/**
+ * Keeps one long-lived `python worker.py --workers N` process around so each
+ * README job skips interpreter start-up, imports and LLM client setup.
+ */
+class PythonWorkerPool {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private listeners = new Map<string, JobListener>();
+  private nextId = 0;
+  // Set when a worker can't start (e.g. a broken import); jobs then spawn agents_groq.py instead
+  failure: string | null = null;
+
+  constructor(private workers: number) {}
+
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.child) return this.child;
+
+    const child = spawn(
+      getPythonCommand(),
+      [path.join(pythonDir, "worker.py"), "--workers", String(this.workers)],
+      { cwd: pythonDir, env: process.env }
+    );
+
+    readline.createInterface({ input: child.stdout }).on("line", (line) => {
+      let event: WorkerEvent;
+      try {
+        event = JSON.parse(line);
+      } catch {
+        console.log(`🐍 ${line}`);
+        return;
+      }
+      if (event.id === null || event.id === undefined) {
+        if (event.type === "fatal") {
+          this.failure = event.message || "Python worker failed to start";
+          console.error(`❌ ${this.failure}; falling back to one Python process per request`);
+          child.kill();
+        } else if (event.type === "ready") {
+          console.log(`🔥 Python worker pool ready (${this.workers} workers)`);
+        } else if (event.message) {
+          console.log(`🐍 ${event.message}`);
+        }
+        return;
+      }
+      const listener = this.listeners.get(event.id);
+      if (!listener) return;
+      if (event.type === "done" || event.type === "error") this.listeners.delete(event.id);
+      listener(event);
+    });
+
+    child.stderr.on("data", (data) => console.error(`[worker] ${data}`));
+
+    child.on("close", (code) => {
+      console.error(`⚠️ Python worker pool exited with code ${code}`);
+      this.child = null;
+      // Fail whatever was in flight; the next job restarts the pool (or spawns, after a fatal start-up)
+      const message = this.failure || `Worker pool exited with code ${code}`;
+      for (const [id, listener] of this.listeners) {
+        listener({ id, type: "error", message });
+      }
+      this.listeners.clear();
+    });
+
+    this.child = child;
+    return child;
+  }
+
+  run(repo: ClonedRepo, onEvent: JobListener): void {
+    const child = this.ensureStarted();
+    const id = `${process.pid}-${++this.nextId}`;
+    this.listeners.set(id, onEvent);
+    child.stdin.write(
+      JSON.stringify({ id, repo_path: repo.repoPath, rev: repo.rev, output_dir: repo.outputDir }) + "\n"
+    );
+  }
+
+  warmUp(): void {
+    this.ensureStarted();
+  }
+}
+
+let pool: PythonWorkerPool | null = null;
+
+// PYTHON_WORKERS=0 (default) keeps the old spawn-per-request behaviour.
+// Read lazily because routes are imported before dotenv.config() runs.
+export const getWorkerPool = (): PythonWorkerPool | null => {
+  const workerCount = parseInt(process.env.PYTHON_WORKERS || "0", 10);
+  if (workerCount <= 0) return null;
+  if (!pool) pool = new PythonWorkerPool(workerCount);
+  return pool.failure ? null : pool;
+};
+
+// CLI args for `agents_groq.py` matching a cloned repo
+export const agentArgs = (repo: ClonedRepo): string[] =>
+  repo.rev
+    ? [repo.repoPath, "--rev", repo.rev, "--output", repo.outputDir]
+    : [repo.repoPath, "--output", repo.outputDir];
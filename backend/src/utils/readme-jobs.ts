@@ -0,0 +1,373 @@
+import path from "path";
+import fs from "fs";
+import crypto from "crypto";
+import readline from "readline";
+import { spawn } from "child_process";
+import { mkdir, readdir, readFile, rename, stat, unlink, writeFile } from "fs/promises";
+import { prepareClonePath } from "./make-dir";
+import { cloneRepo, removeWorkspace, resolveHead } from "./clone-repo";
+import type { ClonedRepo } from "./clone-repo";
+import {
+  agentArgs,
+  getPythonCommand,
+  getWorkerPool,
+  README_CHUNK_PREFIX,
+  README_RESET,
+} from "./python-worker";
+
+/**
+ * Job layer between POST /generate-readme and the clone + Python pipeline.
+ *
+ *  - Jobs are keyed by repo URL + the commit HEAD points at (`git ls-remote`, no clone).
+ *    A request for a key that is already queued or running joins that job: it gets
+ *    the events sent so far, then the live stream. One clone, one pipeline run.
+ *  - A README generated for the same commit is served from cache/readmes
+ *    (README_CACHE_HOURS) without cloning or calling an LLM.
+ *  - At most README_JOB_CONCURRENCY jobs run at once; the rest wait in a queue
+ *    ordered by priority, FIFO within a priority.
+ */
+
+// One SSE client listening to a job
+export interface JobSubscriber {
+  // A single `data:` payload, already formatted (e.g. "[README_CHUNK]<base64>")
+  send: (payload: string) => void;
+  end: () => void;
+}
+
+type JobStatus = "queued" | "running" | "finished";
+
+// Finished READMEs by repo + commit
+const readmeCacheDir = path.join(__dirname, "..", "..", "cache", "readmes");
+
+// How long a README is reused for the same commit; 0 disables the cache
+const getCacheHours = (): number => parseFloat(process.env.README_CACHE_HOURS || "168");
+
+// Read lazily because routes are imported before dotenv.config() runs
+const getConcurrency = (): number => {
+  const configured = parseInt(process.env.README_JOB_CONCURRENCY || "0", 10);
+  if (configured > 0) return configured;
+  // Default: one job per warm worker, or two spawned scripts
+  return Math.max(parseInt(process.env.PYTHON_WORKERS || "0", 10), 2);
+};
+
+const encode = (text: string): string => Buffer.from(text, "utf-8").toString("base64");
+
+const cachePathFor = (repoUrl: string, commit: string): string => {
+  const name = path.basename(repoUrl).replace(/\.git$/, "");
+  const hash = crypto.createHash("sha1").update(repoUrl).digest("hex").slice(0, 12);
+  return path.join(readmeCacheDir, `${name}-${hash}-${commit}.md`);
+};
+
+const readCachedReadme = async (repoUrl: string, commit: string): Promise<string | null> => {
+  const maxAgeMs = getCacheHours() * 60 * 60 * 1000;
+  if (maxAgeMs <= 0) return null;
+  const cachePath = cachePathFor(repoUrl, commit);
+  try {
+    if (Date.now() - (await stat(cachePath)).mtimeMs > maxAgeMs) return null;
+    return await readFile(cachePath, "utf-8");
+  } catch {
+    return null;
+  }
+};
+
+// Written through a temp file so a concurrent reader never sees half a README
+const writeCachedReadme = async (repoUrl: string, commit: string, content: string): Promise<void> => {
+  if (getCacheHours() <= 0) return;
+  await mkdir(readmeCacheDir, { recursive: true });
+  const cachePath = cachePathFor(repoUrl, commit);
+  const tmpPath = `${cachePath}.${process.pid}.tmp`;
+  await writeFile(tmpPath, content, "utf-8");
+  await rename(tmpPath, cachePath);
+  await pruneReadmeCache();
+};
+
+// Drop entries past README_CACHE_HOURS so the folder doesn't grow forever
+const pruneReadmeCache = async (): Promise<void> => {
+  const maxAgeMs = getCacheHours() * 60 * 60 * 1000;
+  for (const entry of await readdir(readmeCacheDir)) {
+    const entryPath = path.join(readmeCacheDir, entry);
+    try {
+      if (Date.now() - (await stat(entryPath)).mtimeMs > maxAgeMs) await unlink(entryPath);
+    } catch {
+      // Removed by someone else in the meantime
+    }
+  }
+};
+
+// Carries the exact SSE payload to send when the pipeline fails
+class JobError extends Error {
+  constructor(readonly payload: string) {
+    super(payload);
+  }
+}
+
+class ReadmeJob {
+  status: JobStatus = "queued";
+  // Everything sent so far, replayed to clients that join late
+  private history: string[] = [];
+  private subscribers = new Set<JobSubscriber>();
+
+  constructor(
+    readonly key: string,
+    readonly url: string,
+    readonly commit: string | null,
+    readonly priority: number
+  ) {}
+
+  get subscriberCount(): number {
+    return this.subscribers.size;
+  }
+
+  subscribe(subscriber: JobSubscriber): void {
+    for (const payload of this.history) subscriber.send(payload);
+    if (this.status === "finished") {
+      subscriber.end();
+    } else {
+      this.subscribers.add(subscriber);
+    }
+  }
+
+  unsubscribe(subscriber: JobSubscriber): void {
+    this.subscribers.delete(subscriber);
+  }
+
+  send(payload: string): void {
+    this.history.push(payload);
+    for (const subscriber of this.subscribers) subscriber.send(payload);
+  }
+
+  log(message: string): void {
+    console.log(message);
+    this.send(message);
+  }
+
+  finish(): void {
+    this.status = "finished";
+    for (const subscriber of this.subscribers) subscriber.end();
+    this.subscribers.clear();
+  }
+}
+
+// Runs the pipeline for a cloned repo; resolves once readme.md has been written
+const runPipeline = (job: ReadmeJob, clonedRepo: ClonedRepo): Promise<void> =>
+  new Promise((resolve, reject) => {
+    const sendReadmeChunk = (text: string) => job.send(`[README_CHUNK]${encode(text)}`);
+    const sendReadmeReset = () => job.send(`[README_RESET]`);
+
+    // Warm worker pool (PYTHON_WORKERS > 0): no interpreter start-up per request
+    const workerPool = getWorkerPool();
+    if (workerPool) {
+      job.log(`🐍 Dispatching job to warm Python worker pool`);
+      workerPool.run(clonedRepo, (event) => {
+        if (event.type === "readme_chunk") {
+          sendReadmeChunk(event.text || "");
+        } else if (event.type === "readme_reset") {
+          sendReadmeReset();
+        } else if (event.type === "log") {
+          job.log(`📝 ${event.message}`);
+        } else if (event.type === "stderr") {
+          job.log(`[ERROR] ${event.message}`);
+        } else if (event.type === "done") {
+          job.log(`✅ Python worker finished job`);
+          resolve();
+        } else if (event.type === "error") {
+          reject(new JobError(`[ERROR] Python worker failed: ${event.message}`));
+        }
+      });
+      return;
+    }
+
+    const pythonScriptPath = path.resolve(__dirname, "..", "..", "python", "agents_groq.py");
+    job.log(`🐍 Running Python script: ${pythonScriptPath}`);
+
+    const pythonProcess = spawn(getPythonCommand(), [pythonScriptPath, ...agentArgs(clonedRepo)], {
+      cwd: path.dirname(pythonScriptPath),
+      env: process.env,
+    });
+
+    // Stream Python logs to clients, line by line so README chunks arrive whole
+    readline.createInterface({ input: pythonProcess.stdout }).on("line", (line) => {
+      if (line.startsWith(README_CHUNK_PREFIX)) {
+        let text: unknown;
+        try {
+          text = JSON.parse(line.slice(README_CHUNK_PREFIX.length));
+        } catch {
+          text = undefined;
+        }
+        // A mangled chunk line must not take the server down; pass it on as a log line
+        // (same as _JobStream._emit in worker.py)
+        if (typeof text === "string") sendReadmeChunk(text);
+        else job.log(`📝 ${line.trim()}`);
+      } else if (line === README_RESET) {
+        sendReadmeReset();
+      } else if (line.trim()) {
+        job.log(`📝 ${line.trim()}`);
+      }
+    });
+
+    pythonProcess.stderr.on("data", (data) => {
+      job.log(`[ERROR] ${data.toString()}`);
+    });
+
+    pythonProcess.on("error", reject);
+    pythonProcess.on("close", (code) => {
+      job.log(`✅ Python process exited with code ${code}`);
+      if (code === 0) {
+        resolve();
+      } else {
+        reject(new JobError(`[ERROR] Python process exited with code ${code}`));
+      }
+    });
+  });
+
+const runJob = async (job: ReadmeJob): Promise<void> => {
+  const finalDestination = prepareClonePath(job.url);
+  try {
+    job.log(`📂 Cloning repository to: ${finalDestination}`);
+
+    // Shallow, blobless clone through the per-URL mirror cache (see CLONE_MODE)
+    const clonedRepo = await cloneRepo(job.url, finalDestination);
+    job.log(`✅ Repository cloned successfully.`);
+
+    await runPipeline(job, clonedRepo);
+
+    let readmeContent: string;
+    try {
+      readmeContent = await readFile(path.join(finalDestination, "readme.md"), "utf-8");
+    } catch (readErr) {
+      console.error("Failed to read generated README:", readErr);
+      throw new JobError(`[ERROR] Failed to read README file.`);
+    }
+
+    // Cache under the commit actually generated from; HEAD may have moved since ls-remote
+    const commit = clonedRepo.commit || job.commit;
+    if (commit) {
+      await writeCachedReadme(job.url, commit, readmeContent).catch((cacheErr) =>
+        console.error("Failed to cache README:", cacheErr)
+      );
+    }
+
+    job.log(`[DONE] README generated successfully.`);
+    // README content Base64-encoded so it survives SSE formatting
+    job.send(`[README]${encode(readmeContent)}`);
+  } catch (err) {
+    if (err instanceof JobError) {
+      job.send(err.payload);
+      return;
+    }
+    console.error("❌ Error in README generation:", err);
+    if (fs.existsSync(finalDestination)) {
+      try {
+        await removeWorkspace(finalDestination);
+        console.log(`🧹 Cleaned up directory: ${finalDestination}`);
+      } catch (cleanupErr) {
+        console.error("Cleanup error:", cleanupErr);
+      }
+    }
+    job.send(`[ERROR] README generation failed.`);
+  }
+};
+
+class ReadmeJobQueue {
+  // Queued and running jobs by key
+  private inflight = new Map<string, ReadmeJob>();
+  private waiting: ReadmeJob[] = [];
+  private running = 0;
+  // Concurrent requests for the same URL share one ls-remote
+  private headLookups = new Map<string, Promise<string | null>>();
+
+  private resolveHead(url: string): Promise<string | null> {
+    let lookup = this.headLookups.get(url);
+    if (!lookup) {
+      lookup = resolveHead(url)
+        .catch((err) => {
+          console.error(`Failed to resolve HEAD of ${url}:`, err);
+          return null;
+        })
+        .finally(() => this.headLookups.delete(url));
+      this.headLookups.set(url, lookup);
+    }
+    return lookup;
+  }
+
+  /**
+   * Subscribe a client to the README for `url`: a cached result, an existing
+   * job for the same commit, or a new queued job. Returns an unsubscribe function
+   * (a queued job nobody listens to anymore is dropped before it starts).
+   */
+  async submit(url: string, subscriber: JobSubscriber, priority = 0): Promise<() => void> {
+    const commit = await this.resolveHead(url);
+
+    if (commit) {
+      const cached = await readCachedReadme(url, commit);
+      if (cached !== null) {
+        const reused = `♻️ Reusing the README generated for commit ${commit.slice(0, 7)}`;
+        console.log(reused);
+        subscriber.send(reused);
+        subscriber.send(`[DONE] README generated successfully.`);
+        subscriber.send(`[README]${encode(cached)}`);
+        subscriber.end();
+        return () => undefined;
+      }
+    }
+
+    // No await from here on, so two requests can't both create the job.
+    // Without a commit (ls-remote failed) concurrent requests still coalesce on the URL
+    const key = `${url}#${commit || "HEAD"}`;
+    const existing = this.inflight.get(key);
+    if (existing) {
+      const state = existing.status === "running" ? "in progress" : "queued";
+      subscriber.send(`🔗 A job for this commit is already ${state}, sharing its progress`);
+      existing.subscribe(subscriber);
+      return () => existing.unsubscribe(subscriber);
+    }
+
+    const job = new ReadmeJob(key, url, commit, priority);
+    this.inflight.set(key, job);
+    job.subscribe(subscriber);
+    this.enqueue(job);
+    return () => job.unsubscribe(subscriber);
+  }
+
+  private enqueue(job: ReadmeJob): void {
+    // Higher priority first, FIFO within a priority
+    const index = this.waiting.findIndex((queued) => queued.priority < job.priority);
+    if (index === -1) {
+      this.waiting.push(job);
+    } else {
+      this.waiting.splice(index, 0, job);
+    }
+    this.pump();
+
+    if (job.status === "queued") {
+      const position = this.waiting.indexOf(job) + 1;
+      job.log(`⏳ Queued at position ${position} (${this.running} of ${getConcurrency()} jobs running)`);
+    }
+  }
+
+  private pump(): void {
+    while (this.running < getConcurrency() && this.waiting.length) {
+      const job = this.waiting.shift()!;
+      if (job.subscriberCount === 0) {
+        // Every client disconnected while it waited
+        console.log(`🗑️ Dropping queued job without listeners: ${job.key}`);
+        this.inflight.delete(job.key);
+        continue;
+      }
+      this.running++;
+      job.status = "running";
+      runJob(job).finally(() => {
+        this.running--;
+        this.inflight.delete(job.key);
+        job.finish();
+        this.pump();
+      });
+    }
+  }
+
+  stats(): { running: number; queued: number; concurrency: number } {
+    return { running: this.running, queued: this.waiting.length, concurrency: getConcurrency() };
+  }
+}
+
+export const readmeJobs = new ReadmeJobQueue();
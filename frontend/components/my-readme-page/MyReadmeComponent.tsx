@@ -43,6 +43,13 @@ export default function MyReadmeComponent({
     return "text-gray-300 text-wrap";
   };
 
+  // Base64 SSE payload -> UTF-8 text
+  const decodeBase64 = (base64: string) => {
+    const binary = window.atob(base64);
+    const bytes = Uint8Array.from(binary, (char) => char.charCodeAt(0));
+    return new TextDecoder("utf-8").decode(bytes);
+  };
+
   /**
    * Parse individual SSE message chunks ("data: ...\n\n") coming from backend
    * basically SSE se data jaise aa raha usko as it is nhi dikha skte to usko sudhar rahe
@@ -53,14 +60,22 @@ export default function MyReadmeComponent({
 
     if (!data) return;
 
-    if (data.startsWith("[README]")) {
-      // The rest is base64-encoded README markdown
-      const base64 = data.replace("[README]", "");
+    if (data.startsWith("[README_CHUNK]")) {
+      // Next piece of the README while it is still being written: show it right away
+      try {
+        const text = decodeBase64(data.replace("[README_CHUNK]", ""));
+        setReadmeContent((prev) => prev + text);
+      } catch (e) {
+        console.error("Failed to decode README chunk", e);
+      }
+      setLoading(false);
+    } else if (data.startsWith("[README_RESET]")) {
+      // The model failed mid-stream and generation restarted
+      setReadmeContent("");
+    } else if (data.startsWith("[README]")) {
+      // The rest is base64-encoded README markdown (the complete, final file)
       try {
-        const binary = window.atob(base64);
-        const bytes = Uint8Array.from(binary, (char) => char.charCodeAt(0));
-        const decoded = new TextDecoder("utf-8").decode(bytes);
-        setReadmeContent(decoded);
+        setReadmeContent(decodeBase64(data.replace("[README]", "")));
       } catch (e) {
         console.error("Failed to decode README content", e);
       }